@@ -0,0 +1,137 @@
+"""Benchmark the native DBF/CDX reader against the ADS provider.
+
+Reads the mapped columns of CAT_PROD, VENTA and PARTVTA in full and seeks
+sampled folios through the PARTVTA NO_REFEREN tag, with each backend on
+the same directory, and checks that both return the same records. The
+tables must be unencrypted for the native reader (e.g. a decrypted copy
+of the source directory). ADS is only run when --dll is given, so the
+native side alone can be measured on any OS. With --replica the tables are
+also copied (in full) into a SQLite replica at PATH and read back through
+ReplicaReader. Other backends are compared with the native one. Run from
+the project root:
+
+    python benchmarks/bench_backends.py DATA_DIR [--dll PATH --password PW] [--replica PATH] [--repeat N] [--seeks N]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.dbf_enc_reader.core import DBFReader
+from src.dbf_enc_reader.mapping_manager import MappingManager
+from src.dbf_enc_reader.native import NativeDBFReader
+from src.dbf_enc_reader.replica import ReplicaReader, SQLiteReplica
+
+TABLES = ('CAT_PROD.DBF', 'VENTA.DBF', 'PARTVTA.DBF')
+
+# Tag and table of the seek benchmark, as the VENTAS detail lookup uses them
+SEEK_TABLE = 'PARTVTA.DBF'
+SEEK_TAG = 'NO_REFEREN'
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> tuple:
+    """Fastest of several runs of func(), with the result of the last one."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def sample_keys(reader: DBFReader, count: int) -> List[str]:
+    """Random folios of VENTA, the keys the detail lookup seeks."""
+    folios = [record['NO_REFEREN'] for record in reader.iter_records('VENTA.DBF', columns=['NO_REFEREN'])]
+    return random.Random(42).sample(folios, min(count, len(folios)))
+
+
+def bench_reader(reader: DBFReader, manager: MappingManager, keys: List[str], repeat: int) -> Dict[str, Any]:
+    results = {}
+    for table in TABLES:
+        columns = manager.get_source_fields(table)
+        seconds, records = best_time(lambda: reader.read_table(table, columns=columns), repeat)
+        results[table] = {'seconds': seconds, 'rows': len(records), 'records': records}
+
+    if keys and reader.has_index(SEEK_TABLE, SEEK_TAG):
+        columns = manager.get_source_fields(SEEK_TABLE)
+        seconds, records = best_time(
+            lambda: list(reader.iter_index_ranges(SEEK_TABLE, SEEK_TAG, [(key, key) for key in keys], columns)),
+            repeat)
+        results['seek'] = {'seconds': seconds, 'rows': len(keys), 'records': records}
+    return results
+
+
+def open_ads(data_dir: str, dll_path: str, password: str) -> Optional[DBFReader]:
+    from src.dbf_enc_reader.connection import DBFConnection
+    from src.dbf_enc_reader.pool import get_default_pool
+    try:
+        DBFConnection.set_dll_path(dll_path)
+    except (ImportError, RuntimeError) as e:
+        print(f"ADS not available, skipped: {e}")
+        return None
+    return DBFReader(data_dir, password, get_default_pool())
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    backends = list(results)
+    print(f"\n{'':<14}" + ''.join(f"{name:>26}" for name in backends))
+    for stage in results[backends[0]]:
+        line = f"{stage:<14}"
+        for name in backends:
+            timing = results[name].get(stage)
+            if timing is None:
+                line += f"{'-':>26}"
+                continue
+            rate = timing['rows'] / timing['seconds'] if timing['seconds'] else 0
+            line += f"{timing['seconds']:>9.3f} s {rate:>12,.0f}/s"
+        native = results[backends[0]].get(stage)
+        for name in backends[1:]:
+            other = results[name].get(stage)
+            if native is None or other is None:
+                continue
+            line += f"  {name} x{other['seconds'] / native['seconds']:.1f}" if native['seconds'] else ''
+            line += '' if native['records'] == other['records'] else f'  {name} MISMATCH'
+        print(line)
+
+
+def _option(name: str, default: Optional[str]) -> Optional[str]:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1].startswith('--'):
+        print(__doc__)
+        sys.exit(1)
+    data_dir = str(Path(sys.argv[1]).resolve())
+    repeat = int(_option('--repeat', '3'))
+    seeks = int(_option('--seeks', '1000'))
+    dll_path = _option('--dll', None)
+    manager = MappingManager(str(Path(project_root) / "mappings.json"))
+
+    readers = {'native': NativeDBFReader(data_dir)}
+    if dll_path:
+        ads = open_ads(data_dir, dll_path, _option('--password', '') or '')
+        if ads is not None:
+            readers['ads'] = ads
+
+    replica_path = _option('--replica', None)
+    if replica_path:
+        start = time.perf_counter()
+        tables = SQLiteReplica(replica_path, manager).refresh(readers['native'], full=True)
+        print(f"Replica built in {time.perf_counter() - start:.3f} s: "
+              + ', '.join(f"{table.table} {table.rows_read} rows" for table in tables))
+        readers['replica'] = ReplicaReader(replica_path)
+
+    keys = sample_keys(readers['native'], seeks)
+    results = {name: bench_reader(reader, manager, keys, repeat) for name, reader in readers.items()}
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
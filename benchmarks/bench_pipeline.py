@@ -0,0 +1,253 @@
+"""Benchmark suite: read, convert, transform, join and serialize stages.
+
+Runs the export pipeline on synthetic tables (see synthetic.py) with the
+stand-in DBF reader in place of the ADS provider, so it needs neither
+Windows nor a live dataset. Records flow through the stages in chunks and
+each stage is timed on whole chunks, so memory stays flat at any scale and
+per-call timer overhead does not distort the results.
+
+Results are written to benchmarks/results/ as JSON and compared with the
+previous result of the same scale. Run from the project root:
+
+    python benchmarks/bench_pipeline.py [--sales N] [--fanout N] [--products N] [--repeat N] [--data DIR]
+"""
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add project root to path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.dbf_enc_reader.converters import DataConverter
+from src.dbf_enc_reader.join import merge_join
+from src.dbf_enc_reader.mapping_manager import MappingManager
+from src.sinks.base import Sink
+from src.sinks.registry import create_sink, create_split_sink
+
+import synthetic
+
+results_dir = Path(__file__).parent / "results"
+
+# Records per chunk passed between stages
+CHUNK_SIZE = 50000
+
+# A stage slower than the previous result by more than this is flagged
+REGRESSION_THRESHOLD = 0.10
+
+SINK_FORMATS = ('ndjson', 'json', 'csv')
+
+
+class StageTimer:
+    """Seconds and rows accumulated per pipeline stage."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.rows: Dict[str, int] = {}
+
+    def run(self, stage: str, func: Callable[[], Any], rows: Optional[int] = None) -> Any:
+        """Time func() as part of stage; rows defaults to len() of its result."""
+        start = time.perf_counter()
+        result = func()
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - start
+        self.rows[stage] = self.rows.get(stage, 0) + (len(result) if rows is None else rows)
+        return result
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {stage: {
+            'seconds': round(seconds, 6),
+            'rows': self.rows[stage],
+            'rows_per_second': round(self.rows[stage] / seconds, 1) if seconds else None,
+        } for stage, seconds in self.seconds.items()}
+
+
+def row_converter(path: Path, columns: List[str]) -> Callable[[Dict[str, str]], Dict[str, Any]]:
+    """Convert stored text to the values the ADS reader returns."""
+    fields = synthetic.read_fields(str(path))
+    field_types = {name: field_type for name, field_type, _, _ in fields}
+    to_python = synthetic.converters(fields)
+    from_decimal = DataConverter().from_decimal
+
+    def numeric(convert: Callable[[str], Any]) -> Callable[[str], Any]:
+        # Typed reads of System.Decimal columns give int or float
+        return lambda text: None if (value := convert(text)) is None else from_decimal(value)
+
+    pipeline = [(name, numeric(to_python[name]) if field_types[name] == 'N' else to_python[name])
+                for name in columns]
+    return lambda raw: {name: convert(raw[name]) for name, convert in pipeline}
+
+
+def transform_chunk(records: List[Dict[str, Any]], transform: Callable) -> List[Dict[str, Any]]:
+    return [transformed for transformed in map(transform, records) if transformed]
+
+
+def write_all(sinks: Dict[str, Sink], records: List[Dict[str, Any]], timer: StageTimer) -> None:
+    for fmt, sink in sinks.items():
+        timer.run(f'serialize_{fmt}', lambda: sink.write_batch(records), len(records))
+
+
+def close_all(sinks: Dict[str, Sink], timer: StageTimer) -> None:
+    for fmt, sink in sinks.items():
+        timer.run(f'serialize_{fmt}', sink.close, 0)
+
+
+def bench_cat_prod(data_dir: Path, manager: MappingManager, output_dir: Path) -> Dict[str, Any]:
+    path = data_dir / "CAT_PROD.DBF"
+    columns = manager.get_source_fields("CAT_PROD.DBF")
+    transform = manager.compile("CAT_PROD.DBF").transform
+    convert = row_converter(path, columns)
+    schema = manager.get_output_schema("CAT_PROD.DBF")
+    sinks = {fmt: create_sink(str(output_dir / f"cat_prod_{fmt}"), fmt, None, schema).open() for fmt in SINK_FORMATS}
+
+    timer = StageTimer()
+    raw_records = synthetic.iter_raw(str(path), columns)
+    while True:
+        raw = timer.run('read', lambda: list(islice(raw_records, CHUNK_SIZE)))
+        if not raw:
+            break
+        records = timer.run('convert', lambda: [convert(record) for record in raw])
+        products = timer.run('transform', lambda: transform_chunk(records, transform))
+        write_all(sinks, products, timer)
+    close_all(sinks, timer)
+    return timer.report()
+
+
+def bench_ventas(data_dir: Path, manager: MappingManager, output_dir: Path) -> Dict[str, Any]:
+    venta, partvta = data_dir / "VENTA.DBF", data_dir / "PARTVTA.DBF"
+    header_columns = manager.get_source_fields("VENTA.DBF")
+    detail_columns = manager.get_source_fields("PARTVTA.DBF")
+    header_transform = manager.compile("VENTA.DBF").transform
+    detail_transform = manager.compile("PARTVTA.DBF").transform
+    convert_header, convert_detail = row_converter(venta, header_columns), row_converter(partvta, detail_columns)
+    header_schema = manager.get_output_schema("VENTA.DBF")
+    detail_schema = manager.get_output_schema("PARTVTA.DBF")
+    sinks = {}
+    for fmt in SINK_FORMATS:
+        base_path = str(output_dir / f"ventas_{fmt}")
+        if fmt == 'csv':
+            sinks[fmt] = create_split_sink(base_path, fmt, None, header_schema, detail_schema).open()
+        else:
+            sinks[fmt] = create_sink(base_path, fmt).open()
+
+    timer = StageTimer()
+    raw_headers = synthetic.iter_raw(str(venta), header_columns)
+    raw_details = synthetic.iter_raw(str(partvta), detail_columns)
+    pending: List[Dict[str, str]] = []
+
+    def read_details(last_folio: str) -> List[Dict[str, str]]:
+        # Both tables are in folio order (zero-padded text), as the merge join reads them
+        chunk, pending[:] = pending[:], []
+        for detail in raw_details:
+            if detail['NO_REFEREN'] > last_folio:
+                pending.append(detail)
+                break
+            chunk.append(detail)
+        return chunk
+
+    while True:
+        raw = timer.run('read', lambda: list(islice(raw_headers, CHUNK_SIZE)))
+        if not raw:
+            break
+        details_raw = timer.run('read', lambda: read_details(raw[-1]['NO_REFEREN']))
+        headers = timer.run('convert', lambda: [convert_header(record) for record in raw])
+        details = timer.run('convert', lambda: [convert_detail(record) for record in details_raw])
+        headers = timer.run('transform', lambda: transform_chunk(headers, header_transform))
+        details = timer.run('transform', lambda: transform_chunk(details, detail_transform))
+        sales = timer.run('join', lambda: list(merge_join(headers, details, 'Folio', 'Folio')))
+        write_all(sinks, sales, timer)
+    close_all(sinks, timer)
+    return timer.report()
+
+
+def best_of(runs: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Fastest timing of each stage over several runs."""
+    return {table: {stage: min((run[table][stage] for run in runs), key=lambda timing: timing['seconds'])
+                    for stage in stages} for table, stages in runs[0].items()}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_result(scale: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    """Most recent stored result with the same rows per table."""
+    for path in sorted(results_dir.glob("pipeline_*.json"), reverse=True):
+        with open(path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        if result['meta']['scale'] == scale:
+            return result
+    return None
+
+
+def print_results(results: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> None:
+    for table, stages in results.items():
+        print(f"\n{table}")
+        for stage, timing in stages.items():
+            line = f"  {stage:<18} {timing['seconds']:9.3f} s  {timing['rows_per_second'] or 0:>12,.0f} rows/s"
+            before = (previous or {}).get('results', {}).get(table, {}).get(stage)
+            if before and before['seconds']:
+                change = timing['seconds'] / before['seconds'] - 1
+                flag = '  REGRESSION' if change > REGRESSION_THRESHOLD else ''
+                line += f"  {change:+7.1%} vs {previous['meta']['revision']}{flag}"
+            print(line)
+
+
+def _option(name: str, default: Optional[str]) -> Optional[str]:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def main():
+    sales = int(_option('--sales', '10000'))
+    products = int(_option('--products', str(sales)))
+    fanout = int(_option('--fanout', '4'))
+    repeat = int(_option('--repeat', '3'))
+    manager = MappingManager(str(Path(project_root) / "mappings.json"))
+
+    with tempfile.TemporaryDirectory(prefix="dbf_bench_") as tmp:
+        data_dir = Path(_option('--data', None) or Path(tmp) / "data")
+        if not (data_dir / "VENTA.DBF").exists():
+            start = time.perf_counter()
+            counts = synthetic.generate(str(data_dir), sales=sales, products=products, fanout=fanout)
+            print(f"Generated {counts} in {time.perf_counter() - start:.1f}s")
+        # Rows per table, so results are only compared with runs on the same data size
+        scale = {table: synthetic.record_count(str(data_dir / table))
+                 for table in ('CAT_PROD.DBF', 'VENTA.DBF', 'PARTVTA.DBF')}
+        output_dir = Path(tmp) / "output"
+
+        runs = [{
+            'CAT_PROD': bench_cat_prod(data_dir, manager, output_dir),
+            'VENTAS': bench_ventas(data_dir, manager, output_dir),
+        } for _ in range(repeat)]
+        results = best_of(runs)
+
+    meta = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': scale,
+        'repeat': repeat,
+    }
+    previous = previous_result(scale)
+    print_results(results, previous)
+
+    results_dir.mkdir(exist_ok=True)
+    output_file = results_dir / f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{meta['revision'] or 'local'}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"\nResults saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Startup benchmark: import cost of the entry points, checked against a budget.
+
+Runs each entry point under `python -X importtime` in a fresh process,
+reports the slowest imports (interpreter startup excluded) and fails if
+the total exceeds the budget in startup_budget.json, or if a module that
+must stay lazy (pythonnet, pyarrow, ...) was imported. Run from the project root:
+
+    python benchmarks/bench_startup.py [--top N] [--update]
+
+--update rewrites the budgets to the measured times plus 50% headroom.
+"""
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+project_root = Path(__file__).parent.parent
+budget_file = Path(__file__).parent / "startup_budget.json"
+
+# Runs per entry point; the median is compared with the budget
+RUNS = 5
+
+
+def measure_imports(statement: str, baseline: Set[str] = frozenset()) -> Tuple[int, List[Tuple[str, int, int]]]:
+    """Import times of one fresh interpreter running statement.
+
+    Args:
+        statement: Python code to run
+        baseline: Modules imported by the bare interpreter (site, encodings),
+            left out of the total
+
+    Returns:
+        Total cumulative microseconds of the top-level imports, and
+        (module, self us, cumulative us) for every import
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=project_root,
+                            capture_output=True, text=True, check=True)
+    modules = []
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.rstrip()
+        if name.strip() in baseline:
+            continue
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+        # Top-level imports are not indented
+        if not name[1:].startswith(" "):
+            total += int(cumulative_us)
+    return total, modules
+
+
+def bench_entry_point(name: str, budget: Dict, top: int, baseline: Set[str]) -> Tuple[float, bool]:
+    runs = [measure_imports(budget["statement"], baseline) for _ in range(RUNS)]
+    median_ms = statistics.median(total for total, _ in runs) / 1000
+    modules = runs[-1][1]
+    imported = {module for module, _, _ in modules}
+    forbidden = sorted(imported.intersection(budget.get("forbidden", [])))
+
+    ok = median_ms <= budget["budget_ms"] and not forbidden
+    print(f"\n{name}: {median_ms:.1f} ms (budget {budget['budget_ms']} ms, median of {RUNS}) "
+          f"{'OK' if ok else 'OVER BUDGET'}")
+    for module, _, cumulative_us in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+    if forbidden:
+        print(f"  Eagerly imported: {', '.join(forbidden)}")
+    return median_ms, ok
+
+
+def main():
+    top = int(sys.argv[sys.argv.index("--top") + 1]) if "--top" in sys.argv else 10
+    with open(budget_file, "r", encoding="utf-8") as f:
+        budgets = json.load(f)
+
+    baseline = {module for module, _, _ in measure_imports("pass")[1]}
+    results = {name: bench_entry_point(name, budget, top, baseline) for name, budget in budgets.items()}
+
+    if "--update" in sys.argv:
+        for name, (median_ms, _) in results.items():
+            budgets[name]["budget_ms"] = round(median_ms * 1.5)
+        with open(budget_file, "w", encoding="utf-8") as f:
+            json.dump(budgets, f, indent=2)
+            f.write("\n")
+        print(f"\nBudgets updated in {budget_file}")
+    elif not all(ok for _, ok in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
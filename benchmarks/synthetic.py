@@ -0,0 +1,429 @@
+"""Synthetic CAT_PROD, VENTA and PARTVTA tables as plain (unencrypted) DBF files.
+
+The tables have the columns mappings.json reads plus a few unmapped ones,
+realistic widths, sales sorted by folio with increasing dates, and a
+configurable number of detail rows per sale. The same seed always gives
+the same files. Optionally writes the VENTA.CDX and PARTVTA.CDX indexes
+(MACHINE collation, as read by the native backend). Also provides a minimal
+pure-Python reader used as a stand-in for the ADS provider by
+bench_pipeline.py. Run from the project root:
+
+    python benchmarks/synthetic.py OUTPUT_DIR [--sales N] [--products N] [--fanout N] [--seed N] [--indexes]
+"""
+import random
+import struct
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# (name, type, length, decimals) of a DBF column
+Field = Tuple[str, str, int, int]
+
+ENCODING = 'cp1252'
+
+# Size of a CDX node and of a tag header
+CDX_NODE_SIZE = 512
+CDX_HEADER_SIZE = 1024
+
+# Key bytes and 5-byte entries that fit in a compact leaf
+CDX_LEAF_SPACE = 488
+
+# Offset of the Julian day number of 0001-01-01 from date.toordinal()
+JULIAN_OFFSET = 1721425
+
+CAT_PROD_FIELDS: List[Field] = [
+    ('CLAVE', 'C', 20, 0), ('PROD_DESCR', 'C', 60, 0), ('PROD_EXIST', 'N', 12, 3),
+    ('PROD_LIS10', 'N', 14, 4), ('PROD_UNMED', 'C', 5, 0), ('PROV_CLAVE', 'C', 10, 0),
+    ('CDESLARGA', 'C', 120, 0), ('BARCODE', 'C', 20, 0), ('FAMILIA', 'C', 10, 0),
+    ('SUBFAM', 'C', 10, 0), ('PROD_PROME', 'N', 14, 4), ('PROD_COSTO', 'N', 14, 4),
+    ('F_ALTA', 'D', 8, 0), ('ACTIVO', 'L', 1, 0),
+]
+
+VENTA_FIELDS: List[Field] = [
+    ('TIPO_DOC', 'C', 3, 0), ('NO_REFEREN', 'C', 10, 0), ('CLAVE_CLI', 'C', 10, 0),
+    ('CLAVE_VEND', 'N', 4, 0), ('F_EMISION', 'D', 8, 0), ('TOTAL_BRUT', 'N', 14, 2),
+    ('HORA', 'C', 8, 0), ('OBSERV', 'C', 40, 0),
+]
+
+PARTVTA_FIELDS: List[Field] = [
+    ('NO_REFEREN', 'C', 10, 0), ('CLAVE_ART', 'C', 20, 0), ('SUBFAM', 'C', 10, 0),
+    ('CANTIDAD', 'N', 10, 3), ('PRECIO_UNI', 'N', 14, 4), ('DESCUENTO', 'N', 8, 2),
+    ('PARTIDA', 'N', 4, 0), ('IMPUESTO', 'N', 6, 2),
+]
+
+
+class DBFWriter:
+    """Write a dBase III table record by record.
+
+    The record count in the header is patched on close, so rows can be
+    streamed without knowing their number in advance.
+    """
+
+    def __init__(self, path: str, fields: Sequence[Field]):
+        """
+        Initialize the writer.
+
+        Args:
+            path: DBF file to create
+            fields: Columns of the table
+        """
+        self.path = Path(path)
+        self.fields = list(fields)
+        self.count = 0
+        self._file = None
+        self._formatters = [self._formatter(*field) for field in self.fields]
+
+    def __enter__(self) -> 'DBFWriter':
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'wb', buffering=1024 * 1024)
+        self._file.write(self._header(0))
+        for name, field_type, length, decimals in self.fields:
+            self._file.write(struct.pack('<11sc4xBB14x', name.encode('ascii'), field_type.encode('ascii'),
+                                         length, decimals))
+        self._file.write(b'\r')
+        return self
+
+    def write_rows(self, rows: Iterable[Sequence[Any]]) -> None:
+        """Append rows given as value sequences in field order."""
+        formatters = self._formatters
+        write = self._file.write
+        for row in rows:
+            write(b' ' + b''.join([format_value(value) for format_value, value in zip(formatters, row)]))
+            self.count += 1
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._file.write(b'\x1a')
+        self._file.seek(0)
+        self._file.write(self._header(self.count))
+        self._file.close()
+
+    def _header(self, count: int) -> bytes:
+        today = date.today()
+        header_length = 32 + 32 * len(self.fields) + 1
+        record_length = 1 + sum(length for _, _, length, _ in self.fields)
+        return struct.pack('<BBBBIHH20x', 0x03, today.year - 1900, today.month, today.day,
+                           count, header_length, record_length)
+
+    @staticmethod
+    def _formatter(name: str, field_type: str, length: int, decimals: int) -> Callable[[Any], bytes]:
+        if field_type == 'C':
+            return lambda value: ('' if value is None else str(value)).encode(ENCODING)[:length].ljust(length)
+        if field_type == 'N':
+            pattern = f"{{:>{length}.{decimals}f}}"
+            return lambda value: (b' ' * length if value is None else pattern.format(value).encode('ascii')[:length])
+        if field_type == 'D':
+            return lambda value: b' ' * 8 if value is None else value.strftime('%Y%m%d').encode('ascii')
+        if field_type == 'L':
+            return lambda value: b'?' if value is None else (b'T' if value else b'F')
+        raise ValueError(f"Unsupported field type '{field_type}' for {name}")
+
+
+class CDXWriter:
+    """Write a compact compound (.cdx) index, as FoxPro and ADS build it.
+
+    Every tag is a B-tree of 512-byte nodes: compressed leaves (duplicate
+    prefix and trailing pad bytes dropped) linked left to right, under
+    interior nodes holding the last key of each child. The tag directory
+    is a tag of its own.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, path: str, tags: Sequence[Tuple[str, str, int, bytes, List[Tuple[bytes, int]]]]) -> None:
+        """Write an index file.
+
+        Args:
+            path: .cdx file to create
+            tags: (name, expression, key length, pad byte, [(key, record number)])
+                per tag; keys are stored bytes of exactly key length
+        """
+        self._buffer = bytearray()
+        directory = self._allocate(CDX_HEADER_SIZE)
+        entries = []
+        for name, expression, key_length, pad, keys in tags:
+            header = self._allocate(CDX_HEADER_SIZE)
+            root = self._tree(sorted(keys), key_length, pad)
+            self._header(header, root, key_length, expression, 0x60)
+            entries.append((name.upper().encode('ascii').ljust(10), header))
+        self._header(directory, self._tree(sorted(entries), 10, b' '), 10, '', 0xE0)
+        Path(path).write_bytes(bytes(self._buffer))
+
+    def _allocate(self, size: int) -> int:
+        offset = len(self._buffer)
+        self._buffer += bytes(size)
+        return offset
+
+    def _header(self, offset: int, root: int, key_length: int, expression: str, options: int) -> None:
+        header = bytearray(CDX_HEADER_SIZE)
+        struct.pack_into('<iiiHB', header, 0, root, -1, 0, key_length, options)
+        text = expression.encode('ascii')
+        struct.pack_into('<H', header, 510, len(text) + 1)
+        header[512:512 + len(text)] = text
+        self._buffer[offset:offset + CDX_HEADER_SIZE] = header
+
+    def _tree(self, keys: List[Tuple[bytes, int]], key_length: int, pad: bytes) -> int:
+        """Write the nodes of a tag and return the offset of its root."""
+        leaves = self._pack_leaves(keys, key_length, pad)
+        offsets = [self._allocate(CDX_NODE_SIZE) for _ in leaves]
+        level = []
+        for i, items in enumerate(leaves):
+            attributes = 0x02 | (0x01 if len(leaves) == 1 else 0)
+            left = offsets[i - 1] if i else -1
+            right = offsets[i + 1] if i + 1 < len(offsets) else -1
+            self._buffer[offsets[i]:offsets[i] + CDX_NODE_SIZE] = self._leaf(items, attributes, left, right)
+            key, recno = items[-1][:2]
+            level.append((key, recno, offsets[i]))
+
+        per_node = (CDX_NODE_SIZE - 12) // (key_length + 8)
+        while len(level) > 1:
+            groups = [level[i:i + per_node] for i in range(0, len(level), per_node)]
+            offsets = [self._allocate(CDX_NODE_SIZE) for _ in groups]
+            parents = []
+            for i, group in enumerate(groups):
+                node = bytearray(CDX_NODE_SIZE)
+                left = offsets[i - 1] if i else -1
+                right = offsets[i + 1] if i + 1 < len(offsets) else -1
+                struct.pack_into('<HHii', node, 0, 0x01 if len(groups) == 1 else 0, len(group), left, right)
+                for j, (key, recno, child) in enumerate(group):
+                    start = 12 + j * (key_length + 8)
+                    node[start:start + key_length] = key
+                    struct.pack_into('>II', node, start + key_length, recno, child)
+                self._buffer[offsets[i]:offsets[i] + CDX_NODE_SIZE] = node
+                parents.append((group[-1][0], group[-1][1], offsets[i]))
+            level = parents
+        return level[0][2]
+
+    @staticmethod
+    def _pack_leaves(keys: List[Tuple[bytes, int]], key_length: int,
+                     pad: bytes) -> List[List[Tuple[bytes, int, int, int, int]]]:
+        """Split sorted keys into leaves of (key, recno, duplicate, trailing, size)."""
+        leaves = []
+        items = []
+        used = 0
+        previous = b''
+        for key, recno in keys:
+            trailing = len(key) - len(key.rstrip(pad))
+            duplicate = 0
+            while (items and duplicate < key_length - trailing
+                   and previous[duplicate] == key[duplicate]):
+                duplicate += 1
+            size = key_length - duplicate - trailing
+            if used + 5 + size > CDX_LEAF_SPACE:
+                leaves.append(items)
+                items, used = [], 0
+                duplicate, size = 0, key_length - trailing
+            items.append((key, recno, duplicate, trailing, size))
+            used += 5 + size
+            previous = key
+        if items:
+            leaves.append(items)
+        return leaves
+
+    @staticmethod
+    def _leaf(items: List[Tuple[bytes, int, int, int, int]], attributes: int, left: int, right: int) -> bytes:
+        """Compact leaf: 24-bit record numbers, 8-bit duplicate and trailing counts."""
+        node = bytearray(CDX_NODE_SIZE)
+        struct.pack_into('<HHii', node, 0, attributes, len(items), left, right)
+        free = CDX_LEAF_SPACE - sum(5 + size for *_, size in items)
+        struct.pack_into('<HIBBBBBB', node, 12, free, 0xFFFFFF, 0xFF, 0xFF, 24, 8, 8, 5)
+        position = CDX_NODE_SIZE
+        for i, (key, recno, duplicate, trailing, size) in enumerate(items):
+            info = recno | (duplicate << 24) | (trailing << 32)
+            node[24 + i * 5:29 + i * 5] = info.to_bytes(5, 'little')
+            position -= size
+            node[position:position + size] = key[duplicate:duplicate + size]
+        return bytes(node)
+
+
+def date_key(value: date) -> bytes:
+    """Stored key of a date in a numeric (non-DTOS) tag: its Julian day as a sortable double."""
+    raw = bytearray(struct.pack('>d', float(value.toordinal() + JULIAN_OFFSET)))
+    raw[0] |= 0x80
+    return bytes(raw)
+
+
+def read_fields(path: str) -> List[Field]:
+    """Columns declared in a DBF header."""
+    with open(path, 'rb') as f:
+        _, _, header_length, _ = _read_header(f)
+        fields = []
+        for _ in range((header_length - 33) // 32):
+            name, field_type, length, decimals = struct.unpack('<11sc4xBB14x', f.read(32))
+            fields.append((name.split(b'\0')[0].decode('ascii'), field_type.decode('ascii'), length, decimals))
+        return fields
+
+
+def record_count(path: str) -> int:
+    """Records declared in a DBF header, deleted ones included."""
+    with open(path, 'rb') as f:
+        return _read_header(f)[1]
+
+
+def iter_raw(path: str, columns: Optional[Sequence[str]] = None,
+             chunk_records: int = 4096) -> Iterator[Dict[str, str]]:
+    """Stream the records of a DBF file as raw column text.
+
+    Stand-in for the ADS reader: values are the padded text stored in the
+    file, converted to Python types separately (see converters()).
+
+    Args:
+        path: DBF file
+        columns: Columns to read (all if None)
+        chunk_records: Records read from disk at a time
+
+    Yields:
+        {column: text} per non-deleted record
+    """
+    fields = read_fields(path)
+    wanted = set(columns) if columns else None
+    slices = []
+    offset = 1
+    for name, _, length, _ in fields:
+        if wanted is None or name in wanted:
+            slices.append((name, offset, offset + length))
+        offset += length
+
+    with open(path, 'rb') as f:
+        _, count, header_length, record_length = _read_header(f)
+        f.seek(header_length)
+        remaining = count
+        while remaining:
+            n = min(chunk_records, remaining)
+            chunk = f.read(n * record_length)
+            remaining -= n
+            for start in range(0, n * record_length, record_length):
+                if chunk[start] == 0x2A:  # '*' marks a deleted record
+                    continue
+                yield {name: chunk[start + lo:start + hi].decode(ENCODING) for name, lo, hi in slices}
+
+
+def converters(fields: Sequence[Field]) -> Dict[str, Callable[[str], Any]]:
+    """Per-column converters from stored text to the Python values the
+    ADS reader returns (trimmed str, Decimal, datetime, bool)."""
+    def to_string(text: str) -> str:
+        return text.strip()
+
+    def to_decimal(text: str) -> Optional[Decimal]:
+        text = text.strip()
+        return Decimal(text) if text else None
+
+    def to_datetime(text: str) -> Optional[datetime]:
+        return datetime.strptime(text, '%Y%m%d') if text.strip() else None
+
+    def to_bool(text: str) -> Optional[bool]:
+        return None if text in ('?', ' ') else text in ('T', 't', 'Y', 'y')
+
+    by_type = {'C': to_string, 'N': to_decimal, 'D': to_datetime, 'L': to_bool}
+    return {name: by_type[field_type] for name, field_type, _, _ in fields}
+
+
+def generate(output_dir: str, sales: int = 10000, products: int = 10000, fanout: int = 4,
+             days: int = 365, seed: int = 42, indexes: bool = False) -> Dict[str, int]:
+    """Write CAT_PROD.DBF, VENTA.DBF and PARTVTA.DBF into output_dir.
+
+    With indexes, VENTA.CDX gets the tags NO_REFEREN, F_EMISION and
+    FECHA (DTOS(F_EMISION)) and PARTVTA.CDX the tag NO_REFEREN.
+
+    Args:
+        output_dir: Directory for the tables
+        sales: VENTA rows
+        products: CAT_PROD rows
+        fanout: Average PARTVTA rows per sale (each sale gets 1 to 2*fanout-1)
+        days: Days the sales are spread over, ending today
+        seed: Random seed
+        indexes: Also write VENTA.CDX and PARTVTA.CDX
+
+    Returns:
+        Rows written per table
+    """
+    rng = random.Random(seed)
+    out = Path(output_dir)
+    families = [f'FAM{i:02d}' for i in range(20)]
+    units = ['PZA', 'KG', 'LT', 'CJA', 'MT']
+
+    with DBFWriter(str(out / 'CAT_PROD.DBF'), CAT_PROD_FIELDS) as writer:
+        writer.write_rows((
+            f'{i:08d}', f'PRODUCTO {i} {rng.choice(units)}', rng.randint(0, 5000) / 10,
+            rng.randint(100, 999999) / 100, rng.choice(units), f'P{rng.randint(1, 300):04d}',
+            f'DESCRIPCION LARGA DEL PRODUCTO {i}', f'750{rng.randint(0, 10 ** 10 - 1):010d}',
+            families[i % len(families)], f'SUB{i % 97:03d}', rng.randint(100, 99999) / 100,
+            rng.randint(50, 50000) / 100, date(2015, 1, 1) + timedelta(days=i % 3000), i % 50 != 0,
+        ) for i in range(products))
+    product_count = writer.count
+
+    first_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    details_per_sale = [rng.randint(1, max(1, 2 * fanout - 1)) for _ in range(sales)]
+
+    def sale_rows() -> Iterator[Tuple[Any, ...]]:
+        for i in range(sales):
+            issued = first_day + timedelta(days=i * days // max(sales, 1))
+            yield ('V', f'{i + 1:06d}', f'C{rng.randint(1, 5000):05d}', rng.randint(1, 60), issued,
+                   rng.randint(100, 2000000) / 100, f'{rng.randint(8, 21):02d}:{rng.randint(0, 59):02d}:00', '')
+
+    def detail_rows() -> Iterator[Tuple[Any, ...]]:
+        for i, lines in enumerate(details_per_sale):
+            for line in range(lines):
+                product = rng.randrange(max(products, 1))
+                yield (f'{i + 1:06d}', f'{product:08d}', f'SUB{product % 97:03d}', rng.randint(1, 12),
+                       rng.randint(100, 99999) / 100, rng.choice((0, 0, 0, 5, 10)), line + 1, 16)
+
+    sale_keys: List[Tuple[str, datetime]] = []
+    detail_keys: List[str] = []
+
+    def collect(rows: Iterator[Tuple[Any, ...]], keys: List[Any],
+                key: Callable[[Tuple[Any, ...]], Any]) -> Iterator[Tuple[Any, ...]]:
+        for row in rows:
+            if indexes:
+                keys.append(key(row))
+            yield row
+
+    with DBFWriter(str(out / 'VENTA.DBF'), VENTA_FIELDS) as writer:
+        writer.write_rows(collect(sale_rows(), sale_keys, lambda row: (row[1], row[4])))
+    sale_count = writer.count
+    with DBFWriter(str(out / 'PARTVTA.DBF'), PARTVTA_FIELDS) as writer:
+        writer.write_rows(collect(detail_rows(), detail_keys, lambda row: row[0]))
+
+    if indexes:
+        def text_key(value: str) -> bytes:
+            return value.encode(ENCODING).ljust(10)
+
+        CDXWriter().write(str(out / 'VENTA.CDX'), [
+            ('NO_REFEREN', 'NO_REFEREN', 10, b' ',
+             [(text_key(folio), recno) for recno, (folio, _) in enumerate(sale_keys, 1)]),
+            ('F_EMISION', 'F_EMISION', 8, b'\0',
+             [(date_key(issued.date()), recno) for recno, (_, issued) in enumerate(sale_keys, 1)]),
+            ('FECHA', 'DTOS(F_EMISION)', 8, b' ',
+             [(issued.strftime('%Y%m%d').encode('ascii'), recno) for recno, (_, issued) in enumerate(sale_keys, 1)]),
+        ])
+        CDXWriter().write(str(out / 'PARTVTA.CDX'), [
+            ('NO_REFEREN', 'NO_REFEREN', 10, b' ',
+             [(text_key(folio), recno) for recno, folio in enumerate(detail_keys, 1)]),
+        ])
+
+    return {'CAT_PROD.DBF': product_count, 'VENTA.DBF': sale_count, 'PARTVTA.DBF': writer.count}
+
+
+def _read_header(f) -> Tuple[int, int, int, int]:
+    version, _, _, _, count, header_length, record_length = struct.unpack('<BBBBIHH20x', f.read(32))
+    return version, count, header_length, record_length
+
+
+def _option(name: str, default: int) -> int:
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1].startswith('--'):
+        print(__doc__)
+        sys.exit(1)
+    counts = generate(sys.argv[1], sales=_option('--sales', 10000), products=_option('--products', 10000),
+                      fanout=_option('--fanout', 4), seed=_option('--seed', 42), indexes='--indexes' in sys.argv)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
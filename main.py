@@ -1,12 +1,20 @@
+import argparse
 import os
+import sys
 from pathlib import Path
+from dataclasses import replace
 from datetime import datetime
-import json
-from dotenv import load_dotenv
 from src.config.dbf_config import DBFConfig
+from src.dbf_enc_reader.connection import DBFConnection
 from src.dbf_enc_reader.mapping_manager import MappingManager
-from src.controllers.cat_prod_controller import CatProdController
-from src.controllers.ventas_controller import VentasController
+from src.dbf_enc_reader.pool import get_default_pool
+from src.utils.checkpoint import CheckpointStore
+from src.utils.snapshot import SnapshotStore
+# Controllers, sinks, the daemon and dotenv are imported where they are used,
+# so the menu appears without loading them; see benchmarks/bench_startup.py
+
+# Trabajos que acepta run_export (y la cola del modo servicio)
+JOB_TYPES = ("cat_prod", "cat_prod_delta", "ventas", "ventas_incremental", "ventas_resumen", "replica_refresh")
 
 def get_resource_path(relative_path):
     """Get the path to a resource file, works for both script and exe"""
@@ -38,10 +46,12 @@ def load_configuration():
         print("Por favor, asegúrese de que el archivo .env existe en el mismo directorio que el ejecutable.")
         exit(1)
         
+    from dotenv import load_dotenv
     load_dotenv(env_path)
     
-    # Verificar variables de entorno requeridas
-    required_vars = ['DBF_ENCRYPTION_PASSWORD', 'DBF_SOURCE_DIR']
+    # Verificar variables de entorno requeridas (el lector nativo no usa contraseña)
+    backend = os.getenv('DBF_BACKEND', 'ads').lower()
+    required_vars = ['DBF_SOURCE_DIR'] if backend == 'native' else ['DBF_ENCRYPTION_PASSWORD', 'DBF_SOURCE_DIR']
     missing_vars = [var for var in required_vars if not os.getenv(var)]
     
     if missing_vars:
@@ -57,7 +67,28 @@ def load_configuration():
     return {
         'encryption_password': os.getenv('DBF_ENCRYPTION_PASSWORD'),
         'dll_path': dll_path,
-        'source_dir': os.getenv('DBF_SOURCE_DIR')
+        'source_dir': os.getenv('DBF_SOURCE_DIR'),
+        'lookback_days': int(os.getenv('VENTAS_LOOKBACK_DAYS', '3')),
+        'summary_keys': os.getenv('VENTAS_SUMMARY_KEYS', 'fecha'),
+        'summary_bucket': os.getenv('VENTAS_SUMMARY_BUCKET', 'day').lower(),
+        'workers': int(os.getenv('DBF_WORKERS', '1')),
+        'backend': backend,
+        'columnar': os.getenv('DBF_COLUMNAR', '').lower() in ('1', 'true', 'yes', 'si', 'sí'),
+        'cache_dir': (os.getenv('QUERY_CACHE_DIR') or str(base_path / "cache")
+                      if os.getenv('QUERY_CACHE', '').lower() in ('1', 'true', 'yes', 'si', 'sí') else None),
+        'cache_rows': int(os.getenv('QUERY_CACHE_ROWS', '500000')),
+        'replica_path': (os.getenv('REPLICA_PATH') or str(base_path / "state" / "replica.sqlite")
+                         if os.getenv('DBF_REPLICA', '').lower() in ('1', 'true', 'yes', 'si', 'sí') else None),
+        'replica_refresh': os.getenv('REPLICA_REFRESH', 'auto').lower(),
+        'output_format': os.getenv('OUTPUT_FORMAT', 'json').lower(),
+        'output_compression': os.getenv('OUTPUT_COMPRESSION', '').lower() or None,
+        'target_url': os.getenv('TARGET_URL'),
+        'target_token': os.getenv('TARGET_TOKEN'),
+        'target_workers': int(os.getenv('TARGET_WORKERS', '4')),
+        'sqlite_path': os.getenv('SQLITE_PATH'),
+        'queue_dir': os.getenv('QUEUE_DIR') or str(base_path / "queue"),
+        'daemon_concurrency': int(os.getenv('DAEMON_CONCURRENCY', '2')),
+        'metrics_dir': os.getenv('METRICS_DIR') or str(base_path / "output" / "metrics")
     }
 
 def get_record_limit():
@@ -93,24 +124,340 @@ def get_date_range():
         except ValueError:
             print("\nError: Formato de fecha inválido. Use DD/MM/YYYY")
 
-def save_output(data, filename):
-    """Guarda los datos en un archivo JSON"""
+def create_output_sink(filename, config_data, mapping_manager, dbf_name, detail_dbf=None, tag=None, delta=False):
+    """Crea el destino de la exportación según OUTPUT_FORMAT y OUTPUT_COMPRESSION
+    
+    Con http o sqlite los registros se cargan en la tabla destino (target_table
+    de mappings.json). Con formatos planos (csv, parquet, arrow) y un detail_dbf,
+    las ventas se guardan en dos archivos: _headers y _details, unidos por Folio.
+    Los archivos llevan la fecha y hora, o tag si se indica (el id del trabajo).
+    Con delta los registros llevan además la operación (campo op) y en http o
+    sqlite se cargan en la tabla destino terminada en _delta.
+    En parquet y arrow la clave numérica (Folio) se guarda como entero y los
+    demás números como float64.
+    """
+    from src.controllers.cat_prod_controller import OPERATION_FIELD
+    from src.sinks.registry import COLUMNAR_FORMATS, NESTED_FORMATS, TARGET_FORMATS, create_sink, create_split_sink
+    
+    output_format = config_data['output_format']
+    compression = config_data['output_compression']
+    schema = mapping_manager.get_output_schema(dbf_name)
+    if delta:
+        schema = schema + [(OPERATION_FIELD, 'string')]
+    
+    if output_format in TARGET_FORMATS:
+        table = mapping_manager.get_target_table(dbf_name) or Path(dbf_name).stem
+        if delta:
+            table = f"{table}_delta"
+        return create_table_sink(table, config_data, schema, mapping_manager.get_key_fields(dbf_name))
+    
+    base_path = output_base_path(filename, tag)
+    options = {}
+    if output_format in COLUMNAR_FORMATS:
+        keys = mapping_manager.get_key_fields(dbf_name)
+        options['integer_fields'] = [name for name, field_type in schema if name in keys and field_type == 'number']
+    
+    if detail_dbf is not None and output_format not in NESTED_FORMATS:
+        detail_schema = mapping_manager.get_output_schema(detail_dbf)
+        return create_split_sink(base_path, output_format, compression, schema, detail_schema, **options)
+    # El JSON sin comprimir conserva el formato legible de siempre
+    if output_format == 'json' and not compression:
+        options['indent'] = 2
+    return create_sink(base_path, output_format, compression, schema, **options)
+
+def create_table_sink(table, config_data, schema, key):
+    """Crea el destino http o sqlite que carga los registros en una tabla"""
+    from src.sinks.registry import create_target_sink
+    
+    output_format = config_data['output_format']
+    if output_format == 'sqlite':
+        database = config_data['sqlite_path'] or str(get_base_path() / "output" / "dbf_bridge.sqlite")
+        return create_target_sink(output_format, table, schema, key, database=database)
+    headers = {'Authorization': f"Bearer {config_data['target_token']}"} if config_data['target_token'] else None
+    return create_target_sink(output_format, table, schema, key, url=config_data['target_url'],
+                              workers=config_data['target_workers'], headers=headers)
+
+def create_summary_sink(filename, config_data, mapping_manager, keys, aggregates, tag=None):
+    """Crea el destino de un resumen de VENTAS: una fila por grupo
+    
+    Las claves conservan el tipo de su campo en VENTA o PARTVTA (la fecha es
+    el primer día de su periodo, como texto) y los agregados son números.
+    Con http o sqlite las filas se cargan en la tabla ventas_resumen.
+    """
+    from src.sinks.registry import TARGET_FORMATS, create_sink
+    
+    types = dict(mapping_manager.get_output_schema("VENTA.DBF") + mapping_manager.get_output_schema("PARTVTA.DBF"))
+    schema = [(key, 'string' if key == 'fecha' else types.get(key, 'string')) for key in keys]
+    schema += [(name, 'number') for name in aggregates]
+    
+    if config_data['output_format'] in TARGET_FORMATS:
+        return create_table_sink("ventas_resumen", config_data, schema, list(keys) or None)
+    options = {'indent': 2} if config_data['output_format'] == 'json' and not config_data['output_compression'] else {}
+    return create_sink(output_base_path(filename, tag), config_data['output_format'],
+                       config_data['output_compression'], schema, **options)
+
+def output_base_path(filename, tag=None):
+    """Ruta sin extensión de un archivo de output con la fecha y hora (o tag)"""
     output_dir = get_base_path() / "output"
     output_dir.mkdir(exist_ok=True)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = output_dir / f"{filename}_{timestamp}.json"
+    timestamp = tag or datetime.now().strftime("%Y%m%d_%H%M%S")
+    return str(output_dir / f"{filename}_{timestamp}")
+
+def sink_result(sink, count):
+    """Resultado de una exportación escrita en un destino"""
+    return {'count': count, 'outputs': sink.outputs, 'rows_per_second': round(sink.rows_per_second, 1)}
+
+def print_export_summary(result, description="registros"):
+    """Muestra el destino y la velocidad de escritura de una exportación"""
+    print(f"\nSe encontraron {result['count']} {description}")
+    print(f"\nDatos guardados en: {', '.join(result['outputs'])}")
+    print(f"Velocidad de escritura: {result['rows_per_second']:,.0f} registros/s")
+    print_stage_metrics(result)
+
+def print_stage_metrics(result):
+    """Muestra el tiempo y los registros de cada etapa de una exportación"""
+    if not result.get('stages'):
+        return
+    print("\nTiempos por etapa:")
+    for stage, metrics in result['stages'].items():
+        rate = f"{metrics['rows_per_second']:>12,.0f} registros/s" if metrics['rows_per_second'] else ""
+        print(f"  {stage:<13} {metrics['seconds']:9.3f} s {metrics['rows']:>10} registros {rate}")
+    cache = result.get('cache')
+    if cache:
+        print(f"Caché de consultas: {cache['hits'] + cache['disk_hits']} aciertos "
+              f"({cache['disk_hits']} desde disco), {cache['misses']} lecturas, {cache['hit_ratio']:.0%} de aciertos")
+    print(f"Informe de métricas: {result['metrics'][0]}")
+
+def write_metrics(metrics, config_data, tag=None):
+    """Guarda el informe de métricas de un trabajo en METRICS_DIR
+    
+    El JSON lleva la fecha y hora (o el id del trabajo); el archivo .prom,
+    para el textfile collector de Prometheus, se reemplaza en cada ejecución.
+    """
+    metrics_dir = Path(config_data['metrics_dir'])
+    timestamp = tag or metrics.started_at.strftime("%Y%m%d_%H%M%S")
+    json_path = metrics_dir / f"{metrics.run}_{timestamp}.json"
+    prom_path = metrics_dir / f"dbf_bridge_{metrics.run}.prom"
+    metrics.write_json(str(json_path))
+    metrics.write_prometheus(str(prom_path))
+    return [str(json_path), str(prom_path)]
+
+def parse_date(text):
+    """Convierte una fecha DD/MM/YYYY de un trabajo"""
+    try:
+        return datetime.strptime(text, "%d/%m/%Y")
+    except (TypeError, ValueError):
+        raise ValueError(f"Fecha inválida '{text}', use DD/MM/YYYY")
+
+def run_export(job, config, config_data, mapping_manager):
+    """Ejecuta un trabajo de exportación y devuelve su resultado
+    
+    Trabajos: {"type": "cat_prod", "limit": 0}, {"type": "cat_prod_delta"},
+    {"type": "ventas", "start": "DD/MM/YYYY", "end": "DD/MM/YYYY"} y
+    {"type": "ventas_incremental", "start": "DD/MM/YYYY"} (start solo hace falta
+    la primera vez) y {"type": "ventas_resumen", "start": "DD/MM/YYYY", "end":
+    "DD/MM/YYYY", "keys": "fecha,empleado", "bucket": "month"} (keys y bucket
+    por defecto de VENTAS_SUMMARY_KEYS y VENTAS_SUMMARY_BUCKET) y
+    {"type": "replica_refresh", "full": false} (con DBF_REPLICA). "output_format" y "output_compression" reemplazan los del .env;
+    "id" (lo agrega el modo servicio) reemplaza la fecha y hora en los archivos.
+    Con REPLICA_REFRESH=auto los demás trabajos actualizan antes la réplica.
+    
+    Cada trabajo, también si falla, deja su informe de métricas por etapa
+    (conexión, réplica, caché, filtros, lectura, conversión, transformación,
+    unión, agregación y escritura).
+    """
+    import socket
+    from src.utils.metrics import RunMetrics
+    
+    metrics = RunMetrics(str(job.get('type')), {'host': socket.gethostname(), 'source': config.source_directory})
+    try:
+        result = export_job(job, config, config_data, mapping_manager, metrics)
+    except Exception:
+        metrics.finish(success=False)
+        write_metrics(metrics, config_data, job.get('id'))
+        raise
+    metrics.finish(rows=result.get('count', sum(result.get(key, 0) for key in ('inserted', 'updated', 'deleted'))))
+    result['metrics'] = write_metrics(metrics, config_data, job.get('id'))
+    result['stages'] = metrics.to_dict()['stages']
+    if config.cache_dir:
+        from src.dbf_enc_reader.cache import get_query_cache
+        result['cache'] = get_query_cache(config.cache_dir, config.cache_rows).stats.to_dict()
+    return result
+
+def export_job(job, config, config_data, mapping_manager, metrics):
+    """Ejecuta un trabajo de run_export registrando sus etapas en metrics"""
+    from src.controllers.cat_prod_controller import CatProdController
+    from src.controllers.ventas_controller import VentasController
+    
+    job_type = job.get('type')
+    tag = job.get('id')
+    overrides = {key: job[key] for key in ('output_format', 'output_compression') if job.get(key)}
+    config_data = dict(config_data, **overrides)
+    
+    if job_type == "replica_refresh":
+        # Copia las tablas a la réplica SQLite sin exportar nada
+        if not config.replica_path:
+            raise ValueError("La réplica SQLite está desactivada, active DBF_REPLICA en el archivo .env")
+        tables = refresh_replica(config, mapping_manager, metrics, bool(job.get('full')))
+        count = sum(table.inserted + table.updated + table.deleted for table in tables)
+        return {'count': count, 'tables': [table.to_dict() for table in tables], 'outputs': [config.replica_path]}
+    
+    if config.replica_path and config_data['replica_refresh'] == 'auto':
+        # Los controladores leen la réplica: primero se trae lo que cambió
+        refresh_replica(config, mapping_manager, metrics)
+    
+    if job_type == "cat_prod":
+        controller = CatProdController(mapping_manager, replace(config, limit_rows=int(job.get('limit', 0))), metrics)
+        with create_output_sink("cat_prod", config_data, mapping_manager, controller.dbf_name, tag=tag) as sink:
+            count = controller.write_data(sink)
+        metrics.add_sink(sink)
+        return sink_result(sink, count)
+    
+    if job_type == "cat_prod_delta":
+        # Solo los productos nuevos, modificados o eliminados
+        controller = CatProdController(mapping_manager, config, metrics)
+        snapshot = SnapshotStore(str(get_base_path() / "state" / "cat_prod_snapshot.json"), config_data['source_dir'])
+        with create_output_sink("cat_prod_delta", config_data, mapping_manager, controller.dbf_name,
+                                tag=tag, delta=True) as sink:
+            counts = controller.write_delta(snapshot, sink)
+        metrics.add_sink(sink)
+        # La foto solo se guarda si los cambios quedaron escritos
+        controller.commit_snapshot()
+        result = sink_result(sink, sum(counts.values()))
+        return dict(result, inserted=counts['insert'], updated=counts['update'], deleted=counts['delete'])
+    
+    if job_type == "ventas":
+        start_date, end_date = parse_date(job.get('start')), parse_date(job.get('end'))
+        if end_date < start_date:
+            raise ValueError("La fecha final debe ser posterior a la fecha inicial")
+        controller = VentasController(mapping_manager, config, metrics)
+        date_range = f"{start_date.strftime('%Y%m%d')}-{end_date.strftime('%Y%m%d')}"
+        with create_output_sink(f"ventas_{date_range}", config_data, mapping_manager,
+                                "VENTA.DBF", "PARTVTA.DBF", tag) as sink:
+            count = controller.write_sales_in_range(start_date, end_date, sink)
+        metrics.add_sink(sink)
+        return sink_result(sink, count)
+    
+    if job_type == "ventas_resumen":
+        # Totales de las partidas por grupo, sin exportar las ventas
+        start_date, end_date = parse_date(job.get('start')), parse_date(job.get('end'))
+        if end_date < start_date:
+            raise ValueError("La fecha final debe ser posterior a la fecha inicial")
+        keys = [key.strip() for key in (job.get('keys') or config_data['summary_keys']).split(',') if key.strip()]
+        bucket = (job.get('bucket') or config_data['summary_bucket']).lower()
+        from src.dbf_enc_reader.aggregate import AGGREGATES
+        controller = VentasController(mapping_manager, config, metrics)
+        rows = controller.aggregate_sales(start_date, end_date, keys, bucket, AGGREGATES)
+        date_range = f"{start_date.strftime('%Y%m%d')}-{end_date.strftime('%Y%m%d')}"
+        with create_summary_sink(f"ventas_resumen_{date_range}", config_data, mapping_manager,
+                                 keys, AGGREGATES, tag) as sink:
+            sink.write_batch(rows)
+        metrics.add_sink(sink)
+        return sink_result(sink, len(rows))
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if job_type == "ventas_incremental":
+        # VENTAS nuevas o modificadas desde la última exportación
+        controller = VentasController(mapping_manager, config, metrics)
+        checkpoint = CheckpointStore(str(get_base_path() / "state" / "checkpoints.json"))
+        if job.get('start'):
+            start_date = parse_date(job['start'])
+        elif controller.has_checkpoint(checkpoint):
+            start_date = datetime.now()
+        else:
+            raise ValueError("Primera ejecución incremental: indique 'start' (DD/MM/YYYY)")
+        with create_output_sink("ventas_incremental", config_data, mapping_manager,
+                                "VENTA.DBF", "PARTVTA.DBF", tag) as sink:
+            count = sink.consume(controller.iter_sales_incremental(checkpoint, start_date), config.batch_size)
+        metrics.add_sink(sink)
+        controller.commit_checkpoint()
+        return sink_result(sink, count)
     
-    print(f"\nDatos guardados en: {output_file}")
+    raise ValueError(f"Tipo de trabajo desconocido: {job_type}. Use uno de: {', '.join(JOB_TYPES)}")
+
+def refresh_replica(config, mapping_manager, metrics, full=False):
+    """Actualiza la réplica SQLite desde las tablas DBF y devuelve lo hecho por tabla"""
+    from src.controllers.base_controller import create_reader
+    from src.dbf_enc_reader.replica import SQLiteReplica
+    
+    reader = create_reader(config)
+    reader.metrics = metrics
+    replica = SQLiteReplica(config.replica_path, mapping_manager, lookback_days=config.lookback_days)
+    return replica.refresh(reader, full, metrics)
+
+def print_replica_refresh(result):
+    """Muestra lo que cambió en cada tabla de la réplica"""
+    print(f"\nRéplica actualizada: {result['outputs'][0]}")
+    for table in result['tables']:
+        print(f"  {table['table']:<13} {table['mode']:<9} leídos: {table['rows_read']:>8}  nuevos: {table['inserted']:>7}  "
+              f"modificados: {table['updated']:>7}  eliminados: {table['deleted']:>7}  ({table['seconds']:.2f} s)")
+    print_stage_metrics(result)
+
+def warm_up(config, mapping_manager):
+    """Carga la DLL, las asignaciones y abre la primera conexión del pool"""
+    for dbf_name in mapping_manager.mappings:
+        mapping_manager.compile(dbf_name)
+    if config.backend == 'native':
+        return  # Sin DLL ni conexiones
+    DBFConnection.set_dll_path(config.dll_path)
+    with get_default_pool().connection(config.source_directory, config.encryption_password):
+        pass
+
+def run_daemon(config, config_data, mapping_manager):
+    """Modo servicio: ejecuta los trabajos de la carpeta de cola sin cerrar el programa"""
+    from src.service.daemon import ExportDaemon, JobQueue
+    
+    queue = JobQueue(config_data['queue_dir'])
+    warm_up(config, mapping_manager)
+    daemon = ExportDaemon(queue, lambda job: run_export(job, config, config_data, mapping_manager),
+                          concurrency=config_data['daemon_concurrency'])
+    print(f"\nModo servicio: esperando trabajos en {queue.root / 'incoming'} (Ctrl+C para salir)")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+    print(f"\nTrabajos completados: {daemon.completed}, con error: {daemon.failed}")
+
+def submit_job(args, config_data):
+    """Agrega un trabajo a la cola del modo servicio"""
+    from src.service.daemon import JobQueue
+    
+    job = {'type': args.submit}
+    for key in ('start', 'end', 'limit', 'keys', 'bucket', 'full', 'output_format', 'output_compression'):
+        value = getattr(args, key)
+        if value is not None:
+            job[key] = value
+    job_id = JobQueue(config_data['queue_dir']).submit(job)
+    print(f"\nTrabajo {job_id} agregado a la cola: {config_data['queue_dir']}")
+
+def parse_args():
+    """Opciones de línea de comandos; sin opciones se muestra el menú"""
+    parser = argparse.ArgumentParser(description="DBF Bridge")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Modo servicio: procesa los trabajos de la cola sin menú")
+    parser.add_argument("--submit", choices=JOB_TYPES, help="Agrega un trabajo a la cola del modo servicio")
+    parser.add_argument("--start", help="Fecha inicial del trabajo (DD/MM/YYYY)")
+    parser.add_argument("--end", help="Fecha final del trabajo (DD/MM/YYYY)")
+    parser.add_argument("--limit", type=int, help="Registros de CAT_PROD a procesar (0 para todos)")
+    parser.add_argument("--keys", help="Campos de agrupación de ventas_resumen, separados por comas")
+    parser.add_argument("--bucket", help="Periodo de la fecha en ventas_resumen (day, week, month o year)")
+    parser.add_argument("--full", action="store_true", default=None,
+                        help="replica_refresh: vuelve a copiar las tablas completas")
+    parser.add_argument("--output-format", dest="output_format", help="Reemplaza OUTPUT_FORMAT para el trabajo")
+    parser.add_argument("--output-compression", dest="output_compression",
+                        help="Reemplaza OUTPUT_COMPRESSION para el trabajo")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     try:
         # Cargar configuración
         config_data = load_configuration()
         
+        if args.submit:
+            submit_job(args, config_data)
+            return
+        
         # Verificar directorio fuente
         source_dir = config_data['source_dir']
         if not Path(source_dir).exists():
@@ -121,54 +468,106 @@ def main():
             dll_path=config_data['dll_path'],
             encryption_password=config_data['encryption_password'],
             source_directory=source_dir,
-            limit_rows=0  # Sin límite
+            limit_rows=0,  # Sin límite
+            lookback_days=config_data['lookback_days'],
+            workers=config_data['workers'],
+            backend=config_data['backend'],
+            columnar=config_data['columnar'],
+            cache_dir=config_data['cache_dir'],
+            cache_rows=config_data['cache_rows'],
+            replica_path=config_data['replica_path']
         )
         
         # Initialize mapping manager
         mapping_file = get_resource_path("mappings.json")
         mapping_manager = MappingManager(str(mapping_file))
         
+        if args.daemon:
+            run_daemon(config, config_data, mapping_manager)
+            return
+        
         # Menú principal
         while True:
             print("\n=== DBF Bridge ===")
             print("1. Procesar CAT_PROD")
-            print("2. Procesar VENTAS")
-            print("3. Salir")
+            print("2. Procesar CAT_PROD (solo cambios)")
+            print("3. Procesar VENTAS")
+            print("4. Procesar VENTAS (incremental)")
+            print("5. Resumen de VENTAS")
+            print("6. Actualizar réplica SQLite")
+            print("7. Salir")
             
-            option = input("\nSeleccione una opción (1-3): ")
+            option = input("\nSeleccione una opción (1-7): ")
             
             if option == "1":
                 # Procesar CAT_PROD
                 limit = get_record_limit()
-                config.limit_rows = limit  # Actualizar el límite en la configuración
-                controller = CatProdController(mapping_manager, config)
                 print(f"\nProcesando {'todos los' if limit == 0 else limit} registros de CAT_PROD...")
-                data = controller.get_data_in_range()
-                print(f"\nSe encontraron {len(data)} registros")
-                save_output(data, "cat_prod")
+                result = run_export({'type': 'cat_prod', 'limit': limit}, config, config_data, mapping_manager)
+                print_export_summary(result)
                 
             elif option == "2":
+                # Procesar solo los productos nuevos, modificados o eliminados
+                print("\nBuscando cambios en CAT_PROD...")
+                result = run_export({'type': 'cat_prod_delta'}, config, config_data, mapping_manager)
+                print(f"\nNuevos: {result['inserted']}, modificados: {result['updated']}, "
+                      f"eliminados: {result['deleted']}")
+                print_export_summary(result, "cambios")
+                
+            elif option == "3":
                 # Procesar VENTAS
-                controller = VentasController(mapping_manager, config)
                 start_date, end_date = get_date_range()
                 
                 print(f"\nProcesando VENTAS del {start_date.strftime('%d/%m/%Y')} al {end_date.strftime('%d/%m/%Y')}...")
-                data = controller.get_sales_in_range(start_date, end_date)
-                print(f"\nSe encontraron {len(data)} registros")
+                job = {'type': 'ventas', 'start': start_date.strftime('%d/%m/%Y'), 'end': end_date.strftime('%d/%m/%Y')}
+                print_export_summary(run_export(job, config, config_data, mapping_manager))
                 
-                date_range = f"{start_date.strftime('%Y%m%d')}-{end_date.strftime('%Y%m%d')}"
-                save_output(data, f"ventas_{date_range}")
+            elif option == "4":
+                # Procesar VENTAS nuevas o modificadas desde la última exportación
+                job = {'type': 'ventas_incremental'}
+                checkpoint = CheckpointStore(str(get_base_path() / "state" / "checkpoints.json"))
+                from src.controllers.ventas_controller import VentasController
+                if not VentasController(mapping_manager, config).has_checkpoint(checkpoint):
+                    print("\nPrimera ejecución incremental: indique desde qué fecha exportar")
+                    start_date, _ = get_date_range()
+                    job['start'] = start_date.strftime('%d/%m/%Y')
                 
-            elif option == "3":
+                result = run_export(job, config, config_data, mapping_manager)
+                print_export_summary(result, "registros nuevos o modificados")
+                
+            elif option == "5":
+                # Totales de VENTAS por día, empleado, producto, etc.
+                start_date, end_date = get_date_range()
+                keys = input(f"\nCampos de agrupación [{config_data['summary_keys']}]: ").strip()
+                bucket = input(f"Periodo de la fecha (day, week, month, year) [{config_data['summary_bucket']}]: ").strip()
+                
+                print(f"\nResumiendo VENTAS del {start_date.strftime('%d/%m/%Y')} al {end_date.strftime('%d/%m/%Y')}...")
+                job = {'type': 'ventas_resumen', 'start': start_date.strftime('%d/%m/%Y'),
+                       'end': end_date.strftime('%d/%m/%Y'), 'keys': keys, 'bucket': bucket}
+                print_export_summary(run_export(job, config, config_data, mapping_manager), "grupos")
+                
+            elif option == "6":
+                # Traer a la réplica los cambios de CAT_PROD, VENTA y PARTVTA
+                full = input("\n¿Copiar las tablas completas? (s/N): ").strip().lower() in ('s', 'si', 'sí')
+                print("\nActualizando la réplica SQLite...")
+                result = run_export({'type': 'replica_refresh', 'full': full}, config, config_data, mapping_manager)
+                print_replica_refresh(result)
+                
+            elif option == "7":
+                stats = get_default_pool().stats
+                print(f"\nConexiones reutilizadas: {stats.hits}, conexiones abiertas: {stats.misses}")
                 print("\n¡Hasta luego!")
                 break
                 
             else:
-                print("\nOpción inválida. Por favor, seleccione 1, 2 o 3.")
+                print("\nOpción inválida. Por favor, seleccione una opción del 1 al 7.")
                 
     except Exception as e:
         print(f"\nError: {str(e)}")
         raise
+    finally:
+        # Cerrar las conexiones que quedaron abiertas en el pool
+        get_default_pool().close_all()
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,9 @@
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
+
+# Reader backends: the Advantage .NET provider or the built-in DBF/CDX reader
+BACKENDS = ('ads', 'native')
 
 @dataclass
 class DBFConfig:
@@ -8,11 +12,26 @@ class DBFConfig:
     encryption_password: str
     source_directory: str
     limit_rows: int = None  # Optional, set to None for no limit
+    batch_size: int = 1000  # Records per batch when streaming
+    lookback_days: int = 3  # Days re-checked for edits by incremental VENTAS runs
+    pool_size: int = 4  # Idle connections kept per source directory
+    pool_idle_timeout: float = 300.0  # Seconds before an idle connection is reopened
+    workers: int = 1  # Parallel readers per export, 1 reads sequentially
+    backend: str = 'ads'  # 'ads' or 'native' (unencrypted tables only, no DLL needed)
+    columnar: bool = False  # Decode and transform batches column-wise with NumPy
+    cache_dir: Optional[str] = None  # Folder of the query result cache, None disables it
+    cache_rows: int = 500_000  # Records the query cache keeps in memory
+    replica_path: Optional[str] = None  # SQLite replica the controllers query instead of the DBFs
     
     def __post_init__(self):
         """Validate and convert paths after initialization."""
         self.dll_path = str(Path(self.dll_path).resolve())
         self.source_directory = str(Path(self.source_directory).resolve())
+        if self.workers < 1:
+            raise ValueError(f"workers must be at least 1, got {self.workers}")
+        self.backend = self.backend.lower()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {', '.join(BACKENDS)}, got {self.backend!r}")
         
     def get_table_path(self, table_name: str) -> str:
         """Get the full path for a DBF table.
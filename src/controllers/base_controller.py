@@ -0,0 +1,100 @@
+from typing import Any, Dict, Iterable, Optional
+from ..dbf_enc_reader.cache import get_query_cache
+from ..dbf_enc_reader.column_batch import ColumnBatch
+from ..dbf_enc_reader.core import DBFReader, Record, RecordBatch
+from ..dbf_enc_reader.connection import DBFConnection
+from ..dbf_enc_reader.native import NativeDBFReader
+from ..dbf_enc_reader.pool import get_default_pool
+from ..dbf_enc_reader.mapping_manager import MappingManager, CompiledMapping
+from ..dbf_enc_reader.replica import ReplicaReader
+from ..config.dbf_config import DBFConfig
+from ..utils.metrics import RunMetrics
+
+def create_reader(config: DBFConfig) -> DBFReader:
+    """Build the reader of the DBF tables for a configuration's backend.
+    
+    Args:
+        config: DBF configuration
+        
+    Returns:
+        NativeDBFReader or ADS DBFReader, without metrics or cache
+    """
+    if config.backend == 'native':
+        # Tables are mapped and decoded in-process, no DLL or connection
+        return NativeDBFReader(config.source_directory)
+    # Initialize DBF reader; the DLL is loaded once and the connection
+    # pool is shared by every controller of the session
+    DBFConnection.set_dll_path(config.dll_path)
+    pool = get_default_pool()
+    # Keep a connection per parallel worker plus one for the main stream
+    pool.max_size = max(config.pool_size, config.workers + 1)
+    pool.idle_timeout = config.pool_idle_timeout
+    return DBFReader(config.source_directory, config.encryption_password, pool)
+
+
+class BaseController:
+    def __init__(self, mapping_manager: MappingManager, config: DBFConfig, metrics: Optional[RunMetrics] = None):
+        """Initialize the controller and its DBF reader.
+        
+        Args:
+            mapping_manager: Manager for field mappings
+            config: DBF configuration
+            metrics: Run report receiving the stage timings, a new one by default
+        """
+        self.config = config
+        self.mapping_manager = mapping_manager
+        self.metrics = metrics or RunMetrics(type(self).__name__)
+        
+        if self.config.replica_path:
+            # Queries run on the local SQLite replica, the DBFs are not opened
+            self.reader = ReplicaReader(self.config.replica_path)
+        else:
+            self.reader = create_reader(self.config)
+        self.reader.metrics = self.metrics
+        if self.config.cache_dir and not self.config.replica_path:
+            # Shared by the controllers of the session, so re-runs are hits
+            self.reader.cache = get_query_cache(self.config.cache_dir, self.config.cache_rows)
+
+    def transform_batch(self, records: Iterable[Record], plan: CompiledMapping) -> RecordBatch:
+        """Transform raw records with a compiled mapping plan.
+        
+        Args:
+            records: Raw records from DBF
+            plan: Compiled mapping of the table
+            
+        Returns:
+            List of transformed records, empty ones are dropped
+        """
+        transform = plan.transform
+        with self.metrics.stage('transform') as timer:
+            batch = [transformed for transformed in map(transform, records) if transformed]
+            timer.rows = len(batch)
+        return batch
+
+    def transform_column_batch(self, batch: ColumnBatch, plan: CompiledMapping) -> ColumnBatch:
+        """Transform a column batch with a compiled mapping plan, column by column.
+        
+        Args:
+            batch: Raw records from DBF as columns
+            plan: Compiled mapping of the table
+            
+        Returns:
+            ColumnBatch keyed by output field
+        """
+        with self.metrics.stage('transform', rows=len(batch)):
+            return plan.transform_column_batch(batch)
+
+    def transform_record(self, record: Record, field_mappings: Dict[str, Any]) -> Record:
+        """Transform a DBF record using the field mappings.
+        
+        Prefer MappingManager.compile() and transform_batch() in loops; this
+        compiles the mappings on every call.
+        
+        Args:
+            record: Raw record from DBF
+            field_mappings: Field mapping configuration
+            
+        Returns:
+            Transformed record with mapped field names and types
+        """
+        return CompiledMapping(field_mappings).transform(record)
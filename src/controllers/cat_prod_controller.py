@@ -1,28 +1,38 @@
 from datetime import datetime
-from typing import Dict, Any, List, Optional
-import json
-from ..dbf_enc_reader.core import DBFReader
-from ..dbf_enc_reader.connection import DBFConnection
+from typing import Dict, Iterator, List, Optional, Tuple
+from ..dbf_enc_reader.column_batch import ColumnBatch
+from ..dbf_enc_reader.core import Record, RecordBatch
 from ..dbf_enc_reader.mapping_manager import MappingManager
+from ..dbf_enc_reader.parallel import ParallelScan
 from ..config.dbf_config import DBFConfig
+from ..sinks.base import Sink
+from ..utils.metrics import RunMetrics
+from ..utils.snapshot import SnapshotStore, content_hash
+from .base_controller import BaseController
 
-class CatProdController:
-    def __init__(self, mapping_manager: MappingManager, config: DBFConfig):
+# Field added to every delta record written by write_delta()
+OPERATION_FIELD = 'op'
+DELTA_OPERATIONS = ('insert', 'update', 'delete')
+
+class CatProdController(BaseController):
+    def __init__(self, mapping_manager: MappingManager, config: DBFConfig, metrics: Optional[RunMetrics] = None):
         """Initialize the CAT_PROD controller.
         
         Args:
             mapping_manager: Manager for field mappings
             config: DBF configuration
+            metrics: Run report receiving the stage timings, a new one by default
         """
-        self.config = config
-        self.mapping_manager = mapping_manager
+        super().__init__(mapping_manager, config, metrics)
         self.dbf_name = "CAT_PROD.DBF"
+        self.plan = self.mapping_manager.compile(self.dbf_name)
+        self.columns = self.mapping_manager.get_source_fields(self.dbf_name)
+        self.key_field = 'REF'  # Mapped name of CLAVE
         
-        # Initialize DBF reader
-        DBFConnection.set_dll_path(self.config.dll_path)
-        self.reader = DBFReader(self.config.source_directory, self.config.encryption_password)
+        # Hashes of the last delta run, saved by commit_snapshot()
+        self.pending_snapshot = None
         
-    def get_data_in_range(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    def get_data_in_range(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> RecordBatch:
         """Get CAT_PROD data within the specified date range.
         
         Args:
@@ -32,50 +42,177 @@ class CatProdController:
         Returns:
             List of dictionaries containing the mapped data
         """
-        # Get field mappings for CAT_PROD
-        field_mappings = self.mapping_manager.get_field_mappings(self.dbf_name)
+        transformed_data = []
+        for batch in self.iter_batches():
+            transformed_data.extend(batch)
+        
+        return transformed_data
+
+    def write_data(self, sink: Sink, batch_size: Optional[int] = None) -> int:
+        """Stream CAT_PROD into a sink, one batch at a time.
+        
+        Args:
+            sink: Open or unopened sink receiving the mapped records
+            batch_size: Records per batch, defaults to config.batch_size
+            
+        Returns:
+            Number of records written
+        """
+        count = 0
+        if self.config.columnar:
+            # Records are only materialized by sinks that need them
+            for column_batch in self.iter_column_batches(batch_size):
+                sink.write_columns(column_batch)
+                count += len(column_batch)
+            return count
+        for batch in self.iter_batches(batch_size):
+            sink.write_batch(batch)
+            count += len(batch)
+        return count
+
+    def iter_batches(self, batch_size: Optional[int] = None) -> Iterator[RecordBatch]:
+        """Stream CAT_PROD as batches of mapped records.
+        
+        Only one batch is held in memory at a time, so this is the entry point
+        to use for full catalog dumps. With config.workers > 1 and no row
+        limit the table is read as parallel record-number partitions (a few
+        batches per worker in memory), in the same order.
+        
+        Args:
+            batch_size: Records per batch, defaults to config.batch_size
+            
+        Yields:
+            Lists of dictionaries containing the mapped data
+        """
+        batch_size = batch_size or self.config.batch_size
+        
+        if self.config.columnar:
+            for column_batch in self.iter_column_batches(batch_size):
+                yield column_batch.to_records()
+            return
         
         # No filters, just get last rows
         filters = []  # Empty filter to get all records
         
-        # Get data from DBF with filter and parse JSON
-        raw_data_str = self.reader.to_json(self.dbf_name, self.config.limit_rows, filters)
-        raw_data = json.loads(raw_data_str)
+        if self.config.workers > 1 and not self.config.limit_rows:
+            # Full dumps are split into record-number partitions read in parallel
+            scan = ParallelScan(self.reader, self.config.workers)
+            batches = scan.iter_batches(self.dbf_name, batch_size, None, filters, self.columns)
+        else:
+            batches = self.reader.iter_batches(self.dbf_name, batch_size, self.config.limit_rows, filters, self.columns)
+        
+        for batch in batches:
+            transformed_batch = self.transform_batch(batch, self.plan)
+            if transformed_batch:
+                yield transformed_batch
 
-        # Transform the data using mappings
-        transformed_data = []
-        for record in raw_data:
-            transformed_record = self.transform_record(record, field_mappings)
-            if transformed_record:  # Only add non-empty records
-                transformed_data.append(transformed_record)
+    def iter_column_batches(self, batch_size: Optional[int] = None) -> Iterator[ColumnBatch]:
+        """Stream CAT_PROD as mapped column batches (config.columnar).
         
-        return transformed_data
-    
-    def transform_record(self, record: Dict[str, Any], field_mappings: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform a DBF record using the field mappings.
+        Every block of records is decoded and transformed as NumPy arrays,
+        one per mapped column; the table is read sequentially.
         
         Args:
-            record: Raw record from DBF
-            field_mappings: Field mapping configuration
+            batch_size: Records per batch, defaults to config.batch_size
             
-        Returns:
-            Transformed record with mapped field names and types
+        Yields:
+            ColumnBatch keyed by output field
         """
-        transformed = {}
-        for target_field, mapping in field_mappings.items():
-            dbf_field = mapping['dbf']
-            if dbf_field in record:
-                value = record[dbf_field]
-                if mapping['type'] == 'number':
-                    try:
-                        value = float(value) if '.' in str(value) else int(value)
-                    except (ValueError, TypeError):
-                        value = 0
-                
-                #transformed[target_field] = value
-                transformed[mapping['velneo_table']] = value
+        batch_size = batch_size or self.config.batch_size
+        batches = self.reader.iter_column_batches(self.dbf_name, batch_size, self.config.limit_rows, None, self.columns)
+        for batch in batches:
+            transformed_batch = self.transform_column_batch(batch, self.plan)
+            if len(transformed_batch):
+                yield transformed_batch
+
+    def iter_delta(self, snapshot: SnapshotStore, batch_size: Optional[int] = None) -> Iterator[Tuple[str, Record]]:
+        """Stream only the products changed since the previous snapshot.
+        
+        Every product's content hash is compared with the one stored for its
+        CLAVE. Inserted and updated products are yielded while the table is
+        read, deleted ones once the scan is done. The whole catalog is always
+        scanned, config.limit_rows does not apply.
+        
+        The new hashes are kept in pending_snapshot; call commit_snapshot()
+        once the output has been written.
+        
+        Args:
+            snapshot: Store with the hashes of the previous run
+            batch_size: Records per batch, defaults to config.batch_size
+            
+        Yields:
+            (operation, record) tuples, operation being 'insert', 'update' or
+            'delete'; deleted records only hold the key field
+        """
+        previous = snapshot.load()
+        current = {}
+        batch_size = batch_size or self.config.batch_size
+        
+        for batch in self.reader.iter_batches(self.dbf_name, batch_size, None, [], self.columns):
+            for record in self.transform_batch(batch, self.plan):
+                key = str(record.get(self.key_field))
+                record_hash = content_hash(record)
+                current[key] = record_hash
                 
-        return transformed
+                old_hash = previous.get(key)
+                if old_hash is None:
+                    yield 'insert', record
+                elif old_hash != record_hash:
+                    yield 'update', record
+        
+        for key in previous.keys() - current.keys():
+            yield 'delete', {self.key_field: key}
+        
+        self.pending_snapshot = (snapshot, current)
+
+    def write_delta(self, snapshot: SnapshotStore, sink: Sink, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """Stream the products changed since the previous snapshot into a sink.
+        
+        Every record from iter_delta() is written with its operation in
+        OPERATION_FIELD, batch_size records at a time. Call commit_snapshot()
+        once the sink is closed.
+        
+        Args:
+            snapshot: Store with the hashes of the previous run
+            sink: Open or unopened sink receiving the changed records
+            batch_size: Records per batch, defaults to config.batch_size
+            
+        Returns:
+            Number of records written per operation ('insert', 'update', 'delete')
+        """
+        counts = dict.fromkeys(DELTA_OPERATIONS, 0)
+        
+        def records() -> Iterator[Record]:
+            for operation, record in self.iter_delta(snapshot, batch_size):
+                counts[operation] += 1
+                yield dict(record, **{OPERATION_FIELD: operation})
+        
+        sink.consume(records(), batch_size or self.config.batch_size)
+        return counts
+
+    def get_delta(self, snapshot: SnapshotStore) -> Dict[str, List[Record]]:
+        """Get the products inserted, updated and deleted since the previous snapshot.
+        
+        Collects iter_delta() in memory; exports should use write_delta().
+        
+        Args:
+            snapshot: Store with the hashes of the previous run
+            
+        Returns:
+            Dictionary with 'inserted', 'updated' and 'deleted' record lists
+        """
+        delta = {'inserted': [], 'updated': [], 'deleted': []}
+        targets = {'insert': delta['inserted'], 'update': delta['updated'], 'delete': delta['deleted']}
+        for operation, record in self.iter_delta(snapshot):
+            targets[operation].append(record)
+        return delta
+
+    def commit_snapshot(self) -> None:
+        """Persist the hashes of the last completed delta run."""
+        if self.pending_snapshot:
+            snapshot, hashes = self.pending_snapshot
+            snapshot.save(hashes)
+            self.pending_snapshot = None
 
 
 
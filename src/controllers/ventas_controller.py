@@ -1,30 +1,79 @@
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
-import json
+from itertools import chain
 import time
-from ..dbf_enc_reader.core import DBFReader
-from ..dbf_enc_reader.connection import DBFConnection
-from ..dbf_enc_reader.mapping_manager import MappingManager
+from typing import Dict, Any, Iterable, Iterator, Optional
+from ..dbf_enc_reader.aggregate import AGGREGATES, DATE_KEY, SalesAggregator
+from ..dbf_enc_reader.column_batch import ColumnBatch
+from ..dbf_enc_reader.core import Record, RecordBatch
+from ..dbf_enc_reader.filters import Compare, FilterNode, Range
+from ..dbf_enc_reader.lookup import KeyLookup, LookupStats
+from ..dbf_enc_reader.join import hash_join, merge_join
+from ..dbf_enc_reader.mapping_manager import CompiledMapping, MappingManager
+from ..dbf_enc_reader.parallel import ordered_map, prefetch
 from ..config.dbf_config import DBFConfig
+from ..sinks.base import Sink
+from ..utils.checkpoint import CheckpointStore
+from ..utils.dates import parse_fecha
+from ..utils.metrics import RunMetrics, TimedIterator
+from ..utils.snapshot import content_hash
+from .base_controller import BaseController
 
-class VentasController:
-    def __init__(self, mapping_manager: MappingManager, config: DBFConfig):
-        """Initialize the CAT_PROD controller.
+# CDX tag on NO_REFEREN in VENTA.DBF and PARTVTA.DBF
+FOLIO_INDEX = 'NO_REFEREN'
+
+# CDX tag on F_EMISION in VENTA.DBF, used for date range scans when present
+DATE_INDEX = 'F_EMISION'
+
+
+def _folio_key(folio: Any) -> str:
+    """Pad a folio with leading zeros to 6 digits to match DBF format."""
+    return str(folio).zfill(6)
+
+
+def _window_start(last_emision: datetime, lookback: timedelta) -> datetime:
+    """Midnight of the first day an incremental run re-reads.
+
+    Used both for the read window and for the hashes kept in the checkpoint,
+    so a sale is re-checked exactly when its hash was kept.
+    """
+    return datetime.combine((last_emision - lookback).date(), datetime.min.time())
+
+
+class VentasController(BaseController):
+    def __init__(self, mapping_manager: MappingManager, config: DBFConfig, metrics: Optional[RunMetrics] = None):
+        """Initialize the VENTAS controller.
         
         Args:
             mapping_manager: Manager for field mappings
             config: DBF configuration
+            metrics: Run report receiving the stage timings, a new one by default
         """
-        self.config = config
-        self.mapping_manager = mapping_manager
+        super().__init__(mapping_manager, config, metrics)
         self.venta_dbf = "VENTA.DBF"  # Header table
         self.partvta_dbf = "PARTVTA.DBF"  # Details table
+        self.header_plan = self.mapping_manager.compile(self.venta_dbf)
+        self.detail_plan = self.mapping_manager.compile(self.partvta_dbf)
         
-        # Initialize DBF reader
-        DBFConnection.set_dll_path(self.config.dll_path)
-        self.reader = DBFReader(self.config.source_directory, self.config.encryption_password)
+        # Only read the columns mappings.json uses
+        self.header_columns = self.mapping_manager.get_source_fields(self.venta_dbf)
+        self.detail_columns = self.mapping_manager.get_source_fields(self.partvta_dbf)
+        
+        # Strategy for fetching the details of a set of folios, see KeyLookup
+        # for the thresholds that can be tuned
+        self.detail_lookup = KeyLookup(
+            self.reader, self.partvta_dbf, 'NO_REFEREN',
+            index_tag=FOLIO_INDEX,
+            format_key=_folio_key
+        )
+        
+        # Join used by iter_sales: 'merge', 'hash' or 'auto'
+        self.join_strategy = 'auto'
+        self.last_join: Optional[str] = None
+        
+        # State of the last incremental run, saved by commit_checkpoint()
+        self.pending_checkpoint = None
     
-    def get_sales_in_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+    def get_sales_in_range(self, start_date: datetime, end_date: datetime) -> RecordBatch:
         """Get sales data within the specified date range, including details.
         
         Args:
@@ -34,148 +83,325 @@ class VentasController:
         Returns:
             List of dictionaries containing the mapped data with nested details
         """
-        start_time = time.time()
+        start = time.perf_counter()
+        
+        sales = list(self.iter_sales(start_date, end_date))
         
-        # First get headers for the date range
-        headers_start = time.time()
+        self._print_run_summary(len(sales), time.perf_counter() - start)
+        return sales
 
-        headers = self._get_headers_in_range(start_date, end_date)
-        headers_time = time.time() - headers_start
+    def write_sales_in_range(self, start_date: datetime, end_date: datetime, sink: Sink) -> int:
+        """Stream the sales within the date range into a sink.
+        
+        Sales are written as they are joined, so memory does not grow with
+        the size of the range.
+        
+        Args:
+            start_date: Start date for data range
+            end_date: End date for data range
+            sink: Open or unopened sink receiving the sales
+            
+        Returns:
+            Number of sales written
+        """
+        start = time.perf_counter()
+        count = sink.consume(self.iter_sales(start_date, end_date), self.config.batch_size)
+        self._print_run_summary(count, time.perf_counter() - start)
+        return count
 
-        print(f"\nTime to get headers: {headers_time:.2f} seconds")
+    def aggregate_sales(self, start_date: datetime, end_date: datetime, keys: Iterable[str] = (DATE_KEY,),
+                        bucket: str = 'day', aggregates: Iterable[str] = AGGREGATES) -> RecordBatch:
+        """Summarize the sale lines within the date range by group.
         
-        # Get folios to filter details
-        folios = [str(header['Folio']) for header in headers]
+        The joined sales are streamed into a SalesAggregator, so only one
+        accumulator per group is held in memory, whatever the size of the
+        range. Each line counts cantidad * precio - descuento.
         
-        # Then get details only for these folios
-        details_start = time.time()
+        Args:
+            start_date: Start date for data range
+            end_date: End date for data range
+            keys: Mapped header or detail fields to group by
+            bucket: Time bucket of the fecha key ('day', 'week', 'month', 'year')
+            aggregates: Aggregates of the line amount to output
+            
+        Returns:
+            One dictionary per group with its keys and aggregates, sorted by key
+        """
+        start = time.perf_counter()
+        aggregator = SalesAggregator(tuple(keys), bucket, tuple(aggregates))
+        sales = TimedIterator(self.iter_sales(start_date, end_date))
+        aggregate_start = time.perf_counter_ns()
+        try:
+            aggregator.add_all(sales)
+        finally:
+            sales.close()
+        self.metrics.add('aggregate', time.perf_counter_ns() - aggregate_start - sales.duration_ns, aggregator.lines)
+        results = aggregator.results()
+        
+        self._print_run_summary(aggregator.sales, time.perf_counter() - start)
+        print(f"Aggregated {aggregator.lines} sale lines into {len(results)} groups")
+        return results
 
-        details_by_folio = self._get_details_for_folios(folios) if folios else {}
+    def _print_run_summary(self, count: int, total_time: float) -> None:
+        """Print the join, lookup and access path used by the last run."""
+        print(f"\nJoined {count} sales with their details ({self.last_join} join)")
+        stats = self.last_detail_lookup
+        if self.last_join == 'hash' and stats:
+            print(f"Last PARTVTA.DBF lookup: {stats.strategy} lookup of {stats.keys} folios, "
+                  f"{stats.passes} passes, {stats.rows_read} rows read")
+        access_path = self.reader.access_paths.get(self.venta_dbf)
+        if access_path:
+            print(f"Access path: {access_path}")
+        print(f"Total processing time: {total_time:.2f} seconds")
 
-        details_time = time.time() - details_start
-        print(f"Time to get filtered details: {details_time:.2f} seconds")
+    def iter_sales(self, start_date: datetime, end_date: datetime, batch_size: Optional[int] = None,
+                   join: Optional[str] = None) -> Iterator[Record]:
+        """Stream sales within the date range, each with its nested details.
         
-        # Join headers with their details
-        join_start = time.time()
-        for header in headers:
-            folio = header['Folio']  # Using the mapped name from mappings.json
-            header['detalles'] = details_by_folio.get(folio, [])
-        join_time = time.time() - join_start
-        print(f"Time to join headers with details: {join_time:.2f} seconds")
+        With the 'merge' join both VENTA and PARTVTA are read in folio order
+        through their NO_REFEREN index and only one sale's details are held in
+        memory. The 'hash' join reads headers in batches and looks up the
+        details per batch, so memory is bounded by the batch size. 'auto'
+        uses the hash join when VENTA has an F_EMISION index, so the headers
+        are read as an index range, and otherwise the merge join when both
+        tables have the folio index.
         
-        total_time = time.time() - start_time
-        print(f"Total processing time: {total_time:.2f} seconds")
+        Args:
+            start_date: Start date for data range
+            end_date: End date for data range
+            batch_size: Headers per batch for the hash join, defaults to config.batch_size
+            join: 'merge', 'hash' or 'auto', defaults to self.join_strategy
+            
+        Yields:
+            Sale dictionaries with a 'detalles' list
+        """
+        join = join or self.join_strategy
+        if join == 'auto':
+            join = 'merge' if self._can_merge_join() and not self._has_date_index() else 'hash'
+        if join not in ('merge', 'hash'):
+            raise ValueError(f"Unknown join strategy '{join}', expected 'merge', 'hash' or 'auto'")
+        self.last_join = join
         
-        return headers
+        if join == 'merge':
+            sales = self._iter_sales_merge(start_date, end_date)
+        else:
+            sales = self._iter_sales_hash(start_date, end_date, batch_size or self.config.batch_size)
+        yield from sales
+
+    def iter_sales_incremental(self, checkpoint: CheckpointStore, start_date: datetime,
+                               end_date: Optional[datetime] = None, lookback_days: Optional[int] = None) -> Iterator[Record]:
+        """Stream only the sales added or changed since the last checkpoint.
+        
+        The checkpoint keeps, per source directory, the last exported folio,
+        F_EMISION and VENTA record count, plus a hash of every sale inside the
+        look-back window. A run re-reads from the watermark date minus
+        lookback_days and emits the sales whose hash is not stored yet: new
+        sales and recent sales that were edited.
         
-    def _get_details_for_folios(self, folios: List[str]) -> Dict[str, List[Dict[str, Any]]]:
-        """Get sales details for specific folios and organize them by folio number.
+        The new state is kept in pending_checkpoint; call commit_checkpoint()
+        once the output has been written.
         
         Args:
-            folios: List of folio numbers to get details for
+            checkpoint: Store holding the watermarks
+            start_date: Start date used when there is no watermark yet
+            end_date: End of the range, defaults to today
+            lookback_days: Days before the watermark to re-check, defaults to config.lookback_days
             
-        Returns:
-            Dictionary mapping folio numbers to lists of detail records
+        Yields:
+            Sale dictionaries with a 'detalles' list
         """
-        field_mappings = self.mapping_manager.get_field_mappings(self.partvta_dbf)
+        lookback = timedelta(days=self.config.lookback_days if lookback_days is None else lookback_days)
+        end_date = end_date or datetime.now()
+        key = self._checkpoint_key()
+        state = checkpoint.load(key) or {}
+        recent = state.get('recent', {})
         
-        # Create filter for specific folios using OR
-        filters = []
-        for folio in folios:
-            # Pad the folio with leading zeros to 6 digits to match DBF format
-            filter_dict = {
-                'field': 'NO_REFEREN',
-                'operator': '=',
-                'value': str(folio).zfill(6),  # Pad with leading zeros
-                'is_numeric': False  # Treat as string to preserve leading zeros
-            }
-            filters.append(filter_dict)
-
-        # Get filtered details
-        read_start = time.time()
+        last_emision = parse_fecha(state.get('last_emision'))
+        if last_emision:
+            window_start = _window_start(last_emision, lookback)
+            print(f"\nIncremental run from watermark folio {state.get('last_folio')} "
+                  f"({last_emision:%d/%m/%Y}), re-checking since {window_start:%d/%m/%Y}")
+        else:
+            window_start = start_date
+        
+        # Count before reading: rows appended during the run are re-read next time
+        record_count = self.reader.get_record_count(self.venta_dbf)
+        
+        seen = {}
+        emitted = 0
+        for sale in self.iter_sales(window_start, end_date):
+            folio = str(sale['Folio'])
+            sale_hash = content_hash(sale)
+            seen[folio] = (parse_fecha(sale.get('fecha')), sale_hash)
+            if recent.get(folio) != sale_hash:
+                emitted += 1
+                yield sale
+        
+        self.pending_checkpoint = (checkpoint, key, self._next_watermark(state, seen, record_count, lookback))
+        print(f"Incremental run: {emitted} new or changed sales of {len(seen)} checked")
 
-        raw_data_str = self.reader.to_json(self.partvta_dbf, 0, filters)
+    def commit_checkpoint(self) -> None:
+        """Persist the watermark of the last completed incremental run."""
+        if self.pending_checkpoint:
+            checkpoint, key, state = self.pending_checkpoint
+            checkpoint.save(key, state)
+            self.pending_checkpoint = None
 
-        read_time = time.time() - read_start
-        print(f"Time to read PARTVTA.DBF with filter: {read_time:.2f} seconds")
+    def _next_watermark(self, state: Dict[str, Any], seen: Dict[str, Any], record_count: int,
+                        lookback: timedelta) -> Dict[str, Any]:
+        """Build the checkpoint state after a run over the look-back window."""
+        folios = [int(folio) for folio in seen if folio.isdigit()]
+        last_folio = max(folios + [state.get('last_folio', 0)])
         
-        parse_start = time.time()
-
-        raw_data = json.loads(raw_data_str)
+        dates = [fecha for fecha, _ in seen.values() if fecha]
+        last_emision = parse_fecha(state.get('last_emision'))
+        if last_emision:
+            dates.append(last_emision)
+        last_emision = max(dates) if dates else None
         
-        parse_time = time.time() - parse_start
-        print(f"Time to parse PARTVTA JSON: {parse_time:.2f} seconds")
+        # Keep hashes only for sales that the next run will re-check
+        window_start = _window_start(last_emision, lookback) if last_emision else None
+        recent = {
+            folio: sale_hash for folio, (fecha, sale_hash) in seen.items()
+            if window_start is None or fecha is None or fecha >= window_start
+        }
+        return {
+            'last_folio': last_folio,
+            'last_emision': last_emision.isoformat(sep=' ') if last_emision else None,
+            'last_recno': record_count,
+            'recent': recent
+        }
+
+    def has_checkpoint(self, checkpoint: CheckpointStore) -> bool:
+        """Check whether an incremental run was already committed for this source."""
+        return checkpoint.load(self._checkpoint_key()) is not None
+
+    def _checkpoint_key(self) -> str:
+        return f"ventas:{self.config.source_directory}"
+
+    @property
+    def last_detail_lookup(self) -> Optional[LookupStats]:
+        """Strategy decision and timings of the last PARTVTA lookup."""
+        return self.detail_lookup.last_stats
 
-        # Organize details by folio
-        details_by_folio = {}
-        for record in raw_data:
-            transformed = self.transform_record(record, field_mappings)
-            if transformed:
-                folio = transformed['Folio']  # Using the mapped name
-                if folio not in details_by_folio:
-                    details_by_folio[folio] = []
-                details_by_folio[folio].append(transformed)
+    def _has_date_index(self) -> bool:
+        """Check whether VENTA headers can be read as an F_EMISION index range."""
+        return self.reader.use_indexes and self.reader.has_index(self.venta_dbf, DATE_INDEX)
+
+    def _can_merge_join(self) -> bool:
+        """Check that both tables can be read in folio order."""
+        return (self.reader.has_index(self.venta_dbf, FOLIO_INDEX)
+                and self.reader.has_index(self.partvta_dbf, FOLIO_INDEX))
+
+    def _iter_sales_merge(self, start_date: datetime, end_date: datetime) -> Iterator[Record]:
+        """Merge join of headers and details, both streamed in folio order."""
+        filters = self._build_date_filters(start_date, end_date)
+        raw_headers = self.reader.iter_records(
+            self.venta_dbf, self.config.limit_rows, filters, self.header_columns, order_by=FOLIO_INDEX
+        )
+        header_stream = self._prefetch(raw_headers)
+        headers = self._iter_transformed(header_stream, self.header_plan)
         
-        return details_by_folio
+        first = next(headers, None)
+        if first is None:
+            header_stream.close()
+            return
         
-    def _get_headers_in_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        """Get sales headers within the specified date range."""
-        field_mappings = self.mapping_manager.get_field_mappings(self.venta_dbf)
+        # Details start at the first folio of the range
+        detail_filters = Compare('NO_REFEREN', '>=', _folio_key(first['Folio']))
+        if self.config.columnar:
+            # PARTVTA is mostly numbers: decode and transform whole blocks of details
+            detail_batches = self.reader.iter_column_batches(
+                self.partvta_dbf, self.config.batch_size, None, detail_filters, self.detail_columns,
+                order_by=FOLIO_INDEX
+            )
+            detail_stream = self._prefetch(self._iter_transformed_columns(detail_batches, self.detail_plan))
+            details = detail_stream
+        else:
+            raw_details = self.reader.iter_records(
+                self.partvta_dbf, 0, detail_filters, self.detail_columns, order_by=FOLIO_INDEX
+            )
+            detail_stream = self._prefetch(raw_details)
+            details = self._iter_transformed(detail_stream, self.detail_plan)
         
-        # Format dates to match DBF format (dd/mm/yyyy)
-        # For end_date, we want to include the entire day, so we add one day and subtract 1 second
-        end_date_inclusive = end_date + timedelta(days=1) - timedelta(seconds=1)
-        
-        # Create a single filter for the date range
-        filters = [{
-            'field': 'F_EMISION',
-            'operator': 'range',
-            'from_value': start_date.strftime('%m/%d/%Y 12:00:00 a. m.'),  # Format to match DBF
-            'to_value': end_date.strftime('%m/%d/%Y 11:59:59 p. m.'),  # End of day
-            'is_date': False  # F_EMISION is stored as string
-        }]
-        print(f"\nSearching for date range: {start_date.strftime('%d/%m/%Y %H:%M:%S')} to {end_date_inclusive.strftime('%d/%m/%Y %H:%M:%S')}")
+        # The join's own time is what is left after pulling its inputs
+        header_input = TimedIterator(chain([first], headers))
+        detail_input = TimedIterator(details)
+        joined = TimedIterator(merge_join(header_input, detail_input, 'Folio', 'Folio'))
+        try:
+            yield from joined
+        finally:
+            # Stop the detail scan as soon as the last header is joined
+            detail_stream.close()
+            header_stream.close()
+            self.metrics.add('join', joined.duration_ns - header_input.duration_ns - detail_input.duration_ns,
+                             joined.count)
+
+    def _iter_sales_hash(self, start_date: datetime, end_date: datetime, batch_size: int) -> Iterator[Record]:
+        """Hash join of each batch of headers with its looked-up details.
         
-        read_start = time.time()
-        raw_data_str = self.reader.to_json(self.venta_dbf, self.config.limit_rows, filters)
-        read_time = time.time() - read_start
-        print(f"Time to read VENTA.DBF: {read_time:.2f} seconds")
+        With config.workers > 1 the detail lookups of several batches run on
+        worker threads while the next header batches are read.
+        """
+        def join_batch(headers: RecordBatch) -> RecordBatch:
+            folios = [header['Folio'] for header in headers]
+            raw_details = self.detail_lookup.iter_records(folios, self.detail_columns)
+            details = list(self._iter_transformed(raw_details, self.detail_plan))
+            with self.metrics.stage('join', rows=len(headers)):
+                return list(hash_join(headers, details, 'Folio', 'Folio'))
         
-        parse_start = time.time()
-        raw_data = json.loads(raw_data_str)
-        parse_time = time.time() - parse_start
-        print(f"Time to parse VENTA JSON: {parse_time:.2f} seconds")
+        header_batches = self._iter_headers_in_range(start_date, end_date, batch_size)
+        for sales in ordered_map(join_batch, header_batches, self.config.workers):
+            yield from sales
+
+    def _prefetch(self, records: Iterator[Record]) -> Iterator[Record]:
+        """Read a stream ahead on its own thread when running in parallel."""
+        if self.config.workers > 1:
+            return prefetch(records, self.config.batch_size)
+        return records
+
+    def _iter_transformed(self, records: Iterable[Record], plan: CompiledMapping) -> Iterator[Record]:
+        """Transform raw records lazily, dropping empty ones."""
+        transform = plan.transform
+        clock = time.perf_counter_ns
+        duration_ns = 0
+        count = 0
+        try:
+            for record in records:
+                start = clock()
+                transformed = transform(record)
+                duration_ns += clock() - start
+                if transformed:
+                    count += 1
+                    yield transformed
+        finally:
+            self.metrics.add('transform', duration_ns, count)
 
-        transformed_data = []
-        for record in raw_data:
-            transformed = self.transform_record(record, field_mappings)
-            if transformed:
-                transformed_data.append(transformed)
+    def _iter_transformed_columns(self, batches: Iterator[ColumnBatch], plan: CompiledMapping) -> Iterator[Record]:
+        """Transform column batches as a whole, then yield their records."""
+        try:
+            for batch in batches:
+                yield from self.transform_column_batch(batch, plan).to_records()
+        finally:
+            batches.close()
+
+    def _iter_headers_in_range(self, start_date: datetime, end_date: datetime, batch_size: int) -> Iterator[RecordBatch]:
+        """Stream sales headers within the specified date range in batches."""
+        filters = self._build_date_filters(start_date, end_date)
         
-        return transformed_data
+        for batch in self.reader.iter_batches(self.venta_dbf, batch_size, self.config.limit_rows, filters, self.header_columns):
+            transformed_batch = self.transform_batch(batch, self.header_plan)
+            if transformed_batch:
+                yield transformed_batch
 
-    def transform_record(self, record: Dict[str, Any], field_mappings: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform a DBF record using the field mappings.
+    def _build_date_filters(self, start_date: datetime, end_date: datetime) -> FilterNode:
+        """Build the F_EMISION filter for a date range."""
+        # For end_date, we want to include the entire day, so we add one day and subtract 1 second
+        start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date_inclusive = end_date.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1) - timedelta(seconds=1)
         
-        Args:
-            record: Raw record from DBF
-            field_mappings: Field mapping configuration
-            
-        Returns:
-            Transformed record with mapped field names and types
-        """
-        transformed = {}
-        for target_field, mapping in field_mappings.items():
-            dbf_field = mapping['dbf']
-            if dbf_field in record:
-                value = record[dbf_field]
-                if mapping['type'] == 'number':
-                    try:
-                        value = float(value) if '.' in str(value) else int(value)
-                    except (ValueError, TypeError):
-                        value = 0
-                
-                #transformed[target_field] = value
-                transformed[mapping['velneo_table']] = value
-                
-        return transformed
+        # Whole days: compared through DTOS() (or the F_EMISION tag) when the
+        # field is a DateTime, and parsed in Python when it is stored as text
+        filters = Range('F_EMISION', start_date.date(), end_date_inclusive.date())
+        print(f"\nSearching for date range: {start_date.strftime('%d/%m/%Y %H:%M:%S')} to {end_date_inclusive.strftime('%d/%m/%Y %H:%M:%S')}")
+        return filters
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from ..utils.dates import parse_fecha
+from .core import Record
+
+# Time buckets the date key can be grouped by
+BUCKETS = ('day', 'week', 'month', 'year')
+
+# Aggregates of the line amount, in output order
+AGGREGATES = ('count', 'sum', 'min', 'max', 'avg')
+
+# Mapped header field holding the sale date, and the nested details
+DATE_KEY = 'fecha'
+DETAILS_KEY = 'detalles'
+
+# Decimals kept in the aggregated amounts (those of PRECIO_UNI)
+AMOUNT_DECIMALS = 4
+
+
+def line_amount(detail: Record) -> float:
+    """Amount of a sale line: cantidad * precio - descuento, missing values as 0."""
+    return (detail.get('cantidad') or 0) * (detail.get('precio') or 0) - (detail.get('descuento') or 0)
+
+
+def bucket_start(value: Any, bucket: str) -> Optional[str]:
+    """First day of the time bucket holding a date, as 'YYYY-MM-DD'.
+
+    Weeks start on Monday. None if the value is not a date.
+    """
+    day = parse_fecha(value)
+    if day is None:
+        return None
+    if bucket == 'week':
+        day -= timedelta(days=day.weekday())
+    elif bucket == 'month':
+        day = day.replace(day=1)
+    elif bucket == 'year':
+        day = day.replace(month=1, day=1)
+    return day.strftime('%Y-%m-%d')
+
+
+class SalesAggregator:
+    """Streaming group-by over joined sales (headers with nested details).
+
+    Every detail line adds its amount to the group of its key values;
+    keys are looked up in the line first and then in its header, so
+    header fields (fecha, empleado, cliente) and detail fields (REF,
+    SubFamilia) can be mixed. The date key is grouped by time bucket.
+    Only one accumulator per group is kept, never the sales themselves.
+    """
+
+    def __init__(self, keys: Sequence[str] = (DATE_KEY,), bucket: str = 'day',
+                 aggregates: Sequence[str] = AGGREGATES,
+                 measure: Callable[[Record], float] = line_amount):
+        """
+        Initialize an empty aggregation.
+
+        Args:
+            keys: Mapped fields to group by, none for a grand total
+            bucket: Time bucket of the date key, one of BUCKETS
+            aggregates: Aggregates to output, some of AGGREGATES
+            measure: Amount of a detail line
+
+        Raises:
+            ValueError: If the bucket or an aggregate is unknown
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown time bucket '{bucket}', expected one of {', '.join(BUCKETS)}")
+        unknown = [name for name in aggregates if name not in AGGREGATES]
+        if unknown:
+            raise ValueError(f"Unknown aggregates {unknown}, expected some of {', '.join(AGGREGATES)}")
+        self.keys = tuple(keys)
+        self.bucket = bucket
+        self.aggregates = tuple(aggregates)
+        self.measure = measure
+        self.sales = 0
+        self.lines = 0
+        # key values -> [count, sum, min, max]
+        self._groups: Dict[tuple, List[float]] = {}
+        self._buckets: Dict[Any, Optional[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def add(self, sale: Record) -> None:
+        """Add the lines of one sale."""
+        self.sales += 1
+        keys = self.keys
+        measure = self.measure
+        groups = self._groups
+        for detail in sale.get(DETAILS_KEY) or ():
+            key = tuple(self._key_value(name, sale, detail) for name in keys)
+            amount = measure(detail)
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [1, amount, amount, amount]
+            else:
+                group[0] += 1
+                group[1] += amount
+                if amount < group[2]:
+                    group[2] = amount
+                elif amount > group[3]:
+                    group[3] = amount
+            self.lines += 1
+
+    def add_all(self, sales: Iterable[Record]) -> 'SalesAggregator':
+        """Add every sale of a stream."""
+        for sale in sales:
+            self.add(sale)
+        return self
+
+    def results(self) -> List[Record]:
+        """One record per group, sorted by key: the key fields and the aggregates."""
+        rows = []
+        for key in sorted(self._groups, key=_sort_key):
+            count, total, low, high = self._groups[key]
+            values = {'count': count, 'sum': total, 'min': low, 'max': high, 'avg': total / count}
+            row = dict(zip(self.keys, key))
+            for name in self.aggregates:
+                value = values[name]
+                row[name] = value if name == 'count' else round(value, AMOUNT_DECIMALS)
+            rows.append(row)
+        return rows
+
+    def _key_value(self, name: str, sale: Record, detail: Record) -> Any:
+        value = detail[name] if name in detail else sale.get(name)
+        if name != DATE_KEY:
+            return value
+        # Few distinct dates per run, so each is bucketed once
+        bucket = self._buckets.get(value)
+        if bucket is None and value not in self._buckets:
+            bucket = self._buckets[value] = bucket_start(value, self.bucket)
+        return bucket
+
+
+def _sort_key(key: tuple) -> tuple:
+    # NULL keys last, and numbers and text never compared with each other
+    return tuple((value is None, not isinstance(value, (int, float)), value if isinstance(value, (int, float))
+                  else str(value or '')) for value in key)
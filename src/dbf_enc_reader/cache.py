@@ -0,0 +1,392 @@
+import hashlib
+import os
+import pickle
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .core import Record, RecordBatch
+from .dbf_file import table_path
+from .filters import FilterSpec, Predicate, as_filter
+
+# Companion files whose changes invalidate a table's cached results
+COMPANION_SUFFIXES = ('.cdx', '.fpt')
+
+# First bytes of a cache file; bump the version when the layout changes
+FILE_MAGIC = b'DBFQC2\n'
+FILE_SUFFIX = '.qc'
+
+# Rows per compressed block of a cache file
+BLOCK_ROWS = 10_000
+_BLOCK_HEADER = struct.Struct('>I')
+
+DEFAULT_MAX_ROWS = 500_000
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+
+
+@dataclass
+class CacheStats:
+    """Counters of a QueryCache."""
+    hits: int = 0         # Served from memory
+    disk_hits: int = 0    # Served from disk (and loaded into memory)
+    misses: int = 0       # Read from the table
+    stores: int = 0       # Results saved after a complete read
+    evictions: int = 0    # Entries dropped from memory to stay under max_rows
+    uncacheable: int = 0  # Reads with a Predicate filter or over the size limits, not cached
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), hit_ratio=round(self.hit_ratio, 4))
+
+
+class _Entry:
+    """Cached result: the column names and one value tuple per record."""
+    __slots__ = ('names', 'rows')
+
+    def __init__(self, names: Tuple[str, ...], rows: List[tuple]):
+        self.names = names
+        self.rows = rows
+
+    def records(self) -> RecordBatch:
+        # New dicts on every hit, so callers may modify what they get
+        names = self.names
+        return [dict(zip(names, row)) for row in self.rows]
+
+
+class QueryCache:
+    """Results of table reads, kept in memory (LRU) and on disk.
+
+    Entries are keyed by a hash of the query (table, projection, filters,
+    limit and order) and of the size and modification time of the table's
+    .dbf, .cdx and .fpt files, so any write to the table makes its old
+    entries unreachable. Only reads that run to completion are stored;
+    Predicate filters (arbitrary Python functions) are never cached.
+
+    A read buffers at most max_rows records; larger results are streamed
+    into their disk entry while they are read, and given up once the entry
+    passes max_disk_bytes (or at once without a disk store).
+
+    On disk each entry is a series of zlib-compressed pickles: the column
+    names, then blocks of BLOCK_ROWS value tuples; the oldest files are
+    removed past max_disk_bytes. The cache is shared between threads.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_rows: int = DEFAULT_MAX_ROWS,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            directory: Folder of the disk store, None to keep entries in memory only
+            max_rows: Records kept in memory over all entries; larger results
+                are only stored on disk
+            max_disk_bytes: Size of the disk store before old entries are removed
+        """
+        self.directory = Path(directory) if directory else None
+        self.max_rows = max_rows
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = CacheStats()
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, reader: Any, table_name: str, limit: Optional[int], filters: FilterSpec,
+            columns: Optional[Sequence[str]], order_by: Optional[str]) -> Optional[str]:
+        """Cache key of a read, None if it cannot be cached.
+
+        Args:
+            reader: DBFReader running the read (its class and data source are part of the key)
+            table_name: Name of the table
+            limit: Limit of the read
+            filters: Filter of the read
+            columns: Projection of the read
+            order_by: CDX tag the records are read in
+
+        Returns:
+            Hex digest, or None for Predicate filters and tables that do not exist
+        """
+        node = as_filter(filters)
+        if node is not None and _has_predicate(node):
+            with self._lock:
+                self.stats.uncacheable += 1
+            return None
+        path = table_path(reader.data_source, table_name)
+        files = []
+        for file_path in [path] + [path.with_suffix(suffix) for suffix in COMPANION_SUFFIXES]:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                if file_path == path:
+                    return None
+                continue
+            files.append((file_path.name.lower(), stat.st_size, stat.st_mtime_ns))
+        query = (type(reader).__name__, str(Path(reader.data_source).resolve()).lower(), table_name.upper(),
+                 tuple(columns) if columns is not None else None, repr(node), limit or None,
+                 order_by.upper() if order_by else None, tuple(files))
+        return hashlib.sha256(repr(query).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[RecordBatch]:
+        """Records of an entry, from memory or disk; None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry.records()
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self._remember(key, entry)
+        return entry.records()
+
+    def put(self, key: str, names: Sequence[str], rows: List[tuple]) -> None:
+        """Store the result of a complete read.
+
+        Args:
+            key: Key from key()
+            names: Column names of the records
+            rows: Values of each record, in column order
+        """
+        entry = _Entry(tuple(names), rows)
+        with self._lock:
+            self.stats.stores += 1
+            self._remember(key, entry)
+        self._save(key, entry)
+
+    def iter_cached(self, key: str, records: Iterator[Record]) -> Iterator[Record]:
+        """Pass records through, storing them if the iterator is exhausted.
+
+        Records must share their column names, as those of one read do.
+        Past max_rows records the rows go to the disk entry in blocks
+        instead of being buffered; a read stopped early or too large for
+        the cache stores nothing.
+        """
+        block_rows = min(BLOCK_ROWS, self.max_rows + 1)
+        names: Optional[Tuple[str, ...]] = None
+        rows: Optional[List[tuple]] = []
+        spill: Optional[_EntryWriter] = None
+        completed = False
+        try:
+            for record in records:
+                if rows is not None:
+                    if names is None:
+                        names = tuple(record)
+                    rows.append(tuple(record.values()))
+                    if spill is None and len(rows) > self.max_rows:
+                        spill = self._writer(key, names)
+                        if spill is None:
+                            rows = self._give_up()
+                    if spill is not None and rows is not None and len(rows) >= block_rows:
+                        rows = [] if spill.write(rows) else self._give_up()
+                yield record
+            completed = True
+        finally:
+            # Release the table (and its connection) also when stopped early
+            close = getattr(records, 'close', None)
+            if close is not None:
+                close()
+            if spill is not None and (not completed or rows is None):
+                spill.discard()
+        if rows is None:
+            return
+        if spill is None:
+            self.put(key, names or (), rows)
+        elif spill.write(rows) and spill.commit():
+            with self._lock:
+                self.stats.stores += 1
+            self._prune()
+        else:
+            spill.discard()
+            self._give_up()
+
+    def clear(self) -> None:
+        """Drop every entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+        for path in self._files():
+            path.unlink(missing_ok=True)
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        """Keep an entry in memory, evicting the least recently used (lock held)."""
+        if len(entry.rows) > self.max_rows:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._rows -= len(previous.rows)
+        self._entries[key] = entry
+        self._rows += len(entry.rows)
+        while self._rows > self.max_rows:
+            _, evicted = self._entries.popitem(last=False)
+            self._rows -= len(evicted.rows)
+            self.stats.evictions += 1
+
+    def _give_up(self) -> None:
+        """Count a read too large to cache; returns None to drop its buffer."""
+        with self._lock:
+            self.stats.uncacheable += 1
+        return None
+
+    def _writer(self, key: str, names: Tuple[str, ...]) -> Optional['_EntryWriter']:
+        """Start writing a disk entry, None without a disk store."""
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            return _EntryWriter(path, names, self.max_disk_bytes)
+        except OSError:
+            return None
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.directory / f"{key}{FILE_SUFFIX}" if self.directory is not None else None
+
+    def _files(self) -> List[Path]:
+        return list(self.directory.glob(f"*{FILE_SUFFIX}")) if self.directory is not None else []
+
+    def _load(self, key: str) -> Optional[_Entry]:
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            if not data.startswith(FILE_MAGIC):
+                raise ValueError("not a cache file")
+            blocks = list(_read_blocks(data, len(FILE_MAGIC)))
+            names, rows = blocks[0], [row for block in blocks[1:] for row in block]
+        except Exception:
+            # Truncated or from another version: read the table again
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)  # Pruning removes the least recently used files first
+        return _Entry(tuple(names), rows)
+
+    def _save(self, key: str, entry: _Entry) -> None:
+        writer = self._writer(key, entry.names)
+        if writer is None:
+            return
+        for start in range(0, len(entry.rows), BLOCK_ROWS):
+            if not writer.write(entry.rows[start:start + BLOCK_ROWS]):
+                writer.discard()
+                return
+        if writer.commit():
+            self._prune()
+        else:
+            writer.discard()
+
+    def _prune(self) -> None:
+        """Remove the least recently used files past max_disk_bytes."""
+        files = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class _EntryWriter:
+    """Disk entry written block by block under a temporary name."""
+
+    def __init__(self, path: Path, names: Tuple[str, ...], max_bytes: int):
+        """
+        Create the temporary file and write the column names.
+
+        Args:
+            path: Final path of the entry
+            names: Column names of the records
+            max_bytes: Size past which write() gives up
+        """
+        self.path = path
+        self.tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        self.max_bytes = max_bytes
+        self.file: Optional[BinaryIO] = open(self.tmp_path, 'wb')
+        self.size = self.file.write(FILE_MAGIC)
+        self._append(list(names))
+
+    def write(self, rows: List[tuple]) -> bool:
+        """Append a block of rows; False if the entry failed or grew past max_bytes."""
+        if self.file is None:
+            return False
+        return self._append(rows) if rows else self.size <= self.max_bytes
+
+    def _append(self, value: Any) -> bool:
+        block = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), 1)
+        try:
+            self.size += self.file.write(_BLOCK_HEADER.pack(len(block)) + block)
+        except OSError:
+            return False
+        return self.size <= self.max_bytes
+
+    def commit(self) -> bool:
+        """Move the complete entry to its final path."""
+        try:
+            self.file.close()
+            self.file = None
+            os.replace(self.tmp_path, self.path)
+        except OSError:
+            return False
+        return True
+
+    def discard(self) -> None:
+        """Remove the temporary file."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.tmp_path.unlink(missing_ok=True)
+
+
+def _read_blocks(data: bytes, offset: int) -> Iterator[Any]:
+    """Unpickle the length-prefixed compressed blocks of a cache file."""
+    while offset < len(data):
+        (length,) = _BLOCK_HEADER.unpack_from(data, offset)
+        offset += _BLOCK_HEADER.size
+        if offset + length > len(data):
+            raise ValueError("truncated cache file")
+        yield pickle.loads(zlib.decompress(data[offset:offset + length]))
+        offset += length
+
+
+def _has_predicate(node: Any) -> bool:
+    if isinstance(node, Predicate):
+        return True
+    children = getattr(node, 'children', None)
+    if children is None:
+        child = getattr(node, 'child', None)
+        children = (child,) if child is not None else ()
+    return any(_has_predicate(child) for child in children)
+
+
+_caches: Dict[Tuple[Optional[str], int], QueryCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_query_cache(directory: Optional[str], max_rows: int = DEFAULT_MAX_ROWS) -> QueryCache:
+    """The cache shared by every reader of the session using a directory."""
+    key = (str(Path(directory).resolve()) if directory else None, max_rows)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = QueryCache(directory, max_rows)
+        return cache
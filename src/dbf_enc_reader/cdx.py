@@ -0,0 +1,260 @@
+import mmap
+import re
+import struct
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Size of an index node and of a tag header (header plus expression pool)
+NODE_SIZE = 512
+TAG_HEADER_SIZE = 1024
+
+# Node attribute bits
+NODE_ROOT = 0x01
+NODE_LEAF = 0x02
+
+# Offset of the Julian day number of 0001-01-01 from date.toordinal()
+JULIAN_OFFSET = 1721425
+
+# Key expressions a tag can be read with: FIELD, UPPER(FIELD) or DTOS(FIELD)
+_EXPRESSION = re.compile(r'^\s*(?:(UPPER|DTOS)\s*\(\s*(\w+)\s*\)|(\w+))\s*$', re.IGNORECASE)
+
+# Key kinds, derived from the tag expression and the indexed field's type:
+# character keys (FIELD, UPPER(FIELD), DTOS(FIELD)) and 8-byte numeric keys
+# (numbers, and dates as Julian day numbers)
+KEY_TEXT = 'text'
+KEY_UPPER = 'upper'
+KEY_DTOS = 'dtos'
+KEY_NUMBER = 'number'
+KEY_DATE = 'date'
+
+
+class CDXTag(NamedTuple):
+    """A tag of a compound index, with what is needed to build its keys."""
+    name: str
+    offset: int
+    root: int
+    key_length: int
+    expression: str
+    field: Optional[str]
+    kind: Optional[str]
+    descending: bool
+    has_for: bool
+
+    @property
+    def seekable(self) -> bool:
+        """Whether keys can be built for the tag and it is in ascending order."""
+        return self.kind is not None and not self.descending and not self.has_for
+
+    @property
+    def pad(self) -> bytes:
+        """Byte that compressed leaf keys drop from their end."""
+        return b'\0' if self.kind in (KEY_NUMBER, KEY_DATE) else b' '
+
+
+class CDXIndex:
+    """Read-only view of a FoxPro compound (.cdx) index, mapped into memory.
+
+    The tag directory and the tag headers are parsed on open. Keys are
+    compared as bytes, which matches tags built with the MACHINE collation;
+    tags whose key length does not match their field (e.g. GENERAL
+    collation) or whose expression is not a plain field, UPPER(field) or
+    DTOS(field) are listed but not seekable.
+    """
+
+    def __init__(self, path: str, field_types: Dict[str, Tuple[str, int]], encoding: str = 'cp1252'):
+        """
+        Open and parse the index.
+
+        Args:
+            path: Path to the .cdx file
+            field_types: (DBF type, length) per field name of the table
+            encoding: Code page of character keys
+        """
+        self.path = Path(path)
+        self.encoding = encoding
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty index file: {path}")
+        fields = {name.upper(): spec for name, spec in field_types.items()}
+        directory = self._read_tag_header(0, '', fields)
+        self.tags: Dict[str, CDXTag] = {}
+        for key, offset in self._iter_range(directory, None, None):
+            name = key.rstrip(b'\0 ').decode('ascii', 'replace')
+            self.tags[name.upper()] = self._read_tag_header(offset, name, fields)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'CDXIndex':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def tag(self, name: str) -> Optional[CDXTag]:
+        """Tag by name (case-insensitive), None if the index has no such tag."""
+        return self.tags.get(name.upper())
+
+    def encode_key(self, tag: CDXTag, value: Any) -> bytes:
+        """Build the stored key of a value for a seekable tag.
+
+        Raises:
+            ValueError: If the value cannot be expressed as a key of the tag
+        """
+        if tag.kind in (KEY_DTOS, KEY_DATE):
+            day = _as_day(value)
+            if day is None:
+                raise ValueError(f"Cannot seek date tag {tag.name} with {value!r}")
+            if tag.kind == KEY_DTOS:
+                return day.strftime('%Y%m%d').encode('ascii')
+            return _encode_double(float(day.toordinal() + JULIAN_OFFSET))
+        if tag.kind in (KEY_TEXT, KEY_UPPER):
+            text = value if isinstance(value, str) else str(value)
+            if tag.kind == KEY_UPPER:
+                text = text.upper()
+            return text.encode(self.encoding)[:tag.key_length].ljust(tag.key_length)
+        if tag.kind == KEY_NUMBER:
+            try:
+                return _encode_double(float(value))
+            except (TypeError, ValueError):
+                raise ValueError(f"Cannot seek numeric tag {tag.name} with {value!r}")
+        raise ValueError(f"Tag {tag.name} ({tag.expression}) is not seekable")
+
+    def iter_recnos(self, tag: CDXTag, low: Optional[bytes] = None,
+                    high: Optional[bytes] = None) -> Iterator[int]:
+        """Record numbers of a tag's keys in [low, high], in key order.
+
+        Args:
+            tag: Tag to walk
+            low: Lowest key, from the first key if None
+            high: Highest key, to the last key if None
+
+        Yields:
+            Record numbers (1-based)
+        """
+        for _, recno in self._iter_range(tag, low, high):
+            yield recno
+
+    def _read_tag_header(self, offset: int, name: str, fields: Dict[str, Tuple[str, int]]) -> CDXTag:
+        data = self._map
+        root, _, _, key_length, options = struct.unpack_from('<iiiHB', data, offset)
+        descending = struct.unpack_from('<H', data, offset + 502)[0] == 1
+        pool = bytes(data[offset + 512:offset + TAG_HEADER_SIZE])
+        expression = pool.split(b'\0', 1)[0].decode('ascii', 'replace').strip()
+        field, kind = _key_kind(expression, key_length, fields)
+        return CDXTag(name, offset, root, key_length, expression, field, kind, descending, bool(options & 0x08))
+
+    def _iter_range(self, tag: CDXTag, low: Optional[bytes], high: Optional[bytes]) -> Iterator[Tuple[bytes, int]]:
+        """(key, record number) pairs of a tag within [low, high]."""
+        node = self._find_leaf(tag, low)
+        while node is not None and node >= 0:
+            right = struct.unpack_from('<i', self._map, node + 8)[0]
+            for key, recno in self._leaf_entries(node, tag.key_length, tag.pad):
+                if low is not None and key < low:
+                    continue
+                if high is not None and key > high:
+                    return
+                yield key, recno
+            node = right
+
+    def _find_leaf(self, tag: CDXTag, low: Optional[bytes]) -> Optional[int]:
+        """Descend from the root to the leaf holding the first key >= low."""
+        data = self._map
+        node = tag.root
+        entry_size = tag.key_length + 8
+        while True:
+            attributes, count = struct.unpack_from('<HH', data, node)
+            if attributes & NODE_LEAF:
+                return node
+            if count == 0:
+                return None
+            # Interior entries hold the highest key of each child
+            child = None
+            for i in range(count):
+                start = node + 12 + i * entry_size
+                key = bytes(data[start:start + tag.key_length])
+                child = struct.unpack_from('>I', data, start + tag.key_length + 4)[0]
+                if low is None or key >= low:
+                    break
+            else:
+                return None
+            node = child
+
+    def _leaf_entries(self, node: int, key_length: int, pad: bytes) -> List[Tuple[bytes, int]]:
+        """Decode the compressed keys of a leaf node."""
+        data = self._map
+        _, count = struct.unpack_from('<HH', data, node)
+        (_, recno_mask, dup_mask, trail_mask, recno_bits, dup_bits, _,
+         entry_bytes) = struct.unpack_from('<HIBBBBBB', data, node + 12)
+        trail_shift = recno_bits + dup_bits
+        entries = node + 24
+        position = node + NODE_SIZE
+        previous = b''
+        result = []
+        for i in range(count):
+            start = entries + i * entry_bytes
+            info = int.from_bytes(data[start:start + entry_bytes], 'little')
+            duplicate = (info >> recno_bits) & dup_mask
+            trailing = (info >> trail_shift) & trail_mask
+            size = key_length - duplicate - trailing
+            position -= size
+            key = previous[:duplicate] + data[position:position + size] + pad * trailing
+            previous = key
+            result.append((key, info & recno_mask))
+        return result
+
+
+def _key_kind(expression: str, key_length: int,
+              fields: Dict[str, Tuple[str, int]]) -> Tuple[Optional[str], Optional[str]]:
+    """Indexed field and key kind of a tag expression, (None, None) if unsupported."""
+    match = _EXPRESSION.match(expression)
+    if not match:
+        return None, None
+    function = (match.group(1) or '').upper()
+    field = (match.group(2) or match.group(3)).upper()
+    if field not in fields:
+        return None, None
+    field_type, length = fields[field]
+    if function == 'DTOS':
+        return (field, KEY_DTOS) if field_type in ('D', 'T') and key_length == 8 else (None, None)
+    if field_type in ('C', 'V'):
+        if key_length != length:
+            return None, None  # Collation other than MACHINE
+        return field, KEY_UPPER if function == 'UPPER' else KEY_TEXT
+    if function:
+        return None, None
+    if field_type in ('N', 'F', 'B', 'Y') and key_length == 8:
+        return field, KEY_NUMBER
+    if field_type == 'D' and key_length == 8:
+        return field, KEY_DATE
+    return None, None
+
+
+def _as_day(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value.strip(), '%Y%m%d').date()
+        except ValueError:
+            return None
+    return None
+
+
+def _encode_double(value: float) -> bytes:
+    """Sortable byte form of a number in numeric and date keys."""
+    if value == 0:
+        value = 0.0  # No separate key for -0.0
+    raw = bytearray(struct.pack('>d', value))
+    if value >= 0:
+        raw[0] |= 0x80
+    else:
+        raw = bytearray(b ^ 0xFF for b in raw)
+    return bytes(raw)
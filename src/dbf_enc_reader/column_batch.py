@@ -0,0 +1,576 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .cdx import JULIAN_OFFSET
+from .filters import OPERATORS, And, Compare, FilterNode, In, Not, Or, Range, _day, compile_predicate
+
+# Byte marking a deleted record
+DELETED = 0x2A
+
+# Widest numeric text parsed with int64 arithmetic (10**18 still fits)
+MAX_INT_DIGITS = 18
+
+# Days from 0001-01-01 (ordinal 1) to the Unix epoch, the origin of datetime64
+_EPOCH_ORDINAL = 719163
+
+# Unicode code point of every byte, per code page
+_CODE_PAGE_TABLES: Dict[str, Any] = {}
+
+_TRUE = b'TtYy'
+_FALSE = b'FfNn'
+
+
+def _numpy():
+    # Optional dependency, loaded on first use
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("Columnar batches require the 'numpy' package (pip install numpy)")
+    return numpy
+
+
+class ColumnBatch:
+    """A block of records held as one NumPy array per column.
+
+    nulls marks the entries that read as NULL (None in a record); invalid
+    marks the ones whose stored text is not a valid value of the column
+    (e.g. '*****' in an overflowing numeric field or a garbled date).
+    Invalid source values are NULL too; after a mapping transform they
+    hold the mapping's fallback (0 for numbers) and stay flagged, so bad
+    data can be counted without going through the rows.
+
+    Text columns are str arrays, numbers int64 or float64, dates and
+    timestamps datetime64 and logicals bool; other values are kept in
+    object arrays.
+    """
+
+    def __init__(self, columns: Dict[str, Any], nulls: Optional[Dict[str, Any]] = None,
+                 invalid: Optional[Dict[str, Any]] = None, length: Optional[int] = None):
+        """
+        Initialize the batch.
+
+        Args:
+            columns: Array per column name, all of the same length
+            nulls: Boolean mask of the NULL entries per column, if any
+            invalid: Boolean mask of the invalid entries per column, if any
+            length: Number of records, for a batch without columns
+        """
+        self.columns = columns
+        self.nulls = nulls or {}
+        self.invalid = invalid or {}
+        self.length = length if length is not None else (len(next(iter(columns.values()))) if columns else 0)
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns)
+
+    def column(self, name: str) -> Any:
+        """Array of a column, matched case-insensitively if not found as given."""
+        if name in self.columns:
+            return self.columns[name]
+        return self.columns[self._name(name)]
+
+    def null_mask(self, name: str) -> Any:
+        """NULL mask of a column, all False if it has no NULLs."""
+        name = self._name(name)
+        mask = self.nulls.get(name)
+        return mask if mask is not None else _numpy().zeros(self.length, dtype=bool)
+
+    def select(self, names: Sequence[str]) -> 'ColumnBatch':
+        """Batch with only the given columns, in that order; unknown names are ignored."""
+        names = [self._name(name) for name in names if self._has(name)]
+        return ColumnBatch({name: self.columns[name] for name in names},
+                           {name: self.nulls[name] for name in names if name in self.nulls},
+                           {name: self.invalid[name] for name in names if name in self.invalid},
+                           self.length)
+
+    def take(self, selection: Any) -> 'ColumnBatch':
+        """Batch with the records of a boolean mask or an index array."""
+        np = _numpy()
+        selection = np.asarray(selection)
+        length = int(selection.sum()) if selection.dtype == bool else len(selection)
+        return ColumnBatch({name: values[selection] for name, values in self.columns.items()},
+                           {name: mask[selection] for name, mask in self.nulls.items()},
+                           {name: mask[selection] for name, mask in self.invalid.items()},
+                           length)
+
+    def head(self, count: int) -> 'ColumnBatch':
+        """Batch with the first count records."""
+        if count >= self.length:
+            return self
+        return self.take(_numpy().arange(count))
+
+    def invalid_counts(self) -> Dict[str, int]:
+        """Number of invalid entries per column that has any."""
+        counts = {name: int(mask.sum()) for name, mask in self.invalid.items()}
+        return {name: count for name, count in counts.items() if count}
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """Columns as lists of Python values, NULL as None and dates as datetime."""
+        return {name: _to_list(values, self.nulls.get(name)) for name, values in self.columns.items()}
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Materialize the records as dictionaries keyed by column name."""
+        columns = self.to_columns()
+        if not columns:
+            return [{} for _ in range(self.length)]
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+    def to_tuples(self, names: Optional[Sequence[str]] = None) -> List[Tuple[Any, ...]]:
+        """Materialize the records as tuples, None for names the batch does not have.
+
+        Args:
+            names: Columns of the tuples, in order; all columns if None
+        """
+        columns = self.to_columns()
+        names = list(columns) if names is None else names
+        missing = [None] * self.length
+        return list(zip(*[columns.get(name, missing) for name in names])) if names else [() for _ in range(self.length)]
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]],
+                     columns: Optional[Sequence[str]] = None) -> 'ColumnBatch':
+        """Build a batch from records, typing each column by its values.
+
+        Args:
+            records: Records as dictionaries
+            columns: Columns to take, those of the first record if None
+        """
+        if columns is None:
+            columns = list(records[0]) if records else []
+        arrays, nulls = {}, {}
+        for name in columns:
+            arrays[name], mask = _from_values([record.get(name) for record in records])
+            if mask is not None:
+                nulls[name] = mask
+        return cls(arrays, nulls, length=len(records))
+
+    def _has(self, name: str) -> bool:
+        return name in self.columns or name.upper() in {key.upper() for key in self.columns}
+
+    def _name(self, name: str) -> str:
+        if name in self.columns:
+            return name
+        for key in self.columns:
+            if key.upper() == name.upper():
+                return key
+        raise KeyError(name)
+
+
+def read_rows(table, recnos: Any) -> Tuple[Any, Any]:
+    """Copy a block of records out of a mapped table, without the deleted ones.
+
+    Args:
+        table: Open DBFTable
+        recnos: Record numbers to read, a range (read as one slice) or a
+            sequence; numbers past the end of the table are skipped
+
+    Returns:
+        (rows, recnos): uint8 array of one record per row and the record
+        number of each row
+    """
+    np = _numpy()
+    count, length = table.record_count, table.record_length
+    if count == 0:
+        return np.empty((0, length), dtype=np.uint8), np.empty(0, dtype=np.int64)
+    # The view on the mapped file is only used to copy from, so the map can be closed later
+    records = np.frombuffer(table.buffer, dtype=np.uint8, count=count * length,
+                            offset=table.header_length).reshape(count, length)
+    if isinstance(recnos, range) and recnos.step == 1:
+        first, last = max(recnos.start, 1), min(recnos.stop - 1, count)
+        rows = np.array(records[first - 1:last]) if last >= first else np.empty((0, length), dtype=np.uint8)
+        numbers = np.arange(first, max(last + 1, first))
+    else:
+        numbers = np.fromiter(recnos, dtype=np.int64)
+        numbers = numbers[(numbers >= 1) & (numbers <= count)]
+        rows = records[numbers - 1]
+    del records
+    live = rows[:, 0] != DELETED
+    if not live.all():
+        rows, numbers = rows[live], numbers[live]
+    return rows, numbers
+
+
+def decode_rows(table, rows: Any, columns: Optional[Sequence[str]] = None) -> ColumnBatch:
+    """Decode the fields of a block of records column by column.
+
+    Values match what the row decoder (and the ADS reader) gives: trimmed
+    text, int or float numbers, dates at midnight, NULL for blank values.
+
+    Args:
+        table: DBFTable the rows were read from
+        rows: Records as returned by read_rows
+        columns: Columns to decode, all if None; unknown names are ignored
+
+    Returns:
+        ColumnBatch keyed by the table's field names
+    """
+    if columns is None:
+        fields = list(table.fields)
+    else:
+        fields = [table.field(name) for name in columns if table.field(name) is not None]
+    arrays, nulls, invalid = {}, {}, {}
+    for field in fields:
+        raw = rows[:, field.offset:field.offset + field.length]
+        values, null, bad = _decode_field(table, field, raw)
+        if field.null_bit is not None and table.null_flags is not None:
+            flags = rows[:, table.null_flags.offset + field.null_bit // 8]
+            null = ((flags >> (field.null_bit % 8)) & 1).astype(bool) | (False if null is None else null)
+        arrays[field.name] = values
+        if null is not None:
+            nulls[field.name] = null
+        if bad is not None:
+            invalid[field.name] = bad
+    return ColumnBatch(arrays, nulls, invalid, len(rows))
+
+
+def parse_numbers(text: Any) -> Tuple[Any, Any, Any]:
+    """Parse fixed-width numeric text, all entries at once.
+
+    Accepts blank padding on either side, an optional sign and digits with
+    at most one decimal point, as int() and float() do for DBF numbers.
+    The whole column is int64 unless an entry has a decimal point (or the
+    text is wider than MAX_INT_DIGITS), in which case it is float64; the
+    row converters type each value alike: float with a point, int without.
+
+    Args:
+        text: str or bytes array, or a 2D uint8 array of characters
+
+    Returns:
+        (values, blank, invalid): values with 0 where blank or invalid,
+        and the masks of the blank and of the unparseable entries
+    """
+    np = _numpy()
+    codes = _char_codes(text)
+    count, width = codes.shape
+    integral = width <= MAX_INT_DIGITS
+    mantissa = np.zeros(count, dtype=np.int64 if integral else np.float64)
+    decimals = np.zeros(count, dtype=np.int64)
+    blank = np.ones(count, dtype=bool)
+    valid = np.ones(count, dtype=bool)
+    negative = np.zeros(count, dtype=bool)
+    seen_point = np.zeros(count, dtype=bool)
+    seen_digit = np.zeros(count, dtype=bool)
+    ended = np.zeros(count, dtype=bool)
+    # One pass over the character positions, every entry at once
+    for position in range(width):
+        char = codes[:, position]
+        digit = (char >= 48) & (char <= 57)
+        space = (char == 32) | (char == 0)
+        point = char == 46
+        sign = (char == 45) | (char == 43)
+        valid &= (digit | point | sign | space) & ~(ended & ~space) & ~(sign & ~blank) & ~(point & seen_point)
+        negative |= (char == 45) & blank
+        ended |= space & ~blank
+        mantissa = np.where(digit, mantissa * 10 + (char.astype(np.int64) - 48), mantissa)
+        decimals += digit & seen_point
+        seen_point |= point
+        seen_digit |= digit
+        blank &= space
+    valid &= seen_digit
+    invalid = ~blank & ~valid
+    negative &= valid
+    if integral and not (seen_point & valid).any():
+        values = np.where(valid, mantissa, 0)
+        return np.where(negative, -values, values), blank, invalid
+    # The integer mantissa divided by a power of ten rounds like float() for up to 15 digits
+    values = np.where(valid, mantissa / (10.0 ** decimals), 0.0)
+    return np.where(negative, -values, values), blank, invalid
+
+
+def to_number_column(values: Any, nulls: Optional[Any] = None) -> Tuple[Any, Any]:
+    """Vectorized counterpart of the 'number' mapping converter.
+
+    Returns:
+        (numbers, invalid): values with 0 for NULL and unparseable entries,
+        and the mask of the unparseable ones
+    """
+    np = _numpy()
+    kind = values.dtype.kind
+    if kind in 'iuf':
+        numbers = values if nulls is None or not nulls.any() else np.where(nulls, 0, values)
+        return numbers, np.zeros(len(values), dtype=bool)
+    if kind in 'US':
+        numbers, _, invalid = parse_numbers(values)
+        if nulls is not None:
+            numbers = np.where(nulls, 0, numbers)
+            invalid = invalid & ~nulls
+        return numbers, invalid
+    # Dates, logicals and mixed values go through the row converter
+    from .mapping_manager import _to_number
+    originals = _to_list(values, nulls)
+    converted = [_to_number(value) for value in originals]
+    invalid = np.array([number == 0 and value is not None and value != 0
+                        for number, value in zip(converted, originals)], dtype=bool)
+    numbers, _ = _from_values(converted)
+    return numbers, invalid
+
+
+def to_string_column(values: Any, nulls: Optional[Any] = None) -> Any:
+    """Vectorized counterpart of the 'string' mapping converter; NULL becomes ''."""
+    np = _numpy()
+    kind = values.dtype.kind
+    if kind == 'U':
+        strings = values
+    elif kind == 'M':
+        missing = np.isnat(values)
+        seconds = values.astype('datetime64[s]')
+        if ((values.astype('datetime64[us]') != seconds) & ~missing).any():
+            return _strings_of(values, nulls)  # str() adds the microseconds
+        strings = np.char.replace(np.datetime_as_string(seconds, unit='s'), 'T', ' ')
+        nulls = missing if nulls is None else nulls | missing
+    elif kind in 'iu':
+        strings = values.astype(str)
+    elif kind == 'b':
+        strings = np.where(values, 'True', 'False')
+    else:
+        return _strings_of(values, nulls)
+    if nulls is not None and nulls.any():
+        strings = np.where(nulls, '', strings)
+    return strings
+
+
+def filter_mask(node: FilterNode, batch: ColumnBatch) -> Any:
+    """Evaluate a filter on a whole batch.
+
+    Comparisons, ranges and IN lists on columns of a matching type are
+    computed on the arrays; anything else (Python predicates, dates on
+    text columns, mixed types) falls back to the compiled row predicate
+    on the columns it needs. NULL never matches a comparison, as in
+    compile_predicate.
+
+    Returns:
+        Boolean array, True for the records that match
+    """
+    np = _numpy()
+    if isinstance(node, And):
+        mask = np.ones(len(batch), dtype=bool)
+        for child in node.children:
+            mask &= filter_mask(child, batch)
+        return mask
+    if isinstance(node, Or):
+        mask = np.zeros(len(batch), dtype=bool)
+        for child in node.children:
+            mask |= filter_mask(child, batch)
+        return mask
+    if isinstance(node, Not):
+        return ~filter_mask(node.child, batch)
+    mask = None
+    if isinstance(node, Compare):
+        mask = _compare(batch, node.field, OPERATORS[node.op], node.value)
+    elif isinstance(node, Range):
+        mask = np.ones(len(batch), dtype=bool)
+        for op, bound in (('>=', node.low), ('<=', node.high)):
+            if bound is not None and mask is not None:
+                part = _compare(batch, node.field, op, bound)
+                mask = None if part is None else mask & part
+    elif isinstance(node, In):
+        mask = _isin(batch, node.field, node.values)
+    if mask is None:
+        return _row_mask(node, batch)
+    return mask
+
+
+def _compare(batch: ColumnBatch, field: str, op: str, value: Any) -> Optional[Any]:
+    np = _numpy()
+    if not batch._has(field):
+        return None
+    values = batch.column(field)
+    nulls = batch.null_mask(field)
+    kind = values.dtype.kind
+    if value is None:
+        if op not in ('=', '<>'):
+            return np.zeros(len(batch), dtype=bool)
+        empty = nulls | (values == '') if kind == 'U' else nulls
+        return empty if op == '=' else ~empty
+    if isinstance(value, date):
+        if kind != 'M':
+            return None
+        values, value = values.astype('datetime64[D]'), np.datetime64(_day(value), 'D')
+    elif isinstance(value, bool):
+        if kind != 'b':
+            return None
+    elif isinstance(value, (int, float, Decimal)):
+        if kind not in 'iuf':
+            return None
+        value = float(value) if isinstance(value, Decimal) else value
+    elif isinstance(value, str):
+        if kind != 'U':
+            return None
+    else:
+        return None
+    if op == '=':
+        result = values == value
+    elif op == '<>':
+        result = values != value
+    elif op == '<':
+        result = values < value
+    elif op == '<=':
+        result = values <= value
+    elif op == '>':
+        result = values > value
+    else:
+        result = values >= value
+    return result & ~nulls
+
+
+def _isin(batch: ColumnBatch, field: str, wanted: Sequence[Any]) -> Optional[Any]:
+    np = _numpy()
+    if not batch._has(field):
+        return None
+    values = batch.column(field)
+    kind = values.dtype.kind
+    wanted = [value for value in wanted if value is not None]
+    if not wanted:
+        return np.zeros(len(batch), dtype=bool)
+    if kind == 'M' and all(isinstance(value, date) for value in wanted):
+        values = values.astype('datetime64[D]')
+        wanted = [np.datetime64(_day(value), 'D') for value in wanted]
+    elif kind == 'U' and all(isinstance(value, str) for value in wanted):
+        pass
+    elif kind in 'iuf' and all(isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+                               for value in wanted):
+        wanted = [float(value) if isinstance(value, Decimal) else value for value in wanted]
+    else:
+        return None
+    return np.isin(values, np.array(wanted)) & ~batch.null_mask(field)
+
+
+def _row_mask(node: FilterNode, batch: ColumnBatch) -> Any:
+    np = _numpy()
+    predicate = compile_predicate(node)
+    records = batch.select(node.fields()).to_records()
+    return np.fromiter((predicate(record) for record in records), dtype=bool, count=len(records))
+
+
+def _decode_field(table, field, raw: Any) -> Tuple[Any, Optional[Any], Optional[Any]]:
+    """(values, nulls, invalid) of one field of a block of records."""
+    np = _numpy()
+    field_type = field.type
+    count = len(raw)
+    if field_type in ('C', 'V'):
+        return _decode_text(raw, table.encoding), None, None
+    if field_type in ('N', 'F'):
+        values, blank, invalid = parse_numbers(raw)
+        return values, blank | invalid, invalid
+    if field_type == 'D':
+        return _parse_dates(raw)
+    if field_type == 'L':
+        first = raw[:, 0]
+        true = np.isin(first, np.frombuffer(_TRUE, dtype=np.uint8))
+        false = np.isin(first, np.frombuffer(_FALSE, dtype=np.uint8))
+        return true, ~(true | false), None
+    if field_type == 'I':
+        return np.ascontiguousarray(raw).view('<i4').ravel().astype(np.int64), None, None
+    if field_type == 'B':
+        return np.ascontiguousarray(raw).view('<f8').ravel().copy(), None, None
+    if field_type == 'Y':
+        return np.ascontiguousarray(raw).view('<i8').ravel() / 10000, None, None
+    if field_type == 'T':
+        julian, milliseconds = np.ascontiguousarray(raw).view('<i4').reshape(count, 2).T.astype(np.int64)
+        null = julian <= 0
+        stamps = (julian - JULIAN_OFFSET - _EPOCH_ORDINAL) * 86400000 + milliseconds
+        return np.where(null, 0, stamps).astype('datetime64[ms]'), null, None
+    # Memos and other types: the row converter, one value at a time
+    convert = table._converter(field)
+    values = np.empty(count, dtype=object)
+    values[:] = [convert(bytes(value)) for value in raw]
+    return values, None, None
+
+
+def _parse_dates(raw: Any) -> Tuple[Any, Any, Any]:
+    """'YYYYMMDD' text to datetime64[D]; blank or zero dates are NULL."""
+    np = _numpy()
+    codes = raw.astype(np.int64)
+    digit = (codes >= 48) & (codes <= 57)
+    blank = ((codes == 32) | (codes == 48) | (codes == 0)).all(axis=1)
+    numbers = np.where(digit, codes - 48, 0)
+    year = numbers[:, :4] @ np.array([1000, 100, 10, 1])
+    month = numbers[:, 4:6] @ np.array([10, 1])
+    day = numbers[:, 6:8] @ np.array([10, 1])
+    shape_ok = digit.all(axis=1) & (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    starts = (np.where(shape_ok, year, 1970) - 1970).astype('datetime64[Y]').astype('datetime64[M]') \
+        + (np.where(shape_ok, month, 1) - 1)
+    dates = starts.astype('datetime64[D]') + (np.where(shape_ok, day, 1) - 1)
+    # Day 31 of a 30-day month lands in the next month
+    valid = shape_ok & (dates.astype('datetime64[M]') == starts)
+    invalid = ~blank & ~valid
+    null = ~valid
+    return np.where(null, np.datetime64('NaT'), dates), null, invalid
+
+
+def _char_codes(text: Any) -> Any:
+    """2D uint8 array of the characters of a text column; non-Latin-1 characters become 0xFF."""
+    np = _numpy()
+    if text.ndim == 2:
+        return text
+    if text.dtype.kind == 'U':
+        width = max(text.dtype.itemsize // 4, 1)
+        codes = np.ascontiguousarray(text, dtype=f'U{width}').view(np.uint32).reshape(len(text), width)
+        return np.minimum(codes, 0xFF).astype(np.uint8)
+    width = max(text.dtype.itemsize, 1)
+    return np.ascontiguousarray(text, dtype=f'S{width}').view(np.uint8).reshape(len(text), width)
+
+
+def _decode_text(raw: Any, encoding: str) -> Any:
+    """Fixed-width single-byte text to a trimmed str array, through a code page table."""
+    np = _numpy()
+    table = _CODE_PAGE_TABLES.get(encoding)
+    if table is None:
+        characters = bytes(range(256)).decode(encoding, errors='replace')
+        table = _CODE_PAGE_TABLES[encoding] = np.array([ord(character) for character in characters], dtype=np.uint32)
+    count, width = raw.shape
+    text = np.ascontiguousarray(table[raw]).view(f'U{max(width, 1)}').reshape(count)
+    return np.char.strip(text, ' \0')
+
+
+def _to_list(values: Any, nulls: Optional[Any]) -> List[Any]:
+    if values.dtype.kind == 'M':
+        result = values.astype('datetime64[us]').tolist()
+    else:
+        result = values.tolist()
+    if nulls is not None:
+        for i in _numpy().flatnonzero(nulls).tolist():
+            result[i] = None
+    return result
+
+
+def _strings_of(values: Any, nulls: Optional[Any]) -> Any:
+    from .mapping_manager import _to_string
+    return _numpy().array([_to_string(value) for value in _to_list(values, nulls)], dtype=str)
+
+
+def _from_values(values: List[Any]) -> Tuple[Any, Optional[Any]]:
+    """Array of Python values typed by their common type, with the NULL mask."""
+    np = _numpy()
+    nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+    present = [value for value in values if value is not None]
+    types = {type(value) for value in present}
+    dtype, fill = object, None
+    if types and types <= {str}:
+        dtype, fill = str, ''
+    elif types and types <= {int}:
+        dtype, fill = np.int64, 0
+    elif types and types <= {int, float}:
+        dtype, fill = np.float64, 0.0
+    elif types and types <= {bool}:
+        dtype, fill = bool, False
+    elif types and types <= {datetime, date}:
+        dtype, fill = 'datetime64[us]', None
+    if dtype is not object:
+        if nulls.any():
+            missing = np.datetime64('NaT') if fill is None else fill
+            values = [missing if value is None else value for value in values]
+        try:
+            array = np.array(values, dtype=dtype)
+        except (OverflowError, ValueError):
+            dtype = object
+    if dtype is object:
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+    return array, (nulls if nulls.any() else None)
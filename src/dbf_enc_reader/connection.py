@@ -1,22 +1,42 @@
-import clr
+import threading
 from pathlib import Path
 from typing import Optional
 
 class DBFConnection:
     _dll_loaded = False
+    _dll_path: Optional[str] = None
+    _dll_lock = threading.Lock()
 
     @classmethod
     def set_dll_path(cls, path: str) -> None:
         """Set the path to Advantage Data Provider DLL.
         
+        The assembly is loaded once per process; later calls with the same
+        path return immediately.
+        
         Args:
             path: Full path to Advantage.Data.Provider.dll
+            
+        Raises:
+            RuntimeError: If the DLL cannot be loaded, or a different DLL
+                was already loaded (assemblies cannot be unloaded)
         """
-        try:
-            clr.AddReference(path)
-            cls._dll_loaded = True
-        except Exception as e:
-            raise RuntimeError(f"Failed to load Advantage DLL from {path}: {str(e)}")
+        with cls._dll_lock:
+            if cls._dll_loaded:
+                if cls._dll_path != path:
+                    raise RuntimeError(
+                        f"Advantage DLL already loaded from {cls._dll_path}, cannot load {path}"
+                    )
+                return
+            try:
+                # pythonnet boots the .NET runtime on import, so it is only
+                # imported once a DBF is actually going to be read
+                import clr
+                clr.AddReference(path)
+                cls._dll_loaded = True
+                cls._dll_path = path
+            except Exception as e:
+                raise RuntimeError(f"Failed to load Advantage DLL from {path}: {str(e)}")
 
     @classmethod
     def _check_dll_loaded(cls) -> None:
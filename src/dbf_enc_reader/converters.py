@@ -1,7 +1,27 @@
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Any
+from typing import Any, Callable, Tuple
+
+# .NET DateTime ticks are 100ns intervals since 0001-01-01
+_DOTNET_EPOCH = datetime(1, 1, 1)
+
 
 class DataConverter:
+    def __init__(self):
+        self._invariant_culture = None
+        # Reader getter and converter for each .NET field type
+        self._typed_accessors = {
+            'System.String': ('GetString', self.from_string),
+            'System.Decimal': ('GetDecimal', self.from_decimal),
+            'System.DateTime': ('GetDateTime', self.from_datetime),
+            'System.Int16': ('GetInt16', self.from_native),
+            'System.Int32': ('GetInt32', self.from_native),
+            'System.Int64': ('GetInt64', self.from_native),
+            'System.Double': ('GetDouble', self.from_native),
+            'System.Single': ('GetFloat', self.from_native),
+            'System.Boolean': ('GetBoolean', self.from_native),
+        }
+
     def smart_trim(self, value: Any) -> Any:
         """
         Trim spaces intelligently based on value type.
@@ -39,3 +59,63 @@ class DataConverter:
             
         # Apply smart trimming after conversion
         return self.smart_trim(value)
+
+    def typed_accessor(self, type_name: str) -> Tuple[str, Callable[[Any], Any]]:
+        """
+        Get the reader getter name and converter for a .NET field type.
+        
+        Args:
+            type_name: Full name of the field type (e.g. 'System.Decimal')
+            
+        Returns:
+            Tuple of (getter method name, converter callable); unknown types
+            fall back to GetValue with convert_value
+        """
+        return self._typed_accessors.get(type_name, ('GetValue', self.convert_value))
+
+    def from_native(self, value: Any) -> Any:
+        """Return values pythonnet already maps to Python types unchanged."""
+        return value
+
+    def from_string(self, value: str) -> str:
+        """Trim a value read with GetString."""
+        return value.strip()
+
+    def from_decimal(self, value: Any) -> Any:
+        """
+        Convert a value read with GetDecimal to int or float.
+        
+        Values with a fractional part (e.g. '12.50') become float and whole
+        values (e.g. '12') become int, matching how mapped numbers are typed.
+        """
+        if isinstance(value, Decimal):
+            text = str(value)
+        else:
+            text = value.ToString(self._get_invariant_culture())
+        return float(text) if '.' in text else int(text)
+
+    def from_datetime(self, value: Any) -> datetime:
+        """Convert a value read with GetDateTime to a Python datetime."""
+        if isinstance(value, datetime):
+            return value
+        return _DOTNET_EPOCH + timedelta(microseconds=value.Ticks // 10)
+
+    def to_dotnet(self, value: Any) -> Any:
+        """Convert a Python value to the .NET type expected by index keys.
+        
+        Dates become System.DateTime; other values are passed unchanged.
+        """
+        if isinstance(value, datetime):
+            from System import DateTime
+            return DateTime(value.year, value.month, value.day, value.hour, value.minute, value.second)
+        if isinstance(value, date):
+            from System import DateTime
+            return DateTime(value.year, value.month, value.day)
+        return value
+
+    def _get_invariant_culture(self):
+        """Get (and cache) the .NET invariant culture for number formatting."""
+        if self._invariant_culture is None:
+            from System.Globalization import CultureInfo
+            self._invariant_culture = CultureInfo.InvariantCulture
+        return self._invariant_culture
@@ -1,108 +1,476 @@
-import clr
 import json
-from typing import List, Dict, Any, Optional
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 from pathlib import Path
 
+from .column_batch import ColumnBatch
 from .connection import DBFConnection
 from .converters import DataConverter
+from .dbf_file import read_dbf_header, table_path
+from .filters import DEFAULT_MAX_IN_VALUES, CompiledFilter, FilterNode, FilterSpec, as_filter, compile_filter
+from .planner import ACCESS_FILTER, ACCESS_FULL_SCAN, ACCESS_INDEX_RANGE, AccessPath, find_index_range, index_range_bounds
+from .pool import ConnectionPool, get_default_pool
+from .schema import TableSchema
+from ..utils.metrics import RunMetrics
+
+# Default number of records per batch for iter_batches
+DEFAULT_BATCH_SIZE = 1000
+
+# Native in-process record types passed from the reader to the controllers
+Record = Dict[str, Any]
+RecordBatch = List[Record]
 
 class DBFReader:
-    def __init__(self, data_source: str, encryption_password: str):
+    def __init__(self, data_source: str, encryption_password: str, pool: Optional[ConnectionPool] = None):
         """
         Initialize DBF reader with connection parameters.
         
         Args:
             data_source: Path to the DBF file
             encryption_password: Password for encrypted DBF
+            pool: Connection pool to borrow connections from, defaults to
+                the pool shared by all readers
         """
-        self.connection = DBFConnection(data_source, encryption_password)
+        self.data_source = data_source
+        self.encryption_password = encryption_password
+        self.pool = pool or get_default_pool()
         self.converter = DataConverter()
+        self._index_cache: Dict[Tuple[str, str], bool] = {}
+        self._index_tags: Dict[str, List[str]] = {}
+        
+        # Run range filters as index ranges when a CDX tag covers the field
+        self.use_indexes = True
+        # Longer IN lists are checked in Python instead of an AOF OR chain
+        self.max_in_values = DEFAULT_MAX_IN_VALUES
+        self.last_access_path: Optional[AccessPath] = None
+        self.access_paths: Dict[str, AccessPath] = {}
+        # Receives the connect, filter_setup, read and convert stage timings
+        self.metrics: Optional[RunMetrics] = None
+        # QueryCache serving repeated reads of unchanged tables, None to always read
+        self.cache = None
 
-    def read_table(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    def read_table(self, table_name: str, limit: Optional[int] = None, filters: FilterSpec = None,
+                   columns: Optional[Sequence[str]] = None) -> RecordBatch:
         """Read records from a table with optional filters.
         
         Args:
             table_name: Name of the table to read
             limit: Optional limit on number of records to read
-            filters: Optional list of filter conditions
+            filters: Optional filter, a FilterNode or legacy filter dictionaries
+            columns: Optional projection, only these columns are read
             
         Returns:
             List of records as dictionaries
         """
-        results = []
-        with self.connection as conn:
-            from System.Data import CommandType
+        return list(self.iter_records(table_name, limit, filters, columns))
+
+    def iter_records(self, table_name: str, limit: Optional[int] = None, filters: FilterSpec = None,
+                     columns: Optional[Sequence[str]] = None, order_by: Optional[str] = None) -> Iterator[Record]:
+        """Yield records one at a time while the ADS reader is still open.
+        
+        Each call borrows its own pooled connection until the iterator is
+        exhausted or closed, so several iterators (e.g. headers and details)
+        can be consumed at the same time. With a cache set, a read already
+        done on the unchanged table is served from it instead.
+        
+        Args:
+            table_name: Name of the table to read
+            limit: Optional limit on number of records to read
+            filters: Optional filter, a FilterNode or legacy filter dictionaries
+            columns: Optional projection; other fields are never fetched or
+                converted (filters may still reference them)
+            order_by: Optional CDX tag to read the records in index order
             
-            # Create command with TableDirect for better performance
-            cmd = conn.conn.CreateCommand()
-            cmd.CommandType = CommandType.TableDirect
-            cmd.CommandText = table_name
-            cmd.AdsOptimizedFilters = True  # Enable AOF for better performance
+        Yields:
+            Records as dictionaries
+        """
+        if self.cache is None:
+            yield from self._iter_records(table_name, limit, filters, columns, order_by)
+            return
+        
+        start = time.perf_counter_ns()
+        key = self.cache.key(self, table_name, limit, filters, columns, order_by)
+        records = self.cache.get(key) if key is not None else None
+        if records is not None:
+            self._add_metrics('cache', time.perf_counter_ns() - start, len(records))
+            yield from records
+        elif key is not None:
+            yield from self.cache.iter_cached(key, self._iter_records(table_name, limit, filters, columns, order_by))
+        else:
+            yield from self._iter_records(table_name, limit, filters, columns, order_by)
+
+    def _iter_records(self, table_name: str, limit: Optional[int], filters: FilterSpec,
+                      columns: Optional[Sequence[str]], order_by: Optional[str]) -> Iterator[Record]:
+        """Read records from the table, see iter_records."""
+        with self._connection() as conn:
+            start = time.perf_counter_ns()
+            reader, compiled = self._open_reader(conn, table_name, filters, order_by)
+            self._add_metrics('filter_setup', time.perf_counter_ns() - start)
+            predicate = compiled.predicate
             
-            # Get reader
-            reader = cmd.ExecuteExtendedReader()
+            # The post-filter needs its fields even if they are not projected
+            extra = set()
+            if predicate is not None and columns is not None:
+                extra = {field.upper() for field in compiled.residual.fields()} - {name.upper() for name in columns}
             
-            # Apply filters if any
-            if filters:
-                filter_conditions = []
-                use_or = len(filters) > 1 and all(f['field'] == filters[0]['field'] for f in filters)
-                
-                for f in filters:
-                    if f['operator'] == 'range':
-                        filter_conditions.append(
-                            f"{f['field']} >= '{f['from_value']}' AND "
-                            f"{f['field']} <= '{f['to_value']}'"
-                        )
-                    else:
-                        filter_conditions.append(
-                            f"{f['field']}{f['operator']} '{f['value']}'"
-                        )
-                
-                if filter_conditions:
-                    join_op = " OR " if use_or else " AND "
-                    filter_expr = join_op.join(filter_conditions)
-                    #print(f"\nApplying AOF filter: {filter_expr}")
-                    try:
-                        reader.Filter = filter_expr
-                    except Exception as e:
-                        print(f"\nFilter error: {str(e)}")
-                        print(f"Filter expression: {filter_expr}")
-                        raise
+            # Resolve names, ordinals and typed getters once per reader
+            schema = TableSchema.resolve(reader, self.converter, list(columns) + sorted(extra) if extra else columns)
+            read_record = schema.read_record
+            extra = [name for name in schema.names if name.upper() in extra]
             
-            # Process results
+            # Process results; cursor moves and conversions are timed apart
             count = 0
-            while reader.Read():
-               
-                if limit and count >= limit:
-                    break
+            scanned = 0
+            read_ns = convert_ns = 0
+            clock = time.perf_counter_ns
+            try:
+                while True:
+                    start = clock()
+                    if not reader.Read():
+                        read_ns += clock() - start
+                        break
+                    converted = clock()
+                    read_ns += converted - start
                     
-                record = {}
-                for i in range(reader.FieldCount):
-                    field_name = reader.GetName(i)
-                    value = reader.GetValue(i)
-                    record[field_name] = self.converter.convert_value(value)
+                    if limit and count >= limit:
+                        break
                     
-                results.append(record)
-                count += 1
+                    record = read_record(reader)
+                    convert_ns += clock() - converted
+                    scanned += 1
+                    if predicate is not None and not predicate(record):
+                        continue
+                    for name in extra:
+                        del record[name]
+                    yield record
+                    count += 1
+            finally:
+                reader.Close()
+                self._add_scan_metrics(table_name, scanned, read_ns, convert_ns)
+
+    def iter_batches(self, table_name: str, batch_size: int = DEFAULT_BATCH_SIZE, limit: Optional[int] = None,
+                     filters: FilterSpec = None,
+                     columns: Optional[Sequence[str]] = None, order_by: Optional[str] = None) -> Iterator[RecordBatch]:
+        """Yield records in lists of at most ``batch_size`` items.
+        
+        Args:
+            table_name: Name of the table to read
+            batch_size: Maximum number of records per batch
+            limit: Optional limit on number of records to read
+            filters: Optional filter, a FilterNode or legacy filter dictionaries
+            columns: Optional projection, only these columns are read
+            order_by: Optional CDX tag to read the records in index order
+            
+        Yields:
+            Lists of records as dictionaries
+        """
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be greater than 0, got {batch_size}")
+        
+        batch = []
+        for record in self.iter_records(table_name, limit, filters, columns, order_by):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_column_batches(self, table_name: str, batch_size: int = DEFAULT_BATCH_SIZE, limit: Optional[int] = None,
+                            filters: FilterSpec = None, columns: Optional[Sequence[str]] = None,
+                            order_by: Optional[str] = None) -> Iterator[ColumnBatch]:
+        """Yield records as column batches, one NumPy array per column.
+        
+        The ADS provider hands out values record by record, so each batch
+        is built from a batch of records; NativeDBFReader decodes the
+        columns straight from the file. Requires numpy.
+        
+        Args:
+            table_name: Name of the table to read
+            batch_size: Maximum number of records per batch
+            limit: Optional limit on number of records to read
+            filters: Optional filter, a FilterNode or legacy filter dictionaries
+            columns: Optional projection, only these columns are read
+            order_by: Optional CDX tag to read the records in index order
+            
+        Yields:
+            ColumnBatch per batch of records
+        """
+        for batch in self.iter_batches(table_name, batch_size, limit, filters, columns, order_by):
+            start = time.perf_counter_ns()
+            column_batch = ColumnBatch.from_records(batch, columns)
+            self._add_metrics('convert', time.perf_counter_ns() - start, len(batch))
+            yield column_batch
+
+    def iter_index_ranges(self, table_name: str, index_tag: str, ranges: Iterable[Tuple[Any, Any]],
+                          columns: Optional[Sequence[str]] = None) -> Iterator[Record]:
+        """Yield the records of several key ranges of an index tag.
+        
+        All ranges are scanned on one reader with the tag active, so each
+        range costs an index seek instead of a table scan.
+        
+        Args:
+            table_name: Name of the table to read
+            index_tag: CDX tag to set as the active index
+            ranges: (low, high) inclusive key bounds, in index key format
+            columns: Optional projection, only these columns are read
+            
+        Yields:
+            Records as dictionaries, range by range
+        """
+        with self._connection() as conn:
+            reader = self._open_reader_direct(conn, table_name)
+            reader.ActiveIndex = index_tag
+            read_record = TableSchema.resolve(reader, self.converter, columns).read_record
+            
+            scanned = 0
+            read_ns = convert_ns = 0
+            clock = time.perf_counter_ns
+            try:
+                for low, high in ranges:
+                    start = clock()
+                    reader.SetRange(self._index_key(low), self._index_key(high))
+                    while reader.Read():
+                        converted = clock()
+                        read_ns += converted - start
+                        record = read_record(reader)
+                        convert_ns += clock() - converted
+                        scanned += 1
+                        yield record
+                        start = clock()
+                    read_ns += clock() - start
+                reader.ClearRange()
+            finally:
+                reader.Close()
+                self._add_scan_metrics(table_name, scanned, read_ns, convert_ns)
+
+    def get_record_count(self, table_name: str) -> int:
+        """Get the number of records in a table, including deleted ones.
+        
+        Read from the DBF header, so no connection is opened.
+        
+        Args:
+            table_name: Name of the table
+            
+        Returns:
+            Record count stored in the table header
+        """
+        return read_dbf_header(str(table_path(self.data_source, table_name))).record_count
+
+    def get_index_tags(self, table_name: str) -> List[str]:
+        """Find the CDX index tags of a table.
+        
+        Tags are named after the field they index, so each column name is
+        probed as a tag once; the result is cached per table.
+        
+        Args:
+            table_name: Name of the table
             
-            return results
+        Returns:
+            Names of the tags that exist on the table
+        """
+        key = table_name.upper()
+        if key not in self._index_tags:
+            with self._connection() as conn:
+                reader = self._open_reader_direct(conn, table_name)
+                tags = []
+                try:
+                    for i in range(reader.FieldCount):
+                        tag = reader.GetName(i)[:10]
+                        try:
+                            reader.ActiveIndex = tag
+                        except Exception:
+                            self._index_cache[(key, tag.upper())] = False
+                            continue
+                        self._index_cache[(key, tag.upper())] = True
+                        tags.append(tag)
+                finally:
+                    reader.Close()
+                self._index_tags[key] = tags
+        return self._index_tags[key]
+
+    def has_index(self, table_name: str, index_tag: str) -> bool:
+        """Check whether a table has a CDX index tag.
+        
+        Args:
+            table_name: Name of the table
+            index_tag: Tag name to look for
+            
+        Returns:
+            True if the tag can be set as the active index
+        """
+        key = (table_name.upper(), index_tag.upper())
+        if key not in self._index_cache:
+            with self._connection() as conn:
+                reader = self._open_reader_direct(conn, table_name)
+                try:
+                    reader.ActiveIndex = index_tag
+                    self._index_cache[key] = True
+                except Exception:
+                    self._index_cache[key] = False
+                finally:
+                    reader.Close()
+        return self._index_cache[key]
+
+    @contextmanager
+    def _connection(self) -> Iterator[DBFConnection]:
+        """Borrow a pooled connection to the data source for a with block."""
+        start = time.perf_counter_ns()
+        connection = self.pool.acquire(self.data_source, self.encryption_password)
+        self._add_metrics('connect', time.perf_counter_ns() - start)
+        try:
+            yield connection
+        finally:
+            self.pool.release(connection)
+
+    def _add_metrics(self, stage: str, duration_ns: int, rows: int = 0, bytes: int = 0) -> None:
+        if self.metrics is not None:
+            self.metrics.add(stage, duration_ns, rows, bytes)
+
+    def _add_scan_metrics(self, table_name: str, scanned: int, read_ns: int, convert_ns: int) -> None:
+        """Record a finished scan; read bytes are whole records as stored in the DBF."""
+        if self.metrics is None:
+            return
+        try:
+            record_length = read_dbf_header(str(table_path(self.data_source, table_name))).record_length
+        except (OSError, ValueError):
+            record_length = 0
+        self.metrics.add('read', read_ns, scanned, scanned * record_length)
+        self.metrics.add('convert', convert_ns, scanned)
+
+    def _index_key(self, value: Any):
+        """Wrap a key value in the object[] expected by the extended reader."""
+        from System import Array, Object
+        return Array[Object]([self.converter.to_dotnet(value)])
+
+    def _open_reader_direct(self, conn: DBFConnection, table_name: str):
+        """Open an extended reader on a table without filters or planning."""
+        from System.Data import CommandType
+        
+        cmd = conn.conn.CreateCommand()
+        cmd.CommandType = CommandType.TableDirect
+        cmd.CommandText = table_name
+        return cmd.ExecuteExtendedReader()
+
+    def _open_reader(self, conn: DBFConnection, table_name: str, filters: FilterSpec = None,
+                     order_by: Optional[str] = None) -> Tuple[Any, CompiledFilter]:
+        """Open an extended reader on a table and choose its access path.
+        
+        The filter is compiled for the table's field types. A range or
+        equality on a field with a CDX tag is run as an index range
+        (SetRange) unless the read must follow another index. The whole
+        filter, the range condition included, is still compiled: what ADS
+        can evaluate becomes the AOF filter, and the rest is returned as a
+        residual to check in Python. SetRange narrows the keys visited but
+        the filter stays the source of truth, as in the native reader. The chosen path is stored
+        in last_access_path and access_paths.
+        
+        Args:
+            conn: Open DBF connection
+            table_name: Name of the table to read
+            filters: Optional filter, a FilterNode or legacy filter dictionaries
+            order_by: Optional CDX tag the records must be read in
             
+        Returns:
+            Tuple of the AdsExtendedReader positioned before the first record
+            and the CompiledFilter whose predicate every record must pass
+        """
+        from System.Data import CommandType
+        
+        # Create command with TableDirect for better performance
+        cmd = conn.conn.CreateCommand()
+        cmd.CommandType = CommandType.TableDirect
+        cmd.CommandText = table_name
+        cmd.AdsOptimizedFilters = True  # Enable AOF for better performance
+        
+        # Get reader
+        reader = cmd.ExecuteExtendedReader()
+        access_path = AccessPath(table_name)
+        node = as_filter(filters)
+        field_types = self._field_types(reader) if node is not None else {}
+        
+        if node is not None and self.use_indexes:
+            range_node = find_index_range(node, self.get_index_tags(table_name), field_types)
+            field = getattr(range_node, 'field', None)
+            if range_node is not None and (not order_by or order_by.upper() == field.upper()):
+                # The range condition stays in the filter: date bounds are
+                # widened to whole days, so SetRange can return extra keys
+                self._set_index_range(reader, range_node, access_path)
+        
+        # Apply the remaining filters if any
+        compiled = compile_filter(node, field_types, self.max_in_values)
+        filter_expr = compiled.expression
+        if filter_expr:
+            #print(f"\nApplying AOF filter: {filter_expr}")
+            try:
+                reader.Filter = filter_expr
+            except Exception as e:
+                print(f"\nFilter error: {str(e)}")
+                print(f"Filter expression: {filter_expr}")
+                raise
+            access_path.filter = filter_expr
+            if access_path.mode == ACCESS_FULL_SCAN:
+                access_path.mode = ACCESS_FILTER
+        if compiled.residual is not None:
+            access_path.residual = repr(compiled.residual)
+        
+        if order_by and access_path.index is None:
+            reader.ActiveIndex = order_by
+        
+        self.last_access_path = access_path
+        self.access_paths[table_name] = access_path
+        return reader, compiled
+
+    @staticmethod
+    def _field_types(reader) -> Dict[str, str]:
+        """.NET type name of each column of an open reader."""
+        return {reader.GetName(i): reader.GetFieldType(i).FullName for i in range(reader.FieldCount)}
+
+    def _set_index_range(self, reader, node: FilterNode, access_path: AccessPath) -> bool:
+        """Try to run a condition as an index range on the field's tag.
+        
+        Returns:
+            True if the range was set, False to fall back to a filter scan
+        """
+        tag = node.field
+        try:
+            reader.ActiveIndex = tag
+        except Exception:
+            return False
+        
+        for low, high in index_range_bounds(node):
+            try:
+                reader.SetRange(self._index_key(low), self._index_key(high))
+            except Exception:
+                # Key type does not match the tag expression, try the next form
+                continue
+            access_path.mode = ACCESS_INDEX_RANGE
+            access_path.index = tag
+            access_path.low, access_path.high = low, high
+            return True
+        return False
 
-    def to_json(self, table_name: str, limit: Optional[int] = None, filters: Optional[List[Dict[str, Any]]] = None) -> str:
+    def to_json(self, table_name: str, limit: Optional[int] = None, filters: FilterSpec = None,
+                columns: Optional[Sequence[str]] = None) -> str:
         """
-        Convert table records to JSON string.
+        Convert table records to a compact JSON string.
+        
+        Intended for output/debugging only; controllers should consume
+        iter_records/iter_batches directly instead of re-parsing this.
         
         Args:
             table_name: Name of the table to convert
             limit: Optional limit on number of records to convert
-            filters: Optional list of filter conditions
+            filters: Optional filter, a FilterNode or legacy filter dictionaries
+            columns: Optional projection, only these columns are read
             
         Returns:
             JSON string representation of the records
         """
-        records = self.read_table(table_name, limit, filters)
+        records = self.read_table(table_name, limit, filters, columns)
         
-        return json.dumps(records, indent=4, ensure_ascii=False)
+        return json.dumps(records, ensure_ascii=False, separators=(',', ':'), default=str)
 
     def get_table_info(self, table_name: str) -> Dict[str, Any]:
         """
@@ -114,9 +482,14 @@ class DBFReader:
         Returns:
             Dictionary containing table metadata
         """
-        with self.connection as conn:
-            reader = conn.get_reader(table_name)
-            return {
-                'field_count': reader.FieldCount,
-                'columns': [reader.GetName(i) for i in range(reader.FieldCount)]
-            }
+        with self._connection() as conn:
+            reader = self._open_reader_direct(conn, table_name)
+            try:
+                schema = TableSchema.resolve(reader, self.converter)
+                return {
+                    'field_count': reader.FieldCount,
+                    'columns': schema.names,
+                    'types': {column.name: column.type_name for column in schema.columns}
+                }
+            finally:
+                reader.Close()
@@ -0,0 +1,49 @@
+import struct
+from datetime import date
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+# Size of the fixed part of a DBF header
+DBF_HEADER_SIZE = 32
+
+
+class DBFHeader(NamedTuple):
+    """Fixed header of a DBF file."""
+    version: int
+    last_update: Optional[date]
+    record_count: int
+    header_length: int
+    record_length: int
+
+
+def read_dbf_header(path: str) -> DBFHeader:
+    """Read the fixed header of a DBF file.
+    
+    The header is not encrypted by ADS, so this works for encrypted tables
+    too and does not need the Advantage provider.
+    
+    Args:
+        path: Path to the .dbf file
+        
+    Returns:
+        DBFHeader with the record count and layout
+    """
+    with open(path, 'rb') as f:
+        data = f.read(DBF_HEADER_SIZE)
+    if len(data) < DBF_HEADER_SIZE:
+        raise ValueError(f"Not a DBF file (header too short): {path}")
+    
+    version, year, month, day, record_count, header_length, record_length = struct.unpack('<4BIHH', data[:12])
+    try:
+        last_update = date(1900 + year, month, day)
+    except ValueError:
+        last_update = None
+    return DBFHeader(version, last_update, record_count, header_length, record_length)
+
+
+def table_path(data_source: str, table_name: str) -> Path:
+    """Resolve the .dbf path of a table in a data source directory."""
+    path = Path(data_source) / table_name
+    if path.suffix == '':
+        path = path.with_suffix('.DBF')
+    return path
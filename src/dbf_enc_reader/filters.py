@@ -0,0 +1,424 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from ..utils.dates import parse_fecha
+
+# Comparison operators accepted by Compare, with their ADS spelling
+OPERATORS = {'=': '=', '==': '=', '<>': '<>', '!=': '<>', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+
+# .NET field types that hold numbers or dates in an ADS reader
+NUMERIC_TYPES = ('System.Decimal', 'System.Double', 'System.Single', 'System.Int16', 'System.Int32', 'System.Int64')
+DATE_TYPES = ('System.DateTime',)
+
+# IN lists longer than this are checked in Python instead of an OR chain
+DEFAULT_MAX_IN_VALUES = 50
+
+
+class FilterNode:
+    """Base class of the filter AST.
+
+    Nodes can be combined with & (And), | (Or) and ~ (Not).
+    """
+
+    def __and__(self, other: 'FilterNode') -> 'FilterNode':
+        return And(self, other)
+
+    def __or__(self, other: 'FilterNode') -> 'FilterNode':
+        return Or(self, other)
+
+    def __invert__(self) -> 'FilterNode':
+        return Not(self)
+
+    def fields(self) -> List[str]:
+        """Fields referenced by the node."""
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class Compare(FilterNode):
+    """field <op> value, with op one of OPERATORS."""
+    field: str
+    op: str
+    value: Any
+
+    def __post_init__(self):
+        if self.op not in OPERATORS:
+            raise ValueError(f"Unknown filter operator '{self.op}', expected one of {sorted(OPERATORS)}")
+
+    def fields(self) -> List[str]:
+        return [self.field]
+
+
+def Eq(field: str, value: Any) -> Compare:
+    """field = value."""
+    return Compare(field, '=', value)
+
+
+@dataclass(frozen=True)
+class Range(FilterNode):
+    """low <= field <= high; a None bound is open."""
+    field: str
+    low: Any = None
+    high: Any = None
+
+    def fields(self) -> List[str]:
+        return [self.field]
+
+
+@dataclass(frozen=True)
+class In(FilterNode):
+    """field is one of values."""
+    field: str
+    values: Tuple[Any, ...]
+
+    def __init__(self, field: str, values: Iterable[Any]):
+        object.__setattr__(self, 'field', field)
+        object.__setattr__(self, 'values', tuple(values))
+
+    def fields(self) -> List[str]:
+        return [self.field]
+
+
+@dataclass(frozen=True)
+class Predicate(FilterNode):
+    """Arbitrary Python test on one field, always evaluated after the read."""
+    field: str
+    func: Callable[[Any], bool]
+
+    def fields(self) -> List[str]:
+        return [self.field]
+
+
+class _Combine(FilterNode):
+    """Shared behaviour of And/Or: flattened children, value equality."""
+    __slots__ = ('children',)
+
+    def __init__(self, *children: FilterNode):
+        flat = []
+        for child in children:
+            flat.extend(child.children if type(child) is type(self) else [child])
+        self.children: Tuple[FilterNode, ...] = tuple(flat)
+
+    def fields(self) -> List[str]:
+        return [field for child in self.children for field in child.fields()]
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and other.children == self.children
+
+    def __hash__(self) -> int:
+        return hash((type(self).__name__, self.children))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(map(repr, self.children))})"
+
+
+class And(_Combine):
+    """All children match."""
+
+
+class Or(_Combine):
+    """Any child matches."""
+
+
+@dataclass(frozen=True)
+class Not(FilterNode):
+    """The child does not match."""
+    child: FilterNode
+
+    def fields(self) -> List[str]:
+        return self.child.fields()
+
+
+FilterSpec = Union[FilterNode, Sequence[Dict[str, Any]], None]
+
+
+@dataclass
+class CompiledFilter:
+    """A filter split into the part ADS evaluates and a Python residual.
+
+    expression is the AOF filter (None if nothing could be pushed down);
+    residual is the remaining condition, compiled into predicate, which
+    must hold for every record the reader returns.
+    """
+    expression: Optional[str] = None
+    residual: Optional[FilterNode] = None
+    predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+
+    def apply(self, records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the records of a batch that match the residual condition."""
+        if self.predicate is None:
+            return list(records)
+        predicate = self.predicate
+        return [record for record in records if predicate(record)]
+
+
+def as_filter(filters: FilterSpec) -> Optional[FilterNode]:
+    """Normalize a filter argument to an AST node.
+
+    Args:
+        filters: A FilterNode, a list of legacy filter dictionaries, or None
+
+    Returns:
+        Filter node, or None if there are no conditions
+    """
+    if filters is None or isinstance(filters, FilterNode):
+        return filters
+    return from_legacy(filters)
+
+
+def from_legacy(filters: Sequence[Dict[str, Any]]) -> Optional[FilterNode]:
+    """Convert legacy filter dictionaries to an AST node.
+
+    Conditions are OR-ed when all of them are on the same field and AND-ed
+    otherwise, as the reader always did. 'is_numeric' turns string values
+    into numbers and 'is_date' turns date strings (DBF_DATE_FORMAT, month
+    first, see utils/dates.py) into dates.
+
+    Args:
+        filters: Dictionaries with field, operator and value (or
+            from_value/to_value for operator 'range')
+
+    Returns:
+        Filter node, or None if there are no conditions
+    """
+    nodes: List[FilterNode] = []
+    for f in filters:
+        if f['operator'] == 'range':
+            nodes.append(Range(f['field'], _legacy_value(f, f['from_value']), _legacy_value(f, f['to_value'])))
+        elif f['operator'] == 'in':
+            nodes.append(In(f['field'], [_legacy_value(f, value) for value in f['value']]))
+        else:
+            nodes.append(Compare(f['field'], f['operator'], _legacy_value(f, f['value'])))
+
+    if not nodes:
+        return None
+    if len(nodes) == 1:
+        return nodes[0]
+    if all(f['field'] == filters[0]['field'] for f in filters):
+        return Or(*nodes)
+    return And(*nodes)
+
+
+def conjuncts(node: Optional[FilterNode]) -> List[FilterNode]:
+    """The AND-ed parts of a node."""
+    if node is None:
+        return []
+    return list(node.children) if isinstance(node, And) else [node]
+
+
+def combine(nodes: Sequence[FilterNode]) -> Optional[FilterNode]:
+    """AND a list of nodes back together, None if empty."""
+    if not nodes:
+        return None
+    return nodes[0] if len(nodes) == 1 else And(*nodes)
+
+
+def compile_filter(node: Optional[FilterNode], field_types: Optional[Dict[str, str]] = None,
+                   max_in_values: int = DEFAULT_MAX_IN_VALUES) -> CompiledFilter:
+    """Compile a filter into an ADS expression and a Python residual.
+
+    Literals are written for the field's type: numbers unquoted, logicals
+    as .T./.F., and dates compared by day through DTOS() so that ranges
+    sort correctly across months and years. The parts ADS cannot evaluate
+    efficiently (Python predicates, long IN lists, dates on fields not
+    stored as DateTime) are left to the residual. Under an AND only those
+    parts are left out; an OR or NOT that contains one stays whole in the
+    residual.
+
+    Args:
+        node: Filter to compile
+        field_types: .NET type name per field (case-insensitive); fields
+            not listed are written by the literal's Python type
+        max_in_values: Longest IN list turned into an OR chain
+
+    Returns:
+        CompiledFilter with the expression and the residual predicate
+    """
+    compiler = _ExpressionCompiler(field_types or {}, max_in_values)
+    pushed, residual = [], []
+    for part in conjuncts(node):
+        expression = compiler.compile(part)
+        if expression is None:
+            residual.append(part)
+        else:
+            pushed.append(expression)
+
+    if len(pushed) > 1:
+        pushed = [f"({expression})" if _needs_parens(expression) else expression for expression in pushed]
+    residual_node = combine(residual)
+    return CompiledFilter(
+        expression=" AND ".join(pushed) or None,
+        residual=residual_node,
+        predicate=compile_predicate(residual_node) if residual_node is not None else None
+    )
+
+
+def is_pushable(node: FilterNode, field_types: Optional[Dict[str, str]] = None,
+                max_in_values: int = DEFAULT_MAX_IN_VALUES) -> bool:
+    """Check whether ADS can evaluate a whole node."""
+    return _ExpressionCompiler(field_types or {}, max_in_values).compile(node) is not None
+
+
+def compile_predicate(node: FilterNode) -> Callable[[Dict[str, Any]], bool]:
+    """Generate a single Python function testing a record against a node.
+
+    Like the compiled mappings, the whole condition becomes one generated
+    expression, so testing a record costs no per-node function calls.
+    Records are keyed by column name as read; NULL never matches a
+    comparison.
+
+    Args:
+        node: Filter to test
+
+    Returns:
+        Function taking a record and returning True if it matches
+    """
+    namespace: Dict[str, Any] = {'_day': _day}
+    source = _PredicateCompiler(namespace).compile(node)
+    exec(compile(f"def _match(row):\n    return {source}\n", "<compiled filter>", "exec"), namespace)
+    return namespace['_match']
+
+
+class _ExpressionCompiler:
+    """Turn AST nodes into ADS expressions, None where not pushable."""
+
+    def __init__(self, field_types: Dict[str, str], max_in_values: int):
+        self.field_types = {name.upper(): type_name for name, type_name in field_types.items()}
+        self.max_in_values = max_in_values
+
+    def compile(self, node: FilterNode) -> Optional[str]:
+        if isinstance(node, Compare):
+            return self._compare(node.field, OPERATORS[node.op], node.value)
+        if isinstance(node, Range):
+            parts = []
+            if node.low is not None:
+                parts.append(self._compare(node.field, '>=', node.low))
+            if node.high is not None:
+                parts.append(self._compare(node.field, '<=', node.high))
+            if None in parts:
+                return None
+            return " AND ".join(parts) or '.T.'
+        if isinstance(node, In):
+            if not node.values:
+                return '.F.'
+            if len(node.values) > self.max_in_values:
+                return None
+            parts = [self._compare(node.field, '=', value) for value in node.values]
+            return None if None in parts else " OR ".join(parts)
+        if isinstance(node, (And, Or)):
+            parts = [self.compile(child) for child in node.children]
+            if None in parts:
+                return None
+            join_op = " AND " if isinstance(node, And) else " OR "
+            return join_op.join(f"({part})" if _needs_parens(part) else part for part in parts)
+        if isinstance(node, Not):
+            part = self.compile(node.child)
+            return None if part is None else f".NOT. ({part})"
+        return None
+
+    def _compare(self, field: str, op: str, value: Any) -> Optional[str]:
+        type_name = self.field_types.get(field.upper())
+        if value is None:
+            return f"EMPTY({field})" if op == '=' else (f".NOT. EMPTY({field})" if op == '<>' else None)
+        if isinstance(value, date):
+            # Dates on text fields cannot be compared reliably by ADS
+            if type_name is not None and type_name not in DATE_TYPES:
+                return None
+            return f"DTOS({field}) {op} '{value.strftime('%Y%m%d')}'"
+        if isinstance(value, bool):
+            return f"{field} {op} {'.T.' if value else '.F.'}"
+        if isinstance(value, (int, float, Decimal)) and type_name in (None,) + NUMERIC_TYPES:
+            return f"{field} {op} {value}"
+        return f"{field} {op} {_string_literal(str(value))}"
+
+
+class _PredicateCompiler:
+    """Turn AST nodes into Python expressions over a record named row."""
+
+    def __init__(self, namespace: Dict[str, Any]):
+        self.namespace = namespace
+
+    def compile(self, node: FilterNode) -> str:
+        if isinstance(node, Compare):
+            return self._compare(node.field, OPERATORS[node.op], node.value)
+        if isinstance(node, Range):
+            parts = []
+            if node.low is not None:
+                parts.append(self._compare(node.field, '>=', node.low))
+            if node.high is not None:
+                parts.append(self._compare(node.field, '<=', node.high))
+            return "(" + " and ".join(parts) + ")" if parts else "True"
+        if isinstance(node, In):
+            values = frozenset(_day(value) if isinstance(value, date) else value for value in node.values)
+            if any(isinstance(value, date) for value in node.values):
+                return f"(_day(row.get({node.field!r})) in {self._constant(values - {None})})"
+            return f"(row.get({node.field!r}) in {self._constant(values - {None})})"
+        if isinstance(node, Predicate):
+            return f"bool({self._constant(node.func)}(row.get({node.field!r})))"
+        if isinstance(node, (And, Or)):
+            join_op = " and " if isinstance(node, And) else " or "
+            return "(" + join_op.join(self.compile(child) for child in node.children) + ")"
+        if isinstance(node, Not):
+            return f"(not {self.compile(node.child)})"
+        raise TypeError(f"Unsupported filter node {node!r}")
+
+    def _compare(self, field: str, op: str, value: Any) -> str:
+        py_op = '==' if op == '=' else ('!=' if op == '<>' else op)
+        if value is None:
+            if op in ('=', '<>'):
+                return f"(row.get({field!r}) {'in' if op == '=' else 'not in'} (None, ''))"
+            return "False"
+        if isinstance(value, date):
+            return f"((_d := _day(row.get({field!r}))) is not None and _d {py_op} {self._constant(_day(value))})"
+        if isinstance(value, Decimal):
+            value = float(value)
+        return f"((_x := row.get({field!r})) is not None and _x {py_op} {self._constant(value)})"
+
+    def _constant(self, value: Any) -> str:
+        name = f"_v{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+
+def _day(value: Any) -> Optional[date]:
+    """Date part of a record value, parsing text dates; None if unknown."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        parsed = parse_fecha(value)
+        return parsed.date() if parsed else None
+    return None
+
+
+def _string_literal(text: str) -> str:
+    """Quote a string for an ADS expression."""
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    # Both quote characters: concatenate the pieces around the single quotes
+    return '+"\'"+'.join(f"'{piece}'" for piece in text.split("'"))
+
+
+def _needs_parens(expression: str) -> bool:
+    return " OR " in expression
+
+
+def _legacy_value(f: Dict[str, Any], value: Any) -> Any:
+    """Apply the is_numeric/is_date hints of a legacy filter to a value."""
+    if not isinstance(value, str):
+        return value
+    if f.get('is_numeric'):
+        try:
+            return float(value) if '.' in value else int(value)
+        except ValueError:
+            return value
+    if f.get('is_date'):
+        # Same parser as the residual's _day, so both read DBF_DATE_FORMAT
+        parsed = parse_fecha(value)
+        return parsed.date() if parsed else value
+    return value
@@ -0,0 +1,114 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from .core import Record
+
+# Sentinel for an exhausted input
+_END = object()
+
+
+def merge_join(headers: Iterable[Record], details: Iterable[Record], header_key: str, detail_key: str,
+               target: str = 'detalles') -> Iterator[Record]:
+    """Attach details to headers by streaming both inputs in key order.
+
+    Both inputs must be sorted ascending by their key. Only the details of
+    the current key are held in memory. Details without a header are
+    skipped, headers without details get an empty list and headers
+    sharing a key all get its details (as with hash_join).
+
+    Args:
+        headers: Header records sorted by header_key
+        details: Detail records sorted by detail_key
+        header_key: Key field of the headers
+        detail_key: Key field of the details
+        target: Header field that receives the list of details
+
+    Yields:
+        Headers with their details attached, in key order
+
+    Raises:
+        ValueError: If either input is not sorted by its key
+    """
+    # Order is checked as each detail is fetched, so one that sorts back
+    # behind the current header raises instead of being dropped
+    detail_iter = _check_sorted(details, detail_key)
+    detail = next(detail_iter, _END)
+    last_header_key = _END
+    matched: List[Record] = []
+
+    for header in headers:
+        key = header[header_key]
+        if last_header_key is not _END and key < last_header_key:
+            raise ValueError(f"merge_join headers are not sorted by {header_key}: {key} after {last_header_key}")
+        if last_header_key is not _END and key == last_header_key:
+            header[target] = matched
+            yield header
+            continue
+        last_header_key = key
+
+        # Skip orphan details that sort before this header
+        while detail is not _END and detail[detail_key] < key:
+            detail = next(detail_iter, _END)
+
+        matched = []
+        while detail is not _END and detail[detail_key] == key:
+            matched.append(detail)
+            detail = next(detail_iter, _END)
+
+        header[target] = matched
+        yield header
+
+
+def hash_join(headers: Iterable[Record], details: Iterable[Record], header_key: str, detail_key: str,
+              target: str = 'detalles') -> Iterator[Record]:
+    """Attach details to headers for inputs in any order.
+
+    The details are grouped by key in memory first, then the headers are
+    streamed. Use it when the inputs are not sorted, e.g. per batch of
+    headers.
+
+    Args:
+        headers: Header records
+        details: Detail records
+        header_key: Key field of the headers
+        detail_key: Key field of the details
+        target: Header field that receives the list of details
+
+    Yields:
+        Headers with their details attached, in header order
+    """
+    details_by_key = group_by_key(details, lambda detail: detail[detail_key])
+    for header in headers:
+        header[target] = details_by_key.get(header[header_key], [])
+        yield header
+
+
+def group_by_key(records: Iterable[Record], key: Callable[[Record], Any]) -> Dict[Any, List[Record]]:
+    """Group records into lists by key, keeping their order.
+
+    Args:
+        records: Records to group
+        key: Function returning the key of a record
+
+    Returns:
+        Dictionary mapping each key to its records
+    """
+    groups: Dict[Any, List[Record]] = {}
+    for record in records:
+        value = key(record)
+        group = groups.get(value)
+        if group is None:
+            groups[value] = [record]
+        else:
+            group.append(record)
+    return groups
+
+
+def _check_sorted(details: Iterable[Record], field: str) -> Iterator[Record]:
+    """Pass details through, raising if a key goes backwards."""
+    last_key = _END
+    for detail in details:
+        key = detail[field]
+        if last_key is not _END and key < last_key:
+            raise ValueError(f"merge_join details are not sorted by {field}: {key} after {last_key}")
+        last_key = key
+        yield detail
@@ -0,0 +1,184 @@
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .core import DBFReader, Record
+from .filters import In, Range
+
+# Lookup strategies, from cheapest for dense keys to cheapest for few keys
+STRATEGY_RANGE = 'range'
+STRATEGY_CHUNKED = 'chunked'
+STRATEGY_SEEK = 'seek'
+STRATEGIES = (STRATEGY_RANGE, STRATEGY_CHUNKED, STRATEGY_SEEK)
+
+
+@dataclass
+class LookupStats:
+    """Decision and timings of one KeyLookup run."""
+    strategy: str
+    keys: int
+    passes: int = 0  # Reader passes (range/chunked) or index seeks
+    rows_read: int = 0
+    rows_matched: int = 0
+    elapsed: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class KeyLookup:
+    """Fetch the records of a table whose key field is in a set of keys.
+
+    Instead of one huge OR filter, the strategy is chosen from the number
+    and density of the keys:
+
+    - range: one min..max filter plus an in-memory set probe, for dense keys
+    - seek: one index range per key on the key's CDX tag, for few keys
+    - chunked: OR filters of at most chunk_size keys, otherwise
+
+    The thresholds are plain attributes so they can be tuned, and the
+    decision and timings of the last run are kept in last_stats.
+    """
+
+    def __init__(self, reader: DBFReader, table_name: str, key_field: str, index_tag: Optional[str] = None,
+                 format_key: Callable[[Any], Any] = str, range_min_density: float = 0.25,
+                 seek_max_keys: int = 500, chunk_size: int = 50, strategy: Optional[str] = None):
+        """
+        Initialize the lookup.
+
+        Args:
+            reader: Reader for the table's data source
+            table_name: Name of the table to read
+            key_field: Field holding the key
+            index_tag: CDX tag on key_field, if any
+            format_key: Formats a key as stored in the table (e.g. zero padded)
+            range_min_density: Minimum keys/span ratio to use the range strategy
+            seek_max_keys: Maximum number of keys to use per-key index seeks
+            chunk_size: Keys per OR filter for the chunked strategy
+            strategy: Force a strategy instead of choosing one
+        """
+        if strategy is not None and strategy not in STRATEGIES:
+            raise ValueError(f"Unknown lookup strategy '{strategy}', expected one of {STRATEGIES}")
+        self.reader = reader
+        self.table_name = table_name
+        self.key_field = key_field
+        self.index_tag = index_tag
+        self.format_key = format_key
+        self.range_min_density = range_min_density
+        self.seek_max_keys = seek_max_keys
+        self.chunk_size = chunk_size
+        self.strategy = strategy
+        self.last_stats: Optional[LookupStats] = None
+
+    def choose_strategy(self, keys: Sequence[Any]) -> str:
+        """Pick the lookup strategy for a set of keys.
+
+        Args:
+            keys: Unique keys to look up
+
+        Returns:
+            One of STRATEGIES
+        """
+        if self.strategy:
+            return self.strategy
+
+        numeric = self._numeric_keys(keys)
+        if numeric:
+            span = max(numeric) - min(numeric) + 1
+            if len(numeric) / span >= self.range_min_density:
+                return STRATEGY_RANGE
+
+        if (self.index_tag and len(keys) <= self.seek_max_keys
+                and self.reader.has_index(self.table_name, self.index_tag)):
+            return STRATEGY_SEEK
+        return STRATEGY_CHUNKED
+
+    def iter_records(self, keys: Iterable[Any], columns: Optional[Sequence[str]] = None) -> Iterator[Record]:
+        """Yield the raw records whose key is in keys.
+
+        Args:
+            keys: Keys to look up, in any format accepted by format_key
+            columns: Optional projection, only these columns are read
+
+        Yields:
+            Raw records as dictionaries
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        strategy = self.choose_strategy(unique_keys) if unique_keys else STRATEGY_CHUNKED
+        stats = LookupStats(strategy=strategy, keys=len(unique_keys))
+        self.last_stats = stats
+        if not unique_keys:
+            return
+
+        if strategy == STRATEGY_RANGE:
+            records = self._iter_range(unique_keys, columns, stats)
+        elif strategy == STRATEGY_SEEK:
+            records = self._iter_seek(unique_keys, columns, stats)
+        else:
+            records = self._iter_chunked(unique_keys, columns, stats)
+
+        start = time.perf_counter()
+        try:
+            for record in records:
+                stats.rows_matched += 1
+                yield record
+        finally:
+            stats.elapsed += time.perf_counter() - start
+
+    def _iter_range(self, keys: List[Any], columns: Optional[Sequence[str]], stats: LookupStats) -> Iterator[Record]:
+        """One min..max filter pass, keeping only the wanted keys."""
+        ordered = sorted(keys, key=lambda key: self._as_number(key))
+        wanted = {self.format_key(key) for key in keys}
+        key_filter = Range(self.key_field, self.format_key(ordered[0]), self.format_key(ordered[-1]))
+        projection = self._with_key(columns)
+        format_key = self.format_key
+        key_field = self.key_field
+
+        stats.passes += 1
+        for record in self.reader.iter_records(self.table_name, 0, key_filter, projection):
+            stats.rows_read += 1
+            if format_key(record[key_field]) in wanted:
+                yield record
+
+    def _iter_chunked(self, keys: List[Any], columns: Optional[Sequence[str]], stats: LookupStats) -> Iterator[Record]:
+        """IN filters (OR chains in ADS) over chunks of at most chunk_size keys."""
+        for i in range(0, len(keys), self.chunk_size):
+            # Keys stay strings to preserve leading zeros
+            key_filter = In(self.key_field, [self.format_key(key) for key in keys[i:i + self.chunk_size]])
+            
+            stats.passes += 1
+            for record in self.reader.iter_records(self.table_name, 0, key_filter, columns):
+                stats.rows_read += 1
+                yield record
+
+    def _iter_seek(self, keys: List[Any], columns: Optional[Sequence[str]], stats: LookupStats) -> Iterator[Record]:
+        """One index range per key on the key's CDX tag."""
+        formatted = [self.format_key(key) for key in keys]
+        stats.passes += len(formatted)
+        ranges = ((key, key) for key in formatted)
+        for record in self.reader.iter_index_ranges(self.table_name, self.index_tag, ranges, columns):
+            stats.rows_read += 1
+            yield record
+
+    def _with_key(self, columns: Optional[Sequence[str]]) -> Optional[List[str]]:
+        """Make sure the projection includes the key field for probing."""
+        if columns is None:
+            return None
+        if any(column.upper() == self.key_field.upper() for column in columns):
+            return list(columns)
+        return list(columns) + [self.key_field]
+
+    @staticmethod
+    def _as_number(key: Any) -> Any:
+        try:
+            return int(key)
+        except (ValueError, TypeError):
+            return key
+
+    @classmethod
+    def _numeric_keys(cls, keys: Sequence[Any]) -> Optional[List[int]]:
+        """Keys as integers, or None if any key is not numeric."""
+        numeric = [cls._as_number(key) for key in keys]
+        if all(isinstance(key, int) for key in numeric):
+            return numeric
+        return None
@@ -1,6 +1,207 @@
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .column_batch import ColumnBatch, to_number_column, to_string_column
+
+
+def _to_number(value: Any) -> Any:
+    """Convert a raw DBF value to int or float, falling back to 0."""
+    value_type = type(value)
+    if value_type is int or value_type is float:
+        return value
+    try:
+        if value_type is str:
+            return float(value) if '.' in value else int(value)
+        return float(value) if '.' in str(value) else int(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _to_string(value: Any) -> str:
+    """Convert a typed DBF value to string; NULL becomes an empty string.
+    
+    Dates are rendered as 'YYYY-MM-DD HH:MM:SS'.
+    """
+    if type(value) is str:
+        return value
+    if value is None:
+        return ''
+    return str(value)
+
+
+# Converter callable for each mapping 'type' in mappings.json
+FIELD_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'number': _to_number,
+    'string': _to_string,
+}
+
+
+def _compile_row_function(fields: Sequence[Tuple[str, Any, Callable[[Any], Any]]], as_tuple: bool) -> Callable:
+    """Generate a specialized transform function for a list of fields.
+    
+    The generated code indexes the row with literal keys/ordinals and calls
+    each converter directly; string fields only call theirs for non-str values.
+    
+    Args:
+        fields: (output key, row key or ordinal, converter) per mapped field
+        as_tuple: Build a tuple instead of a dictionary
+        
+    Returns:
+        Function taking a row and returning the transformed value
+    """
+    namespace: Dict[str, Any] = {}
+    values = []
+    for i, (_, source, convert) in enumerate(fields):
+        if convert is _to_string:
+            # Only call the converter for the rare non-str value
+            values.append(f"(_s if (_s := row[{source!r}]).__class__ is str else _to_string(_s))")
+            namespace['_to_string'] = _to_string
+        else:
+            namespace[f"_convert{i}"] = convert
+            values.append(f"_convert{i}(row[{source!r}])")
+    
+    if as_tuple:
+        body = "(" + "".join(f"{value}, " for value in values) + ")"
+    else:
+        body = "{" + ", ".join(f"{key!r}: {value}" for (key, _, _), value in zip(fields, values)) + "}"
+    
+    source_code = f"def _transform(row):\n    return {body}\n"
+    exec(compile(source_code, "<compiled mapping>", "exec"), namespace)
+    return namespace['_transform']
+
+
+class CompiledMapping:
+    """Field mappings of one DBF table compiled into a reusable transformer.
+    
+    Source field names, output keys and per-type converters are resolved
+    once, so transforming a record is a single pass without any lookups
+    into the mapping configuration.
+    """
+
+    def __init__(self, field_mappings: Dict[str, Dict[str, str]]):
+        """Compile the field mappings of a table.
+        
+        Args:
+            field_mappings: Field mappings as returned by MappingManager.get_field_mappings
+        """
+        self.source_fields: Tuple[str, ...] = tuple(m['dbf'] for m in field_mappings.values())
+        self.output_keys: Tuple[str, ...] = tuple(m['velneo_table'] for m in field_mappings.values())
+        self.types: Tuple[str, ...] = tuple(m.get('type', 'string') for m in field_mappings.values())
+        self.converters: Tuple[Callable[[Any], Any], ...] = tuple(
+            FIELD_CONVERTERS.get(field_type, _to_string) for field_type in self.types
+        )
+        self._fields = tuple(zip(self.output_keys, self.source_fields, self.converters))
+        self._transform = _compile_row_function(self._fields, as_tuple=False)
+        self._transform_tuple = _compile_row_function(self._fields, as_tuple=True)
+
+    def transform(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Transform a raw record into a dictionary keyed by output field.
+        
+        Source fields missing from the record are left out of the result.
+        
+        Args:
+            record: Raw record from DBF
+            
+        Returns:
+            Transformed record with mapped field names and types
+        """
+        try:
+            return self._transform(record)
+        except KeyError:
+            return {key: convert(record[field]) for key, field, convert in self._fields if field in record}
+
+    def transform_tuple(self, record: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Transform a raw record into a tuple ordered like output_keys.
+        
+        Args:
+            record: Raw record from DBF
+            
+        Returns:
+            Tuple of converted values, None for missing source fields
+        """
+        try:
+            return self._transform_tuple(record)
+        except KeyError:
+            return tuple(convert(record[field]) if field in record else None for _, field, convert in self._fields)
+
+    def transform_columns(self, records: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        """Transform raw records into one list per output field.
+        
+        Args:
+            records: Raw records from DBF
+            
+        Returns:
+            Dictionary mapping each output key to its column of values
+        """
+        rows = list(map(self.transform_tuple, records))
+        if not rows:
+            return {key: [] for key in self.output_keys}
+        return {key: list(column) for key, column in zip(self.output_keys, zip(*rows))}
+
+    def transform_column_batch(self, batch: ColumnBatch) -> ColumnBatch:
+        """Transform a ColumnBatch column by column.
+        
+        Numbers are parsed and strings rendered on whole arrays, with the
+        same results as transform(); unparseable numbers become 0 and are
+        flagged in the result's invalid masks. Source fields missing from
+        the batch are left out.
+        
+        Args:
+            batch: Raw records as returned by DBFReader.iter_column_batches
+            
+        Returns:
+            ColumnBatch keyed by output field
+        """
+        columns, invalid = {}, {}
+        for key, field, field_type in zip(self.output_keys, self.source_fields, self.types):
+            if not batch._has(field):
+                continue
+            values, nulls = batch.column(field), batch.nulls.get(batch._name(field))
+            if field_type == 'number':
+                columns[key], invalid[key] = to_number_column(values, nulls)
+            else:
+                columns[key] = to_string_column(values, nulls)
+        return ColumnBatch(columns, invalid=invalid, length=len(batch))
+
+    def bind(self, columns: Sequence[str]) -> 'BoundMapping':
+        """Bind the mapping to a fixed column order of positional rows.
+        
+        Args:
+            columns: Column names of the rows, in order
+            
+        Returns:
+            BoundMapping working on rows by precomputed ordinal
+        """
+        return BoundMapping(self, columns)
+
+
+class BoundMapping:
+    """CompiledMapping resolved to source ordinals of a known column layout.
+    
+    ``transform(row)`` returns a dictionary and ``transform_tuple(row)`` a
+    tuple ordered like ``output_keys``; mapped fields that are not in the
+    column layout are skipped.
+    """
+
+    def __init__(self, mapping: CompiledMapping, columns: Sequence[str]):
+        """Resolve the source ordinal of every mapped field.
+        
+        Args:
+            mapping: Compiled mapping of the table
+            columns: Column names of the rows, in order
+        """
+        positions = {name: i for i, name in enumerate(columns)}
+        fields = [
+            (key, positions[field], convert)
+            for key, field, convert in zip(mapping.output_keys, mapping.source_fields, mapping.converters)
+            if field in positions
+        ]
+        self.output_keys: Tuple[str, ...] = tuple(key for key, _, _ in fields)
+        self.ordinals: Tuple[int, ...] = tuple(ordinal for _, ordinal, _ in fields)
+        self.transform: Callable[[Sequence[Any]], Dict[str, Any]] = _compile_row_function(fields, as_tuple=False)
+        self.transform_tuple: Callable[[Sequence[Any]], Tuple[Any, ...]] = _compile_row_function(fields, as_tuple=True)
+
 
 class MappingManager:
     def __init__(self, mapping_file_path: str):
@@ -11,6 +212,7 @@ class MappingManager:
         """
         self.mapping_file_path = Path(mapping_file_path)
         self.mappings: Dict[str, Any] = {}
+        self._compiled: Dict[str, CompiledMapping] = {}
         self.load_mappings()
 
     def load_mappings(self) -> None:
@@ -18,6 +220,7 @@ class MappingManager:
         try:
             with open(self.mapping_file_path, 'r', encoding='utf-8') as f:
                 self.mappings = json.load(f)
+            self._compiled = {}
         except FileNotFoundError:
             raise FileNotFoundError(f"Mapping file not found at {self.mapping_file_path}")
         except json.JSONDecodeError:
@@ -46,6 +249,21 @@ class MappingManager:
         dbf_config = self.get_dbf_mappings(dbf_name)
         return dbf_config.get('target_table') if dbf_config else None
 
+    def get_key_fields(self, dbf_name: str) -> List[str]:
+        """Get the output fields identifying a record in the target table.
+        
+        Args:
+            dbf_name: Name of the DBF file
+            
+        Returns:
+            Output keys from the table's optional 'key' entry (a name or a list), or []
+        """
+        dbf_config = self.get_dbf_mappings(dbf_name)
+        key = dbf_config.get('key') if dbf_config else None
+        if key is None:
+            return []
+        return [key] if isinstance(key, str) else list(key)
+
     def get_field_mappings(self, dbf_name: str) -> Dict[str, Dict[str, str]]:
         """Get all field mappings for a DBF file.
         
@@ -58,6 +276,46 @@ class MappingManager:
         dbf_config = self.get_dbf_mappings(dbf_name)
         return dbf_config.get('fields', {}) if dbf_config else {}
 
+    def get_source_fields(self, dbf_name: str) -> List[str]:
+        """Get the DBF columns a table's mappings read.
+        
+        Args:
+            dbf_name: Name of the DBF file
+            
+        Returns:
+            Unique 'dbf' field names in mapping order, usable as a projection
+        """
+        return list(dict.fromkeys(self.compile(dbf_name).source_fields))
+
+    def get_output_schema(self, dbf_name: str) -> List[Tuple[str, str]]:
+        """Get the output fields of a table with their mapping type.
+        
+        Args:
+            dbf_name: Name of the DBF file
+            
+        Returns:
+            (output key, 'string' or 'number') pairs in mapping order
+        """
+        plan = self.compile(dbf_name)
+        return list(zip(plan.output_keys, plan.types))
+
+    def compile(self, dbf_name: str) -> CompiledMapping:
+        """Get the compiled transformer for a DBF file.
+        
+        The plan is built on first use and cached until mappings are reloaded.
+        
+        Args:
+            dbf_name: Name of the DBF file
+            
+        Returns:
+            CompiledMapping for the table's field mappings
+        """
+        compiled = self._compiled.get(dbf_name)
+        if compiled is None:
+            compiled = CompiledMapping(self.get_field_mappings(dbf_name))
+            self._compiled[dbf_name] = compiled
+        return compiled
+
 # Usage example:
 if __name__ == "__main__":
     mapper = MappingManager("mappings.json")
@@ -0,0 +1,650 @@
+import mmap
+import struct
+import time
+from itertools import islice
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cdx import JULIAN_OFFSET, KEY_UPPER, CDXIndex, CDXTag
+from .column_batch import ColumnBatch, decode_rows, filter_mask, read_rows
+from .core import DEFAULT_BATCH_SIZE, DBFReader, Record
+from .dbf_file import DBF_HEADER_SIZE, table_path
+from .filters import Compare, FilterNode, FilterSpec, Range, as_filter, combine, compile_predicate, conjuncts
+from .parallel import RECNO_FIELD
+from .planner import ACCESS_INDEX_RANGE, AccessPath
+
+# .NET type the ADS provider reports for each DBF field type
+DOTNET_TYPES = {
+    'C': 'System.String', 'V': 'System.String', 'M': 'System.String',
+    'N': 'System.Decimal', 'F': 'System.Decimal', 'Y': 'System.Decimal',
+    'D': 'System.DateTime', 'T': 'System.DateTime', 'L': 'System.Boolean',
+    'I': 'System.Int32', 'B': 'System.Double',
+    'G': 'System.Byte[]', 'W': 'System.Byte[]', 'Q': 'System.Byte[]',
+}
+
+# Code page of each language driver id in the header; 0 means unmarked
+CODE_PAGES = {
+    0x01: 'cp437', 0x02: 'cp850', 0x03: 'cp1252', 0x57: 'cp1252', 0x64: 'cp852', 0x65: 'cp866',
+    0x7D: 'cp1255', 0x7E: 'cp1256', 0xC8: 'cp1250', 0xC9: 'cp1251', 0xCA: 'cp1254', 0xCB: 'cp1253',
+}
+DEFAULT_ENCODING = 'cp1252'
+
+# Field descriptor flag of nullable fields (Visual FoxPro)
+NULLABLE_FLAG = 0x02
+
+# Field types whose "not full" length uses a bit of the null flags
+VARIABLE_TYPES = ('V', 'Q')
+
+_TRUE = frozenset(b'TtYy')
+_FALSE = frozenset(b'FfNn')
+
+
+class DBFField(NamedTuple):
+    """A column of a DBF table and where it sits in a record."""
+    name: str
+    type: str
+    offset: int
+    length: int
+    decimals: int
+    null_bit: Optional[int]
+
+
+class RecordDecoder(NamedTuple):
+    """Functions reading a projection of a table's records.
+
+    unpack(buffer, offset) returns the deletion flag followed by the raw
+    bytes of the needed fields, without copying the record; convert(values)
+    turns them into a record.
+    """
+    names: List[str]
+    unpack: Callable[[Any, int], Tuple[bytes, ...]]
+    convert: Callable[[Tuple[bytes, ...]], Record]
+
+
+class DBFTable:
+    """A .dbf file mapped into memory, with its header parsed once.
+
+    Records are fixed-width slots after the header, so record n is read
+    straight from the mapped file at header_length + (n - 1) *
+    record_length. Memo fields are read from the .fpt (or .dbt) file next
+    to the table, and the .cdx index is opened on request.
+    """
+
+    def __init__(self, path: str, encoding: Optional[str] = None):
+        """
+        Open and map the table.
+
+        Args:
+            path: Path to the .dbf file
+            encoding: Code page of character fields, from the header's
+                language driver if None
+
+        Raises:
+            ValueError: If the file is not a DBF table
+            RuntimeError: If the table is flagged as encrypted
+        """
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._memo: Optional[_MemoFile] = None
+        try:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a DBF file (empty): {path}")
+        try:
+            self._parse_header(encoding)
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_header(self, encoding: Optional[str]) -> None:
+        data = self.buffer
+        if len(data) < DBF_HEADER_SIZE:
+            raise ValueError(f"Not a DBF file (header too short): {self.path}")
+        self.version = data[0]
+        record_count, self.header_length, self.record_length = struct.unpack_from('<IHH', data, 4)
+        if data[15]:
+            raise RuntimeError(f"{self.path.name} is encrypted; read it with the ADS backend")
+        self.encoding = encoding or CODE_PAGES.get(data[29], DEFAULT_ENCODING)
+        # Records still being appended (or a stale header) must not be read past the file end
+        self.record_count = min(record_count, max(0, (len(data) - self.header_length) // max(self.record_length, 1)))
+
+        fields = []
+        self.null_flags: Optional[DBFField] = None
+        offset = 1
+        null_bit = 0
+        position = DBF_HEADER_SIZE
+        while position + 32 <= self.header_length and data[position] != 0x0D:
+            raw_name, raw_type, length, decimals, flags = struct.unpack_from('<11sc4xBBB', data, position)
+            name = raw_name.split(b'\0', 1)[0].decode('ascii', 'replace').strip()
+            field_type = raw_type.decode('ascii', 'replace').upper()
+            if field_type == '0':
+                self.null_flags = DBFField(name, field_type, offset, length, decimals, None)
+            else:
+                if field_type in VARIABLE_TYPES:
+                    null_bit += 1
+                bit = None
+                if flags & NULLABLE_FLAG:
+                    bit = null_bit
+                    null_bit += 1
+                fields.append(DBFField(name, field_type, offset, length, decimals, bit))
+            offset += length
+            position += 32
+        if offset > self.record_length:
+            raise ValueError(f"Not a DBF file (fields exceed the record length): {self.path}")
+        self.fields = fields
+        self._by_name = {field.name.upper(): field for field in fields}
+
+    def close(self) -> None:
+        if self._memo is not None:
+            self._memo.close()
+            self._memo = None
+        self.buffer.close()
+        self._file.close()
+
+    def __enter__(self) -> 'DBFTable':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def field(self, name: str) -> Optional[DBFField]:
+        """Field by name (case-insensitive)."""
+        return self._by_name.get(name.upper())
+
+    def field_types(self) -> Dict[str, Tuple[str, int]]:
+        """(DBF type, length) per field name."""
+        return {field.name: (field.type, field.length) for field in self.fields}
+
+    def open_index(self) -> Optional[CDXIndex]:
+        """Open the table's structural .cdx index, None if there is none."""
+        path = _companion(self.path, '.cdx')
+        if path is None:
+            return None
+        return CDXIndex(str(path), self.field_types(), self.encoding)
+
+    def decoder(self, columns: Optional[Sequence[str]] = None) -> RecordDecoder:
+        """Build the functions reading a projection of the records.
+
+        Args:
+            columns: Columns to read, in this order; all if None. Names not
+                present in the table are ignored.
+
+        Returns:
+            RecordDecoder for the projection
+        """
+        if columns is None:
+            selected = list(self.fields)
+        else:
+            selected = [self._by_name[name.upper()] for name in columns if name.upper() in self._by_name]
+        needs_nulls = self.null_flags is not None and any(field.null_bit is not None for field in selected)
+
+        # One struct reads the deletion flag and every needed field, skipping the others
+        layout = sorted({field.offset: field for field in selected + ([self.null_flags] if needs_nulls else [])}.values(),
+                        key=lambda field: field.offset)
+        fmt = ['<c']
+        position = 1
+        for field in layout:
+            if field.offset > position:
+                fmt.append(f'{field.offset - position}x')
+            fmt.append(f'{field.length}s')
+            position = field.offset + field.length
+        slot = {field.offset: i + 1 for i, field in enumerate(layout)}
+        unpack = struct.Struct(''.join(fmt)).unpack_from
+
+        plan = [(field.name, slot[field.offset], self._converter(field), field.null_bit) for field in selected]
+        if needs_nulls:
+            nulls_slot = slot[self.null_flags.offset]
+
+            def convert(values: Tuple[bytes, ...]) -> Record:
+                nulls = int.from_bytes(values[nulls_slot], 'little')
+                return {name: None if bit is not None and nulls >> bit & 1 else to_python(values[i])
+                        for name, i, to_python, bit in plan}
+        else:
+            pairs = [(name, i, to_python) for name, i, to_python, _ in plan]
+
+            def convert(values: Tuple[bytes, ...]) -> Record:
+                return {name: to_python(values[i]) for name, i, to_python in pairs}
+
+        return RecordDecoder([field.name for field in selected], unpack, convert)
+
+    def _converter(self, field: DBFField) -> Callable[[bytes], Any]:
+        """Conversion of a field's stored bytes to the value the ADS reader returns."""
+        encoding = self.encoding
+        field_type = field.type
+        if field_type in ('C', 'V'):
+            return lambda raw: raw.decode(encoding).strip(' \0')
+        if field_type in ('N', 'F'):
+            return _to_number
+        if field_type == 'D':
+            return _to_date
+        if field_type == 'L':
+            return _to_logical
+        if field_type == 'I':
+            return lambda raw: struct.unpack('<i', raw)[0]
+        if field_type == 'B':
+            return lambda raw: struct.unpack('<d', raw)[0]
+        if field_type == 'Y':
+            return lambda raw: struct.unpack('<q', raw)[0] / 10000
+        if field_type == 'T':
+            return _to_datetime
+        if field_type in ('M', 'G', 'W'):
+            binary = field_type != 'M'
+            return lambda raw: self._read_memo(raw, binary)
+        if field_type == 'Q':
+            return bytes
+        return lambda raw: raw.decode(encoding, 'replace').strip()
+
+    def _read_memo(self, raw: bytes, binary: bool) -> Any:
+        block = int.from_bytes(raw, 'little') if len(raw) == 4 else int(raw.strip() or 0)
+        if block == 0:
+            return b'' if binary else ''
+        if self._memo is None:
+            path = _companion(self.path, '.fpt') or _companion(self.path, '.dbt')
+            if path is None:
+                raise RuntimeError(f"Memo file of {self.path.name} not found")
+            self._memo = _MemoFile(path)
+        data = self._memo.read(block)
+        return data if binary else data.decode(self.encoding).strip()
+
+
+class _MemoFile:
+    """Blocks of a FoxPro .fpt or dBase .dbt memo file."""
+
+    def __init__(self, path: Path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.fox = path.suffix.lower() == '.fpt'
+        self.block_size = struct.unpack_from('>H', self._map, 6)[0] if self.fox else 512
+        if not self.fox and self._map[0x14:0x16] != b'\0\0':
+            self.block_size = struct.unpack_from('<H', self._map, 0x14)[0] or 512
+
+    def read(self, block: int) -> bytes:
+        start = block * self.block_size
+        if self.fox:
+            _, length = struct.unpack_from('>II', self._map, start)
+            return self._map[start + 8:start + 8 + length]
+        if self._map[start:start + 4] == b'\xff\xff\x08\x00':  # dBase IV block header
+            length = struct.unpack_from('<I', self._map, start + 4)[0]
+            return self._map[start + 8:start + length]
+        end = self._map.find(b'\x1a\x1a', start)
+        return self._map[start:end if end >= 0 else len(self._map)]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class NativeDBFReader(DBFReader):
+    """DBFReader decoding .dbf and .cdx files in Python, without ADS.
+
+    For unencrypted tables and copies: works on any platform and never
+    crosses into .NET. Filters are evaluated in Python; a closed range or
+    equality on a field with a usable CDX tag (and order_by) walks the
+    index instead of the whole table. Deleted records are skipped.
+    Connections, AOF filters and max_in_values do not apply.
+    """
+
+    def __init__(self, data_source: str, encryption_password: Optional[str] = None, pool=None,
+                 encoding: Optional[str] = None):
+        """
+        Initialize the reader.
+
+        Args:
+            data_source: Directory holding the tables
+            encryption_password: Unused, encrypted tables need the ADS backend
+            pool: Unused, kept for the DBFReader signature
+            encoding: Code page of character fields, from each table's
+                header if None
+        """
+        super().__init__(data_source, encryption_password, pool)
+        self.encoding = encoding
+
+    def _iter_records(self, table_name: str, limit: Optional[int], filters: FilterSpec,
+                      columns: Optional[Sequence[str]], order_by: Optional[str]) -> Iterator[Record]:
+        """Decode records from the mapped table, see DBFReader.iter_records."""
+        start = time.perf_counter_ns()
+        table = self._open_table(table_name)
+        index = None
+        try:
+            node = as_filter(filters)
+            recnos, node, index = self._plan_scan(table, table_name, node, order_by)
+            predicate = compile_predicate(node) if node is not None else None
+
+            # The filter needs its fields even if they are not projected
+            extra = set()
+            if predicate is not None and columns is not None:
+                extra = {field.upper() for field in node.fields()} - {name.upper() for name in columns}
+            decoder = table.decoder(list(columns) + sorted(extra) if extra else columns)
+            extra = [name for name in decoder.names if name.upper() in extra]
+            self._add_metrics('filter_setup', time.perf_counter_ns() - start)
+
+            yield from self._scan(table, recnos, decoder, predicate, extra, limit)
+        finally:
+            if index is not None:
+                index.close()
+            table.close()
+
+    def iter_column_batches(self, table_name: str, batch_size: int = DEFAULT_BATCH_SIZE, limit: Optional[int] = None,
+                            filters: FilterSpec = None, columns: Optional[Sequence[str]] = None,
+                            order_by: Optional[str] = None) -> Iterator[ColumnBatch]:
+        """Yield blocks of records decoded column by column with NumPy.
+        
+        Each block of batch_size record numbers is copied out of the map
+        in one go, deleted records are dropped and every column is decoded
+        and filtered as a whole; see DBFReader.iter_column_batches.
+        """
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be greater than 0, got {batch_size}")
+        clock = time.perf_counter_ns
+        start = clock()
+        table = self._open_table(table_name)
+        index = None
+        try:
+            recnos, node, index = self._plan_scan(table, table_name, as_filter(filters), order_by)
+            names = None if columns is None else list(columns)
+            if node is not None and names is not None:
+                wanted = {name.upper() for name in names}
+                names += [field for field in dict.fromkeys(node.fields()) if field.upper() not in wanted]
+            self._add_metrics('filter_setup', clock() - start)
+            
+            count = 0
+            for block in _blocks(recnos, batch_size):
+                start = clock()
+                rows, _ = read_rows(table, block)
+                decoded = clock()
+                self._add_metrics('read', decoded - start, len(block), len(block) * table.record_length)
+                batch = decode_rows(table, rows, names)
+                if node is not None:
+                    batch = batch.take(filter_mask(node, batch))
+                    if columns is not None:
+                        batch = batch.select(columns)
+                if limit:
+                    batch = batch.head(limit - count)
+                self._add_metrics('convert', clock() - decoded, len(rows))
+                if len(batch):
+                    count += len(batch)
+                    yield batch
+                if limit and count >= limit:
+                    break
+        finally:
+            if index is not None:
+                index.close()
+            table.close()
+
+    def iter_index_ranges(self, table_name: str, index_tag: str, ranges: Iterable[Tuple[Any, Any]],
+                          columns: Optional[Sequence[str]] = None) -> Iterator[Record]:
+        """Yield the records of several key ranges of a CDX tag, see DBFReader.iter_index_ranges."""
+        table = self._open_table(table_name)
+        index = table.open_index()
+        try:
+            tag = self._seekable_tag(table, index, index_tag)
+
+            def recnos() -> Iterator[int]:
+                for low, high in ranges:
+                    yield from index.iter_recnos(tag, index.encode_key(tag, low), index.encode_key(tag, high))
+
+            yield from self._scan(table, recnos(), table.decoder(columns), None, [], None)
+        finally:
+            if index is not None:
+                index.close()
+            table.close()
+
+    def get_record_count(self, table_name: str) -> int:
+        """Get the number of records in a table, including deleted ones."""
+        with self._open_table(table_name) as table:
+            return table.record_count
+
+    def get_index_tags(self, table_name: str) -> List[str]:
+        """Find the CDX tags of a table that this reader can seek and walk.
+
+        Returns:
+            Names of the usable tags, as stored in the index
+        """
+        key = table_name.upper()
+        if key not in self._index_tags:
+            with self._open_table(table_name) as table:
+                index = table.open_index()
+                tags = []
+                if index is not None:
+                    with index:
+                        tags = [tag.name for tag in index.tags.values() if tag.seekable]
+            self._index_tags[key] = tags
+            for tag in tags:
+                self._index_cache[(key, tag.upper())] = True
+        return self._index_tags[key]
+
+    def has_index(self, table_name: str, index_tag: str) -> bool:
+        """Check whether a table has a usable CDX tag."""
+        return index_tag.upper() in {tag.upper() for tag in self.get_index_tags(table_name)}
+
+    def get_table_info(self, table_name: str) -> Dict[str, Any]:
+        """Get information about table structure, with ADS type names."""
+        with self._open_table(table_name) as table:
+            return {
+                'field_count': len(table.fields),
+                'columns': [field.name for field in table.fields],
+                'types': {field.name: DOTNET_TYPES.get(field.type, 'System.Object') for field in table.fields}
+            }
+
+    def _open_table(self, table_name: str) -> DBFTable:
+        path = table_path(self.data_source, table_name)
+        if not path.exists():
+            # File names differ in case on case-sensitive file systems
+            path = _find_case_insensitive(path) or path
+        return DBFTable(str(path), self.encoding)
+
+    def _plan_scan(self, table: DBFTable, table_name: str, node: Optional[FilterNode],
+                   order_by: Optional[str]) -> Tuple[Iterable[int], Optional[FilterNode], Optional[CDXIndex]]:
+        """Choose the record numbers to visit and what is left to check per record.
+
+        RECNO() ranges (see ParallelScan) bound the scan and are dropped
+        from the filter. The other conditions are all checked per record,
+        even when an index range already narrows the scan to them.
+
+        Returns:
+            Record numbers, the filter still to apply and the open index
+            (to close once the scan is done), if one is used
+        """
+        first, last = 1, table.record_count
+        rest = []
+        for part in conjuncts(node):
+            if isinstance(part, Range) and part.field.upper() == RECNO_FIELD:
+                first = max(first, int(part.low)) if part.low is not None else first
+                last = min(last, int(part.high)) if part.high is not None else last
+            else:
+                rest.append(part)
+        node = combine(rest)
+
+        access_path = AccessPath(table_name)
+        self.last_access_path = access_path
+        self.access_paths[table_name] = access_path
+        if node is not None:
+            access_path.residual = repr(node)
+        if not order_by and (node is None or not self.use_indexes):
+            return range(first, last + 1), node, None
+
+        index = table.open_index()
+        try:
+            if order_by:
+                tag = self._seekable_tag(table, index, order_by)
+                bounds = self._key_bounds(rest, tag.field, closed=False)
+            else:
+                tag, bounds = self._find_range_tag(index, rest)
+            if tag is None:
+                if index is not None:
+                    index.close()
+                return range(first, last + 1), node, None
+
+            low, high = bounds or (None, None)
+            try:
+                low_key = index.encode_key(tag, low) if low is not None else None
+                high_key = index.encode_key(tag, high) if high is not None else None
+            except ValueError:
+                # Values of another type than the key: scan (in tag order if required)
+                if not order_by:
+                    index.close()
+                    return range(first, last + 1), node, None
+                low = high = low_key = high_key = None
+            access_path.index = tag.name
+            if low_key is not None or high_key is not None:
+                access_path.mode = ACCESS_INDEX_RANGE
+                access_path.low, access_path.high = low, high
+            recnos = index.iter_recnos(tag, low_key, high_key)
+            if first > 1 or last < table.record_count:
+                recnos = (recno for recno in recnos if first <= recno <= last)
+            return recnos, node, index
+        except Exception:
+            if index is not None:
+                index.close()
+            raise
+
+    def _find_range_tag(self, index: Optional[CDXIndex], parts: List[FilterNode]) -> Tuple[Optional[CDXTag], Any]:
+        """First closed range or equality that a seekable tag can serve."""
+        if index is None:
+            return None, None
+        for part in parts:
+            if not isinstance(part, (Range, Compare)):
+                continue
+            for tag in index.tags.values():
+                # Case-insensitive tags do not bound case-sensitive conditions
+                if tag.seekable and tag.kind != KEY_UPPER and tag.field == part.field.upper():
+                    bounds = self._key_bounds([part], tag.field, closed=True)
+                    if bounds is not None:
+                        return tag, bounds
+        return None, None
+
+    @staticmethod
+    def _key_bounds(parts: List[FilterNode], field: str, closed: bool) -> Optional[Tuple[Any, Any]]:
+        """(low, high) of the first condition on field that bounds its keys."""
+        for part in parts:
+            if getattr(part, 'field', '').upper() != field:
+                continue
+            if isinstance(part, Range):
+                low, high = part.low, part.high
+            elif isinstance(part, Compare) and part.value is not None:
+                op = part.op
+                low = part.value if op in ('=', '==', '>', '>=') else None
+                high = part.value if op in ('=', '==', '<', '<=') else None
+            else:
+                continue
+            if low is None and high is None:
+                continue
+            if closed and (low is None or high is None):
+                continue
+            return low, high
+        return None
+
+    def _seekable_tag(self, table: DBFTable, index: Optional[CDXIndex], name: str) -> CDXTag:
+        tag = index.tag(name) if index is not None else None
+        if tag is None:
+            raise RuntimeError(f"{table.path.name} has no index tag {name}")
+        if not tag.seekable:
+            raise RuntimeError(f"Index tag {name} of {table.path.name} ({tag.expression}) "
+                               "cannot be read by the native backend")
+        return tag
+
+    def _scan(self, table: DBFTable, recnos: Iterable[int], decoder: RecordDecoder,
+              predicate: Optional[Callable[[Record], bool]], extra: List[str],
+              limit: Optional[int]) -> Iterator[Record]:
+        """Decode the given records, skipping deleted ones, and yield those that match."""
+        buffer = table.buffer
+        header_length, record_length, record_count = table.header_length, table.record_length, table.record_count
+        unpack, convert = decoder.unpack, decoder.convert
+        clock = time.perf_counter_ns
+        count = scanned = converted = 0
+        read_ns = convert_ns = 0
+        try:
+            for recno in recnos:
+                if limit and count >= limit:
+                    break
+                if recno > record_count:
+                    continue  # Indexed after the header was read
+                start = clock()
+                values = unpack(buffer, header_length + (recno - 1) * record_length)
+                decoded = clock()
+                read_ns += decoded - start
+                scanned += 1
+                if values[0] == b'*':
+                    continue  # Deleted
+                record = convert(values)
+                convert_ns += clock() - decoded
+                converted += 1
+                if predicate is not None and not predicate(record):
+                    continue
+                for name in extra:
+                    del record[name]
+                yield record
+                count += 1
+        finally:
+            self._add_metrics('read', read_ns, scanned, scanned * record_length)
+            self._add_metrics('convert', convert_ns, converted)
+
+
+def _blocks(recnos: Iterable[int], size: int) -> Iterator[Sequence[int]]:
+    """Record numbers in blocks of size, ranges staying ranges."""
+    if isinstance(recnos, range):
+        for start in range(0, len(recnos), size):
+            yield recnos[start:start + size]
+        return
+    iterator = iter(recnos)
+    while True:
+        block = list(islice(iterator, size))
+        if not block:
+            return
+        yield block
+
+
+def _to_number(raw: bytes) -> Any:
+    # Same typing as DataConverter.from_decimal: float with a fractional part, int otherwise
+    text = raw.strip()
+    if not text:
+        return None
+    try:
+        return float(text) if b'.' in text else int(text)
+    except ValueError:
+        return None  # Overflow ('*****') or garbage
+
+
+def _to_date(raw: bytes) -> Optional[datetime]:
+    if not raw.strip(b' 0'):
+        return None
+    try:
+        return datetime(int(raw[:4]), int(raw[4:6]), int(raw[6:8]))
+    except ValueError:
+        return None
+
+
+def _to_datetime(raw: bytes) -> Optional[datetime]:
+    julian, milliseconds = struct.unpack('<ii', raw)
+    if julian <= 0:
+        return None
+    return datetime.fromordinal(julian - JULIAN_OFFSET) + timedelta(milliseconds=milliseconds)
+
+
+def _to_logical(raw: bytes) -> Optional[bool]:
+    value = raw[0]
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    return None
+
+
+def _companion(path: Path, suffix: str) -> Optional[Path]:
+    """File next to a table with another extension, in either case."""
+    for candidate in (path.with_suffix(suffix.upper()), path.with_suffix(suffix.lower())):
+        if candidate.exists():
+            return candidate
+    return _find_case_insensitive(path.with_suffix(suffix))
+
+
+def _find_case_insensitive(path: Path) -> Optional[Path]:
+    if not path.parent.is_dir():
+        return None
+    name = path.name.upper()
+    for candidate in path.parent.iterdir():
+        if candidate.name.upper() == name:
+            return candidate
+    return None
@@ -0,0 +1,258 @@
+import math
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from .core import DBFReader, Record, RecordBatch
+from .filters import FilterSpec, Range, as_filter, combine, conjuncts
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Pseudo field used to split a table by physical record number
+RECNO_FIELD = 'RECNO()'
+
+# Partitions per worker, so a slow partition does not leave workers idle
+PARTITIONS_PER_WORKER = 4
+
+# Records per partition batch, and batches buffered ahead per partition
+PARTITION_BATCH_SIZE = 1000
+PARTITION_BUFFER = 4
+
+# End-of-stream marker passed through the prefetch queue
+_DONE = object()
+
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], workers: int) -> Iterator[R]:
+    """Apply func to items on a thread pool, yielding results in input order.
+
+    At most workers calls are in flight, and items are pulled from the
+    input lazily, so the input may itself be a (slow) stream. The ADS
+    provider releases the GIL inside .NET calls, which lets reads on
+    separate connections run in parallel.
+
+    Args:
+        func: Function to apply to each item
+        items: Items to process
+        workers: Number of worker threads; 1 runs func inline
+
+    Yields:
+        func(item) for every item, in the order of items
+    """
+    if workers <= 1:
+        yield from map(func, items)
+        return
+
+    pending: Deque[Future] = deque()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dbf-worker')
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+class _Prefetcher:
+    """Background thread filling a bounded queue from an iterable.
+
+    The thread starts as soon as the object is created; iterate it to get
+    the items in order and call close() to stop the producer early.
+    """
+
+    def __init__(self, iterable: Iterable[Any], buffer_size: int):
+        """
+        Start reading ahead.
+
+        Args:
+            iterable: Stream to read ahead
+            buffer_size: Maximum number of buffered items
+        """
+        self.iterable = iterable
+        self.buffer: 'queue.Queue[Any]' = queue.Queue(maxsize=buffer_size)
+        self.stop = threading.Event()
+        self.producer = threading.Thread(target=self._produce, name='dbf-prefetch', daemon=True)
+        self.producer.start()
+
+    def _produce(self) -> None:
+        iterator = iter(self.iterable)
+        try:
+            for item in iterator:
+                while not self.stop.is_set():
+                    try:
+                        self.buffer.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if self.stop.is_set():
+                    break
+            else:
+                self.buffer.put((_DONE, None))
+        except BaseException as e:
+            self.buffer.put((_DONE, e))
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            item, error = self.buffer.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+
+    def close(self) -> None:
+        """Stop the producer and wait for it to finish."""
+        self.stop.set()
+        # Unblock a producer waiting on a full buffer
+        while self.producer.is_alive():
+            try:
+                self.buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self.producer.join()
+
+
+def prefetch(iterable: Iterable[T], buffer_size: int = 1000) -> Iterator[T]:
+    """Consume an iterable on a background thread, buffering ahead.
+
+    Lets two streams (e.g. VENTA headers and PARTVTA details of a merge
+    join) be read at the same time. Exceptions of the producer are raised
+    in the consumer; closing the returned generator stops the producer.
+
+    Args:
+        iterable: Stream to read ahead
+        buffer_size: Maximum number of buffered items
+
+    Yields:
+        The items of iterable, in order
+    """
+    prefetcher = _Prefetcher(iterable, buffer_size)
+    try:
+        yield from prefetcher
+    finally:
+        prefetcher.close()
+
+
+def recno_partitions(record_count: int, partitions: int) -> List[Tuple[int, int]]:
+    """Split record numbers 1..record_count into contiguous ranges.
+
+    Args:
+        record_count: Number of records in the table
+        partitions: Number of ranges wanted
+
+    Returns:
+        Inclusive (first, last) record number ranges, in table order
+    """
+    if record_count <= 0:
+        return []
+    partitions = max(1, min(partitions, record_count))
+    size = math.ceil(record_count / partitions)
+    return [(first, min(first + size - 1, record_count)) for first in range(1, record_count + 1, size)]
+
+
+class ParallelScan:
+    """Scan a table as record-number partitions on several connections.
+
+    Up to workers partitions are streamed at the same time, each on its own
+    pooled connection and thread, into a queue of at most PARTITION_BUFFER
+    batches. The partitions are drained in record-number order, so the
+    output is the same as a sequential scan of the table and memory stays
+    bounded by workers * PARTITION_BUFFER batches.
+    """
+
+    def __init__(self, reader: DBFReader, workers: int, partitions_per_worker: int = PARTITIONS_PER_WORKER):
+        """
+        Initialize the scan.
+
+        Args:
+            reader: Reader for the table's data source
+            workers: Number of partitions read at the same time
+            partitions_per_worker: Partitions created per worker
+        """
+        self.reader = reader
+        self.workers = workers
+        self.partitions_per_worker = partitions_per_worker
+
+    def partitions(self, table_name: str) -> List[Tuple[int, int]]:
+        """Record-number ranges the table is split into."""
+        record_count = self.reader.get_record_count(table_name)
+        return recno_partitions(record_count, self.workers * self.partitions_per_worker)
+
+    def iter_records(self, table_name: str, limit: Optional[int] = None, filters: FilterSpec = None,
+                     columns: Optional[Sequence[str]] = None) -> Iterator[Record]:
+        """Yield the records of a table, reading partitions in parallel.
+
+        Args:
+            table_name: Name of the table to read
+            limit: Optional limit on number of records to read
+            filters: Optional filter, applied within every partition
+            columns: Optional projection, only these columns are read
+
+        Yields:
+            Records as dictionaries, in record-number order
+        """
+        count = 0
+        for batch in self._iter_partition_batches(table_name, PARTITION_BATCH_SIZE, filters, columns):
+            for record in batch:
+                if limit and count >= limit:
+                    return
+                yield record
+                count += 1
+
+    def _iter_partition_batches(self, table_name: str, batch_size: int, filters: FilterSpec,
+                                columns: Optional[Sequence[str]]) -> Iterator[RecordBatch]:
+        """Stream the batches of every partition, partitions in order.
+
+        The next workers - 1 partitions are read ahead while the current one
+        is drained; a partition's stream starts when the one workers places
+        before it is finished.
+        """
+        base = conjuncts(as_filter(filters))
+
+        def start(bounds: Tuple[int, int]) -> _Prefetcher:
+            partition_filter = combine(base + [Range(RECNO_FIELD, bounds[0], bounds[1])])
+            batches = self.reader.iter_batches(table_name, batch_size, None, partition_filter, columns)
+            return _Prefetcher(batches, PARTITION_BUFFER)
+
+        partitions = iter(self.partitions(table_name))
+        active: Deque[_Prefetcher] = deque()
+        try:
+            for bounds in partitions:
+                active.append(start(bounds))
+                if len(active) >= max(1, self.workers):
+                    break
+            while active:
+                yield from active[0]
+                active.popleft().close()
+                bounds = next(partitions, None)
+                if bounds is not None:
+                    active.append(start(bounds))
+        finally:
+            for prefetcher in active:
+                prefetcher.close()
+
+    def iter_batches(self, table_name: str, batch_size: int, limit: Optional[int] = None,
+                     filters: FilterSpec = None, columns: Optional[Sequence[str]] = None) -> Iterator[RecordBatch]:
+        """Like iter_records, but yield lists of at most batch_size records."""
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be greater than 0, got {batch_size}")
+
+        batch = []
+        for record in self.iter_records(table_name, limit, filters, columns):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,94 @@
+from dataclasses import dataclass, asdict
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .filters import Compare, FilterNode, Range, conjuncts, is_pushable
+
+# Access paths a read can take, cheapest first
+ACCESS_INDEX_RANGE = 'index_range'
+ACCESS_FILTER = 'filter'
+ACCESS_FULL_SCAN = 'full_scan'
+
+
+@dataclass
+class AccessPath:
+    """How a table read was executed, reported by DBFReader."""
+    table: str
+    mode: str = ACCESS_FULL_SCAN
+    index: Optional[str] = None
+    low: Any = None
+    high: Any = None
+    filter: Optional[str] = None
+    residual: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        if self.mode == ACCESS_INDEX_RANGE:
+            text = f"{self.table}: index range on {self.index} [{self.low} .. {self.high}]"
+            if self.filter:
+                text += f" + filter {self.filter}"
+        elif self.mode == ACCESS_FILTER:
+            text = f"{self.table}: filter scan ({self.filter})"
+        else:
+            text = f"{self.table}: full scan"
+        return f"{text} + post-filter {self.residual}" if self.residual else text
+
+
+def find_index_range(node: Optional[FilterNode], index_tags: Sequence[str],
+                     field_types: Optional[Dict[str, str]] = None) -> Optional[FilterNode]:
+    """Find an AND-ed condition that an index tag can serve.
+
+    Closed ranges and equalities on a tagged field qualify if ADS can
+    evaluate them for the field's type; a condition inside an OR or NOT is
+    never taken out.
+
+    Args:
+        node: Filter of the read
+        index_tags: CDX tags available on the table
+        field_types: .NET type name per field of the table
+
+    Returns:
+        The Range or Compare node to run as an index range, or None
+    """
+    tags = {tag.upper() for tag in index_tags}
+    for part in conjuncts(node):
+        if isinstance(part, Range) and part.low is not None and part.high is not None:
+            field = part.field
+        elif isinstance(part, Compare) and part.op in ('=', '==') and part.value is not None:
+            field = part.field
+        else:
+            continue
+        if field.upper() in tags and is_pushable(part, field_types):
+            return part
+    return None
+
+
+def index_range_bounds(node: FilterNode) -> List[Tuple[Any, Any]]:
+    """Candidate (low, high) key pairs for an index range, most specific first.
+
+    Date bounds cover whole days and are tried as DateTime keys and then as
+    DTOS() strings, since a tag on a date field may be built either way.
+
+    Args:
+        node: Range or Compare node returned by find_index_range
+
+    Returns:
+        List of (low, high) bounds to try in order
+    """
+    if isinstance(node, Range):
+        low, high = node.low, node.high
+    else:
+        low = high = node.value
+    if isinstance(low, date) and isinstance(high, date):
+        low_day, high_day = _as_date(low), _as_date(high)
+        return [
+            (datetime.combine(low_day, time.min), datetime.combine(high_day, time(23, 59, 59))),
+            (low_day.strftime('%Y%m%d'), high_day.strftime('%Y%m%d')),
+        ]
+    return [(low, high)]
+
+
+def _as_date(value: date) -> date:
+    return value.date() if isinstance(value, datetime) else value
@@ -0,0 +1,162 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .connection import DBFConnection
+
+# Defaults for the shared pool
+DEFAULT_POOL_SIZE = 4
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+
+@dataclass
+class PoolStats:
+    """Counters of a ConnectionPool."""
+    hits: int = 0        # Acquired an idle connection
+    misses: int = 0      # Had to open a new connection
+    discarded: int = 0   # Connections closed as expired or unhealthy
+    overflow: int = 0    # Released connections closed because the pool was full
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ConnectionPool:
+    """Open ADS connections kept for reuse, keyed by source directory.
+
+    Readers acquire a connection for the duration of one read and release
+    it afterwards. Up to max_size idle connections are kept per source;
+    connections idle for longer than idle_timeout seconds, or no longer
+    open, are closed instead of being handed out. The pool never blocks:
+    when no idle connection is available a new one is opened.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """
+        Initialize an empty pool.
+
+        Args:
+            max_size: Maximum idle connections kept per source directory
+            idle_timeout: Seconds an idle connection may be reused for
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.stats = PoolStats()
+        self._idle: Dict[Tuple[str, str], List[Tuple[DBFConnection, float]]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, data_source: str, encryption_password: str) -> DBFConnection:
+        """Get an open connection to a source directory.
+
+        Args:
+            data_source: Directory with the DBF files
+            encryption_password: Password for encrypted DBF
+
+        Returns:
+            Open DBFConnection; give it back with release()
+        """
+        key = self._key(data_source, encryption_password)
+        now = time.monotonic()
+        stale = []
+        connection = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, released_at = idle.pop()
+                if now - released_at <= self.idle_timeout and self._is_healthy(candidate):
+                    connection = candidate
+                    break
+                stale.append(candidate)
+            self.stats.discarded += len(stale)
+            if connection is not None:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+
+        for candidate in stale:
+            self._close(candidate)
+        if connection is None:
+            connection = DBFConnection(data_source, encryption_password)
+            connection.connect()
+        connection._pool_key = key
+        return connection
+
+    def release(self, connection: DBFConnection) -> None:
+        """Return a connection to the pool, or close it if the pool is full.
+
+        Args:
+            connection: Connection obtained from acquire()
+        """
+        key = getattr(connection, '_pool_key', None)
+        keep = False
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if not self._is_healthy(connection):
+                self.stats.discarded += 1
+            elif key is not None and len(idle) < self.max_size:
+                idle.append((connection, time.monotonic()))
+                keep = True
+            else:
+                self.stats.overflow += 1
+        if not keep:
+            self._close(connection)
+
+    @contextmanager
+    def connection(self, data_source: str, encryption_password: str) -> Iterator[DBFConnection]:
+        """Acquire a connection for the duration of a with block."""
+        connection = self.acquire(data_source, encryption_password)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close_all(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle = [connection for connections in self._idle.values() for connection, _ in connections]
+            self._idle.clear()
+        for connection in idle:
+            self._close(connection)
+
+    def idle_count(self) -> int:
+        """Number of idle connections currently kept."""
+        with self._lock:
+            return sum(len(connections) for connections in self._idle.values())
+
+    @staticmethod
+    def _key(data_source: str, encryption_password: str) -> Tuple[str, str]:
+        return str(Path(data_source).resolve()), encryption_password
+
+    @staticmethod
+    def _is_healthy(connection: DBFConnection) -> bool:
+        """Check that the underlying AdsConnection is still open."""
+        conn = connection.conn
+        if conn is None:
+            return False
+        try:
+            return str(conn.State) == 'Open'
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(connection: DBFConnection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_default_pool: Optional[ConnectionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> ConnectionPool:
+    """The pool shared by all readers that are not given their own."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
@@ -0,0 +1,769 @@
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .core import DBFReader, Record
+from .dbf_file import table_path
+from .filters import Compare, FilterNode, FilterSpec, In, Range, as_filter, combine, compile_predicate, conjuncts
+from .lookup import KeyLookup
+from .mapping_manager import MappingManager
+from .parallel import RECNO_FIELD
+from .planner import ACCESS_FILTER, ACCESS_INDEX_RANGE, AccessPath
+from ..utils.metrics import RunMetrics
+from ..utils.snapshot import content_hash
+
+# Bookkeeping tables of the replica database
+STATE_TABLE = '_replica_state'
+COLUMNS_TABLE = '_replica_columns'
+
+# Content hash of each row, compared to skip unchanged records on refresh
+HASH_COLUMN = '_hash'
+
+# Column kinds, from the ADS type of the field (numbers are split into
+# integer and real by the values loaded, as DataConverter types them)
+KIND_TEXT = 'text'
+KIND_INTEGER = 'integer'
+KIND_REAL = 'real'
+KIND_DATETIME = 'datetime'
+KIND_BOOL = 'bool'
+KIND_BLOB = 'blob'
+SQL_TYPES = {KIND_TEXT: 'TEXT', KIND_INTEGER: 'INTEGER', KIND_REAL: 'REAL', KIND_DATETIME: 'TEXT',
+             KIND_BOOL: 'INTEGER', KIND_BLOB: 'BLOB'}
+DOTNET_TYPES = {KIND_TEXT: 'System.String', KIND_INTEGER: 'System.Decimal', KIND_REAL: 'System.Decimal',
+                KIND_DATETIME: 'System.DateTime', KIND_BOOL: 'System.Boolean', KIND_BLOB: 'System.Byte[]'}
+_INTEGER_TYPES = ('System.Int16', 'System.Int32', 'System.Int64')
+_NUMBER_TYPES = ('System.Decimal', 'System.Double', 'System.Single')
+
+# Refresh modes reported per table
+MODE_UNCHANGED = 'unchanged'
+MODE_FULL = 'full'
+MODE_DIFF = 'diff'
+MODE_WINDOW = 'window'
+MODE_KEYS = 'keys'
+
+# Rows per executemany and rows sampled to type the number columns
+WRITE_BATCH_SIZE = 1000
+FETCH_BATCH_SIZE = 1000
+
+# Open upper bound of the date window re-read on refresh
+_MAX_DAY = date(9999, 12, 31)
+
+
+class ReplicaTable(NamedTuple):
+    """How a DBF table is mirrored and refreshed."""
+    name: str
+    key: Optional[str] = None         # Field identifying a record; refreshes diff rows on it
+    date_field: Optional[str] = None  # Refresh re-reads from the newest date minus the look-back
+    parent: Optional[str] = None      # Refresh replaces the rows of the parent keys re-read
+    parent_key: Optional[str] = None  # Field holding the parent's key
+    indexes: Tuple[str, ...] = ()     # Indexed fields, usable as tags by ReplicaReader
+
+
+# Folio (NO_REFEREN), fecha (F_EMISION) and REF (CLAVE, CLAVE_ART) are indexed;
+# parents come before their children
+REPLICA_TABLES = (
+    ReplicaTable('CAT_PROD.DBF', key='CLAVE', indexes=('CLAVE',)),
+    ReplicaTable('VENTA.DBF', key='NO_REFEREN', date_field='F_EMISION', indexes=('NO_REFEREN', 'F_EMISION')),
+    ReplicaTable('PARTVTA.DBF', parent='VENTA.DBF', parent_key='NO_REFEREN', indexes=('NO_REFEREN', 'CLAVE_ART')),
+)
+
+
+@dataclass
+class TableRefresh:
+    """What one refresh did to a replicated table."""
+    table: str
+    mode: str
+    rows_read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_table(table_name: str) -> str:
+    return Path(table_name).stem.upper()
+
+
+def _connect(database: str, read_only: bool = False) -> sqlite3.Connection:
+    if read_only:
+        return sqlite3.connect(f"{Path(database).resolve().as_uri()}?mode=ro", uri=True, timeout=60,
+                               check_same_thread=False)
+    conn = sqlite3.connect(database, timeout=60)
+    # Readers keep querying the last committed state while a refresh writes
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+def _to_sqlite(kind: str) -> Callable[[Any], Any]:
+    if kind == KIND_DATETIME:
+        # ISO text sorts like the dates, so ranges can use the index
+        return lambda value: value.isoformat(' ') if isinstance(value, (datetime, date)) else value
+    if kind == KIND_BOOL:
+        return lambda value: int(value) if isinstance(value, bool) else value
+    return lambda value: float(value) if isinstance(value, Decimal) else value
+
+
+def _from_sqlite(kind: str) -> Optional[Callable[[Any], Any]]:
+    if kind == KIND_DATETIME:
+        return lambda value: datetime.fromisoformat(value) if isinstance(value, str) and value else value
+    if kind == KIND_BOOL:
+        return lambda value: bool(value) if value is not None else None
+    return None
+
+
+def _column_kind(type_name: str, samples: Iterable[Any]) -> str:
+    """Kind of a replica column from the field's ADS type and loaded values."""
+    if type_name == 'System.String':
+        return KIND_TEXT
+    if type_name == 'System.DateTime':
+        return KIND_DATETIME
+    if type_name == 'System.Boolean':
+        return KIND_BOOL
+    if type_name in _INTEGER_TYPES:
+        return KIND_INTEGER
+    if type_name in _NUMBER_TYPES:
+        values = [value for value in samples if value is not None]
+        if type_name == 'System.Decimal' and values and all(isinstance(value, int) for value in values):
+            return KIND_INTEGER
+        return KIND_REAL
+    return KIND_BLOB
+
+
+class SQLiteReplica:
+    """Local SQLite copy of the mapped columns of the DBF tables.
+
+    Every table gets typed columns (dates as ISO text, so they sort and
+    index like dates), indexes on its key fields and a content hash per
+    row. refresh() only reads what may have changed since the last run:
+
+    - tables whose .dbf/.fpt size and modification time did not change
+      are skipped
+    - tables with a date_field re-read the records from the newest
+      replicated date minus lookback_days (an index range on the source)
+      and upsert the rows whose hash changed
+    - child tables (PARTVTA) replace the rows of the parent keys re-read
+    - other keyed tables (CAT_PROD) are read in full and diffed on the key
+
+    The first refresh, or one with full=True, reloads the tables. Like the
+    incremental VENTAS export, edits older than the look-back window are
+    only picked up by a full refresh.
+    """
+
+    def __init__(self, database: str, mapping_manager: MappingManager,
+                 tables: Sequence[ReplicaTable] = REPLICA_TABLES, lookback_days: int = 3):
+        """
+        Initialize the replica.
+
+        Args:
+            database: SQLite database file, created if missing
+            mapping_manager: Manager whose mappings select the replicated columns
+            tables: Tables to mirror, parents before their children
+            lookback_days: Days before the newest date re-read by incremental refreshes
+        """
+        self.database = str(database)
+        self.mapping_manager = mapping_manager
+        self.tables = list(tables)
+        self.lookback_days = lookback_days
+
+    def refresh(self, reader: DBFReader, full: bool = False,
+                metrics: Optional[RunMetrics] = None) -> List[TableRefresh]:
+        """Bring the replica up to date with the DBF tables.
+
+        Each table is refreshed in its own transaction; queries on the
+        replica keep seeing the previous state until it commits.
+
+        Args:
+            reader: Reader of the DBF tables (ADS or native backend)
+            full: Reload every table instead of refreshing incrementally
+            metrics: Run report receiving the 'replica' stage (SQLite writes)
+
+        Returns:
+            TableRefresh per table, in refresh order
+        """
+        Path(self.database).parent.mkdir(parents=True, exist_ok=True)
+        with _refresh_lock(self.database), closing(_connect(self.database)) as conn:
+            self._create_bookkeeping(conn)
+            # Parent table -> keys re-read (None when the table was reloaded)
+            refreshed: Dict[str, Optional[Set[Any]]] = {}
+            results = []
+            for spec in self.tables:
+                start = time.perf_counter()
+                write_ns = [0]
+                result = self._refresh_table(conn, reader, spec, full, refreshed, write_ns)
+                result.seconds = round(time.perf_counter() - start, 6)
+                if metrics is not None:
+                    metrics.add('replica', write_ns[0], result.inserted + result.updated + result.deleted)
+                results.append(result)
+        return results
+
+    def _refresh_table(self, conn: sqlite3.Connection, reader: DBFReader, spec: ReplicaTable, full: bool,
+                       refreshed: Dict[str, Optional[Set[Any]]], write_ns: List[int]) -> TableRefresh:
+        signature = _file_signature(reader.data_source, spec.name)
+        state = conn.execute(f"SELECT signature FROM {STATE_TABLE} WHERE table_name = ?", (spec.name,)).fetchone()
+        columns, types = self._columns(reader, spec)
+        loaded = state is not None and self._stored_columns(conn, spec.name) == [name.upper() for name in columns]
+        changed = state is None or signature is None or state[0] != signature
+        parent_keys = refreshed.get(spec.parent, set()) if spec.parent else None
+
+        with conn:
+            if full or not loaded or (spec.parent and spec.parent in refreshed and parent_keys is None):
+                result = self._load(conn, reader, spec, columns, types, write_ns)
+                refreshed[spec.name] = None
+            elif spec.parent:
+                if not changed and spec.parent not in refreshed:
+                    return TableRefresh(spec.name, MODE_UNCHANGED)
+                if spec.parent not in refreshed:
+                    # Only the details changed: re-read those of the parent's window
+                    parent_keys = self._window_keys(conn, self._spec(spec.parent))
+                result = self._replace_keys(conn, reader, spec, columns, parent_keys, write_ns)
+                refreshed[spec.name] = parent_keys
+            elif not changed:
+                return TableRefresh(spec.name, MODE_UNCHANGED)
+            else:
+                keys: Set[Any] = set()
+                result = self._diff(conn, reader, spec, columns, keys, write_ns)
+                refreshed[spec.name] = keys
+            conn.execute(f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?, ?, ?)",
+                         (spec.name, signature, datetime.now().isoformat(' ', 'seconds'), result.mode))
+        return result
+
+    def _load(self, conn: sqlite3.Connection, reader: DBFReader, spec: ReplicaTable, columns: List[str],
+              types: Dict[str, str], write_ns: List[int]) -> TableRefresh:
+        """Recreate a table from a full read of the DBF."""
+        result = TableRefresh(spec.name, MODE_FULL)
+        table = _sql_table(spec.name)
+        records = reader.iter_records(spec.name, None, None, columns)
+        try:
+            # The first batch types the columns before the table is created
+            first = [record for _, record in zip(range(WRITE_BATCH_SIZE), records)]
+            kinds = [_column_kind(types[name], (record.get(name) for record in first)) for name in columns]
+
+            start = time.perf_counter_ns()
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            definitions = ', '.join(f"{_quote(name)} {SQL_TYPES[kind]}" for name, kind in zip(columns, kinds))
+            conn.execute(f"CREATE TABLE {_quote(table)} ({definitions}, {HASH_COLUMN} TEXT)")
+            present = {name.upper() for name in columns}
+            for name in dict.fromkeys(name for name in (spec.key,) + spec.indexes if name and name.upper() in present):
+                unique = 'UNIQUE ' if name == spec.key else ''
+                conn.execute(f"CREATE {unique}INDEX {_quote(f'{table}_{name}')} ON {_quote(table)} ({_quote(name)})")
+            conn.execute(f"DELETE FROM {COLUMNS_TABLE} WHERE table_name = ?", (spec.name,))
+            conn.executemany(f"INSERT INTO {COLUMNS_TABLE} VALUES (?, ?, ?, ?)",
+                             [(spec.name, position, name.upper(), kind)
+                              for position, (name, kind) in enumerate(zip(columns, kinds))])
+            write_ns[0] += time.perf_counter_ns() - start
+
+            insert = self._insert_sql(spec, columns)
+            row = self._row_builder(columns, kinds)
+            batch = [row(record) for record in first]
+            for record in records:
+                batch.append(row(record))
+                if len(batch) >= WRITE_BATCH_SIZE:
+                    result.inserted += self._write(conn, insert, batch, write_ns)
+                    batch = []
+            result.inserted += self._write(conn, insert, batch, write_ns)
+        finally:
+            records.close()
+        result.rows_read = result.inserted
+        return result
+
+    def _diff(self, conn: sqlite3.Connection, reader: DBFReader, spec: ReplicaTable, columns: List[str],
+              keys: Set[Any], write_ns: List[int]) -> TableRefresh:
+        """Upsert changed rows of a keyed table; with a date field, only within the look-back window."""
+        table = _quote(_sql_table(spec.name))
+        key = _quote(spec.key)
+        filters = None
+        result = TableRefresh(spec.name, MODE_DIFF)
+        existing_sql = f"SELECT {key}, {HASH_COLUMN} FROM {table}"
+        params: Tuple[Any, ...] = ()
+        if spec.date_field:
+            window_start = self._window_start(conn, spec)
+            if window_start is not None:
+                result.mode = MODE_WINDOW
+                filters = Range(spec.date_field, window_start, _MAX_DAY)
+                existing_sql += f" WHERE {_quote(spec.date_field)} >= ?"
+                params = (window_start.isoformat(),)
+        existing = dict(conn.execute(existing_sql, params))
+
+        kinds = self._stored_kinds(conn, spec.name)
+        row = self._row_builder(columns, kinds)
+        upsert = self._insert_sql(spec, columns)
+        key_index = [name.upper() for name in columns].index(spec.key.upper())
+        hash_index = len(columns)
+        batch = []
+        for record in reader.iter_records(spec.name, None, filters, columns):
+            result.rows_read += 1
+            values = row(record)
+            key_value = values[key_index]
+            keys.add(key_value)
+            previous = existing.get(key_value)
+            if previous == values[hash_index]:
+                continue
+            if previous is None:
+                result.inserted += 1
+            else:
+                result.updated += 1
+            batch.append(values)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                self._write(conn, upsert, batch, write_ns)
+                batch = []
+        self._write(conn, upsert, batch, write_ns)
+
+        removed = [(key_value,) for key_value in existing if key_value not in keys]
+        start = time.perf_counter_ns()
+        conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", removed)
+        write_ns[0] += time.perf_counter_ns() - start
+        result.deleted = len(removed)
+        keys.update(key_value for key_value, in removed)
+        return result
+
+    def _replace_keys(self, conn: sqlite3.Connection, reader: DBFReader, spec: ReplicaTable, columns: List[str],
+                      parent_keys: Set[Any], write_ns: List[int]) -> TableRefresh:
+        """Replace the rows of a child table belonging to some parent keys.
+
+        A parent's rows are only rewritten if their hashes (in table order)
+        changed, so untouched sales keep their rows and the order of lines.
+        """
+        result = TableRefresh(spec.name, MODE_KEYS)
+        table = _quote(_sql_table(spec.name))
+        parent_key = _quote(spec.parent_key)
+        keys = sorted(parent_keys, key=str)
+
+        # Keys come from the replica, already formatted as stored
+        lookup = KeyLookup(reader, spec.name, spec.parent_key, index_tag=spec.parent_key, format_key=lambda key: key)
+        key_index = [name.upper() for name in columns].index(spec.parent_key.upper())
+        row = self._row_builder(columns, self._stored_kinds(conn, spec.name))
+        rows: Dict[Any, List[tuple]] = {key: [] for key in keys}
+        for record in lookup.iter_records(keys, columns):
+            result.rows_read += 1
+            values = row(record)
+            rows.setdefault(values[key_index], []).append(values)
+
+        existing: Dict[Any, List[str]] = {}
+        for i in range(0, len(keys), WRITE_BATCH_SIZE):
+            chunk = keys[i:i + WRITE_BATCH_SIZE]
+            for key, row_hash in conn.execute(
+                    f"SELECT {parent_key}, {HASH_COLUMN} FROM {table} WHERE {parent_key} IN ({', '.join('?' * len(chunk))})"
+                    f" ORDER BY rowid", chunk):
+                existing.setdefault(key, []).append(row_hash)
+
+        changed = [key for key, key_rows in rows.items()
+                   if [values[-1] for values in key_rows] != existing.get(key, [])]
+        start = time.perf_counter_ns()
+        conn.executemany(f"DELETE FROM {table} WHERE {parent_key} = ?", [(key,) for key in changed])
+        write_ns[0] += time.perf_counter_ns() - start
+        self._write(conn, self._insert_sql(spec, columns), [values for key in changed for values in rows[key]], write_ns)
+
+        # Rows rewritten for a parent count as updated, the difference as inserted or deleted
+        for key in changed:
+            new, old = len(rows[key]), len(existing.get(key, ()))
+            result.updated += min(new, old)
+            result.inserted += max(new - old, 0)
+            result.deleted += max(old - new, 0)
+        return result
+
+    def _window_start(self, conn: sqlite3.Connection, spec: ReplicaTable) -> Optional[date]:
+        """First day re-read by an incremental refresh: newest date minus the look-back."""
+        if self._stored_kinds(conn, spec.name)[self._position(conn, spec.name, spec.date_field)] != KIND_DATETIME:
+            return None  # Dates stored as text: diff the whole table
+        newest = conn.execute(f"SELECT MAX({_quote(spec.date_field)}) FROM {_quote(_sql_table(spec.name))}").fetchone()[0]
+        if not newest:
+            return None
+        return (datetime.fromisoformat(newest) - timedelta(days=self.lookback_days)).date()
+
+    def _window_keys(self, conn: sqlite3.Connection, spec: ReplicaTable) -> Set[Any]:
+        """Keys of a parent's rows within its look-back window."""
+        window_start = self._window_start(conn, spec) if spec.date_field else None
+        if window_start is None:
+            return {key for key, in conn.execute(f"SELECT {_quote(spec.key)} FROM {_quote(_sql_table(spec.name))}")}
+        return {key for key, in conn.execute(
+            f"SELECT {_quote(spec.key)} FROM {_quote(_sql_table(spec.name))} WHERE {_quote(spec.date_field)} >= ?",
+            (window_start.isoformat(),))}
+
+    def _columns(self, reader: DBFReader, spec: ReplicaTable) -> Tuple[List[str], Dict[str, str]]:
+        """Replicated fields and their ADS types.
+
+        Returns:
+            The mapped fields present in the table plus those the refresh and
+            the indexes need, named as in the table, and the type of each field
+        """
+        types = reader.get_table_info(spec.name)['types']
+        by_name = {name.upper(): name for name in types}
+        wanted = self.mapping_manager.get_source_fields(spec.name)
+        wanted += [name for name in (spec.key, spec.date_field, spec.parent_key) + tuple(spec.indexes) if name]
+        fields = list(dict.fromkeys(by_name[name.upper()] for name in wanted if name.upper() in by_name))
+        missing = [name for name in (spec.key, spec.date_field, spec.parent_key) if name and name.upper() not in by_name]
+        if missing:
+            raise RuntimeError(f"{spec.name} has no fields {missing}, needed to replicate it")
+        return fields, {name: types[name] for name in fields}
+
+    def _insert_sql(self, spec: ReplicaTable, columns: List[str]) -> str:
+        names = ', '.join([_quote(name) for name in columns] + [HASH_COLUMN])
+        placeholders = ', '.join('?' * (len(columns) + 1))
+        sql = f"INSERT INTO {_quote(_sql_table(spec.name))} ({names}) VALUES ({placeholders})"
+        if spec.key:
+            updates = ', '.join(f"{_quote(name)} = excluded.{_quote(name)}" for name in columns + [HASH_COLUMN])
+            # Updates keep the row's rowid, so rows stay in table order
+            sql += f" ON CONFLICT ({_quote(spec.key)}) DO UPDATE SET {updates}"
+        return sql
+
+    @staticmethod
+    def _row_builder(columns: List[str], kinds: List[str]) -> Callable[[Record], tuple]:
+        """Values of a record in column order, converted for SQLite, plus its hash."""
+        converters = [_to_sqlite(kind) for kind in kinds]
+        pairs = list(zip(converters, columns))
+
+        def row(record: Record) -> tuple:
+            converted = tuple(convert(record.get(name)) for convert, name in pairs)
+            return converted + (content_hash(converted),)
+        return row
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, sql: str, rows: List[tuple], write_ns: List[int]) -> int:
+        if rows:
+            start = time.perf_counter_ns()
+            conn.executemany(sql, rows)
+            write_ns[0] += time.perf_counter_ns() - start
+        return len(rows)
+
+    def _spec(self, table_name: str) -> ReplicaTable:
+        return next(spec for spec in self.tables if spec.name == table_name)
+
+    @staticmethod
+    def _create_bookkeeping(conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} "
+                         "(table_name TEXT PRIMARY KEY, signature TEXT, refreshed_at TEXT, mode TEXT)")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {COLUMNS_TABLE} "
+                         "(table_name TEXT, position INTEGER, name TEXT, kind TEXT, PRIMARY KEY (table_name, position))")
+
+    @staticmethod
+    def _stored_columns(conn: sqlite3.Connection, table_name: str) -> List[str]:
+        return [name for name, in conn.execute(
+            f"SELECT name FROM {COLUMNS_TABLE} WHERE table_name = ? ORDER BY position", (table_name,))]
+
+    @staticmethod
+    def _stored_kinds(conn: sqlite3.Connection, table_name: str) -> List[str]:
+        return [kind for kind, in conn.execute(
+            f"SELECT kind FROM {COLUMNS_TABLE} WHERE table_name = ? ORDER BY position", (table_name,))]
+
+    def _position(self, conn: sqlite3.Connection, table_name: str, field: str) -> int:
+        return self._stored_columns(conn, table_name).index(field.upper())
+
+
+def _file_signature(data_source: str, table_name: str) -> Optional[str]:
+    """Size and modification time of a table's .dbf and .fpt files."""
+    path = table_path(data_source, table_name)
+    parts = []
+    for file_path in (path, path.with_suffix('.fpt'), path.with_suffix('.FPT')):
+        try:
+            stat = file_path.stat()
+        except OSError:
+            if file_path == path:
+                return None
+            continue
+        parts.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+    return '/'.join(parts)
+
+
+_refresh_locks: Dict[str, threading.Lock] = {}
+_refresh_locks_lock = threading.Lock()
+
+
+def _refresh_lock(database: str) -> threading.Lock:
+    """Lock serializing the refreshes of one replica within the process."""
+    key = str(Path(database).resolve())
+    with _refresh_locks_lock:
+        return _refresh_locks.setdefault(key, threading.Lock())
+
+
+class ReplicaReader(DBFReader):
+    """DBFReader answering queries from a SQLiteReplica instead of the DBF files.
+
+    Filters run as SQL on the replica's indexes: AND-ed equalities, ranges
+    and IN lists on a column are pushed into the WHERE clause, and the
+    whole filter is then checked per row in Python, so results match the
+    other readers exactly. A closed range or equality on an indexed column
+    returns rows in that column's order, as a CDX index range does, and
+    the indexed fields can be used as tags (order_by, iter_index_ranges).
+    RECNO() ranges select rowids. No DBF file is opened.
+    """
+
+    def __init__(self, database: str, encryption_password: Optional[str] = None, pool=None):
+        """
+        Initialize the reader.
+
+        Args:
+            database: Replica database written by SQLiteReplica.refresh()
+            encryption_password: Unused, the replica is not encrypted
+            pool: Unused, kept for the DBFReader signature
+        """
+        super().__init__(str(database), encryption_password, pool)
+        self.database = str(database)
+        self._schemas: Dict[str, List[Tuple[str, str]]] = {}
+
+    def _iter_records(self, table_name: str, limit: Optional[int], filters: FilterSpec,
+                      columns: Optional[Sequence[str]], order_by: Optional[str]) -> Iterator[Record]:
+        """Query the replica table, see DBFReader.iter_records."""
+        start = time.perf_counter_ns()
+        with closing(self._connect()) as conn:
+            schema = self._schema(conn, table_name)
+            kinds = {name: kind for name, kind in schema}
+            node = as_filter(filters)
+            where, params, rest, access_path = self._where(conn, node, kinds, table_name)
+
+            names = self._resolve(schema, columns)
+            extra = []
+            predicate = compile_predicate(rest) if rest is not None else None
+            if predicate is not None:
+                # The filter needs its fields even if they are not projected
+                wanted = {name.upper() for name in names}
+                extra = [name for name, _ in schema if name in {field.upper() for field in rest.fields()}
+                         and name not in wanted]
+
+            order = access_path.index
+            if order_by:
+                order = order_by.upper()
+                if order not in self._indexed(conn, table_name):
+                    raise RuntimeError(f"Replica of {table_name} has no index on {order_by}")
+            selected = names + extra
+            sql = (f"SELECT {', '.join(_quote(name) for name in selected)} FROM {_quote(_sql_table(table_name))}"
+                   f"{' WHERE ' + ' AND '.join(where) if where else ''}"
+                   f" ORDER BY {_quote(order) + ', ' if order else ''}rowid")
+            self.last_access_path = access_path
+            self.access_paths[table_name] = access_path
+            cursor = conn.execute(sql, params)
+            self._add_metrics('filter_setup', time.perf_counter_ns() - start)
+            yield from self._fetch(cursor, selected, [kinds[name] for name in selected], predicate,
+                                   names if extra else None, limit)
+
+    def iter_index_ranges(self, table_name: str, index_tag: str, ranges: Iterable[Tuple[Any, Any]],
+                          columns: Optional[Sequence[str]] = None) -> Iterator[Record]:
+        """Yield the records of several key ranges of an indexed column, see DBFReader.iter_index_ranges."""
+        with closing(self._connect()) as conn:
+            schema = self._schema(conn, table_name)
+            tag = index_tag.upper()
+            if tag not in self._indexed(conn, table_name):
+                raise RuntimeError(f"Replica of {table_name} has no index on {index_tag}")
+            kind = dict(schema)[tag]
+            names = self._resolve(schema, columns)
+            kinds = [dict(schema)[name] for name in names]
+            sql = (f"SELECT {', '.join(_quote(name) for name in names)} FROM {_quote(_sql_table(table_name))}"
+                   f" WHERE {_quote(tag)} >= ? AND {_quote(tag)} <= ? ORDER BY {_quote(tag)}, rowid")
+            for low, high in ranges:
+                low, high = _sql_value(kind, low, 'low'), _sql_value(kind, high, 'high')
+                yield from self._fetch(conn.execute(sql, (low, high)), names, kinds, None, None, None)
+
+    def get_record_count(self, table_name: str) -> int:
+        """Highest rowid of the replica table, the bound of RECNO() ranges."""
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT MAX(rowid) FROM {_quote(_sql_table(table_name))}").fetchone()[0] or 0
+
+    def get_index_tags(self, table_name: str) -> List[str]:
+        """Indexed columns of the replica table, usable as tags."""
+        with closing(self._connect()) as conn:
+            return sorted(self._indexed(conn, table_name))
+
+    def has_index(self, table_name: str, index_tag: str) -> bool:
+        return index_tag.upper() in self.get_index_tags(table_name)
+
+    def get_table_info(self, table_name: str) -> Dict[str, Any]:
+        """Get information about table structure, with ADS type names."""
+        with closing(self._connect()) as conn:
+            schema = self._schema(conn, table_name)
+        return {
+            'field_count': len(schema),
+            'columns': [name for name, _ in schema],
+            'types': {name: DOTNET_TYPES[kind] for name, kind in schema}
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if not Path(self.database).exists():
+            raise RuntimeError(f"Replica not found: {self.database}. Refresh it first")
+        return _connect(self.database, read_only=True)
+
+    def _schema(self, conn: sqlite3.Connection, table_name: str) -> List[Tuple[str, str]]:
+        """(column, kind) pairs of a replicated table."""
+        schema = conn.execute(f"SELECT name, kind FROM {COLUMNS_TABLE} WHERE table_name = ? ORDER BY position",
+                              (table_name.upper(),)).fetchall()
+        if not schema:
+            raise RuntimeError(f"{table_name} is not in the replica {self.database}")
+        return schema
+
+    @staticmethod
+    def _indexed(conn: sqlite3.Connection, table_name: str) -> Set[str]:
+        table = _sql_table(table_name)
+        indexed = set()
+        for row in conn.execute(f"PRAGMA index_list({_quote(table)})"):
+            info = conn.execute(f"PRAGMA index_info({_quote(row[1])})").fetchall()
+            if len(info) == 1:
+                indexed.add(info[0][2].upper())
+        return indexed
+
+    @staticmethod
+    def _resolve(schema: List[Tuple[str, str]], columns: Optional[Sequence[str]]) -> List[str]:
+        """Stored names of a projection; like the native reader, unknown names are ignored."""
+        if columns is None:
+            return [name for name, _ in schema]
+        known = {name for name, _ in schema}
+        return list(dict.fromkeys(name.upper() for name in columns if name.upper() in known))
+
+    def _where(self, conn: sqlite3.Connection, node: Optional[FilterNode], kinds: Dict[str, str],
+               table_name: str) -> Tuple[List[str], List[Any], Optional[FilterNode], AccessPath]:
+        """SQL conditions of the AND-ed parts that can be pushed down.
+
+        Returns:
+            Conditions, their parameters, the filter still to check per row
+            (all but RECNO() ranges) and the access path; its index is the
+            column whose closed range orders the result, if any
+        """
+        where, params, rest = [], [], []
+        access_path = AccessPath(table_name)
+        indexed = None
+        for part in conjuncts(node):
+            field = getattr(part, 'field', '').upper()
+            if isinstance(part, Range) and field == RECNO_FIELD:
+                if part.low is not None:
+                    where.append("rowid >= ?")
+                    params.append(int(part.low))
+                if part.high is not None:
+                    where.append("rowid <= ?")
+                    params.append(int(part.high))
+                continue
+            rest.append(part)
+            kind = kinds.get(field)
+            condition = _condition(part, field, kind) if kind else None
+            if condition is None:
+                continue
+            sql, values, closed = condition
+            where.append(sql)
+            params.extend(values)
+            if closed and access_path.index is None:
+                if indexed is None:
+                    indexed = self._indexed(conn, table_name)
+                if field in indexed:
+                    access_path.mode = ACCESS_INDEX_RANGE
+                    access_path.index = field
+                    access_path.low, access_path.high = values[0], values[-1]
+        if where:
+            access_path.filter = ' AND '.join(where)
+            if access_path.index is None:
+                access_path.mode = ACCESS_FILTER
+        rest = combine(rest)
+        if rest is not None:
+            access_path.residual = repr(rest)
+        return where, params, rest, access_path
+
+    def _fetch(self, cursor: sqlite3.Cursor, names: List[str], kinds: List[str],
+               predicate: Optional[Callable[[Record], bool]], projection: Optional[List[str]],
+               limit: Optional[int]) -> Iterator[Record]:
+        """Convert fetched rows to records, filtering and projecting them."""
+        converters = [(i, convert) for i, convert in enumerate(map(_from_sqlite, kinds)) if convert is not None]
+        count = scanned = 0
+        read_ns = convert_ns = 0
+        clock = time.perf_counter_ns
+        try:
+            while True:
+                start = clock()
+                rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+                converted = clock()
+                read_ns += converted - start
+                if not rows:
+                    break
+                scanned += len(rows)
+                records = []
+                for row in rows:
+                    if converters:
+                        row = list(row)
+                        for i, convert in converters:
+                            row[i] = convert(row[i])
+                    record = dict(zip(names, row))
+                    if predicate is not None and not predicate(record):
+                        continue
+                    if projection is not None:
+                        record = {name: record[name] for name in projection}
+                    records.append(record)
+                convert_ns += clock() - converted
+                for record in records:
+                    if limit and count >= limit:
+                        return
+                    yield record
+                    count += 1
+        finally:
+            cursor.close()
+            self._add_metrics('read', read_ns, scanned)
+            self._add_metrics('convert', convert_ns, scanned)
+
+
+def _condition(part: FilterNode, field: str, kind: str) -> Optional[Tuple[str, List[Any], bool]]:
+    """SQL for a Compare, Range or In on a column, None if it cannot be pushed down.
+
+    Returns:
+        (condition, parameters, whether it bounds the column on both sides)
+    """
+    column = _quote(field)
+    if isinstance(part, Compare) and part.op in ('=', '==', '<', '<=', '>', '>='):
+        if part.op in ('=', '=='):
+            low, high = _sql_value(kind, part.value, 'low'), _sql_value(kind, part.value, 'high')
+            if low is None or high is None:
+                return None
+            if low == high:
+                return f"{column} = ?", [low], True
+            return f"{column} >= ? AND {column} <= ?", [low, high], True
+        side = 'low' if part.op in ('>', '>=') else 'high'
+        value = _sql_value(kind, part.value, side, strict=part.op in ('<', '>'))
+        if value is None:
+            return None
+        return f"{column} {part.op} ?", [value], False
+    if isinstance(part, Range):
+        low = _sql_value(kind, part.low, 'low') if part.low is not None else None
+        high = _sql_value(kind, part.high, 'high') if part.high is not None else None
+        conditions = ([f"{column} >= ?"] if low is not None else []) + ([f"{column} <= ?"] if high is not None else [])
+        if not conditions:
+            return None
+        return ' AND '.join(conditions), [value for value in (low, high) if value is not None], len(conditions) == 2
+    if isinstance(part, In) and part.values:
+        if kind == KIND_DATETIME:
+            return None  # Matched by day, left to the per-row check
+        values = [_sql_value(kind, value, 'low') for value in part.values]
+        if any(value is None for value in values):
+            return None
+        return f"{column} IN ({', '.join('?' * len(values))})", values, False
+    return None
+
+
+def _sql_value(kind: str, value: Any, side: str, strict: bool = False) -> Any:
+    """Bound for a column compared with a filter value, None if the types do not match.
+
+    Dates compare by day, as compile_predicate does: a low bound starts at
+    midnight and a high bound takes the whole day. For the strict '<' and
+    '>' the bound is the same; the per-row check excludes the day itself.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if kind == KIND_DATETIME:
+        if not isinstance(value, date):
+            return None
+        day = value.date() if isinstance(value, datetime) else value
+        if side == 'low':
+            return day.isoformat()
+        return day.isoformat() + ' 23:59:59.999999'
+    if kind == KIND_TEXT:
+        return value if isinstance(value, str) else None
+    if kind in (KIND_INTEGER, KIND_REAL):
+        if isinstance(value, Decimal):
+            return float(value)
+        return value if isinstance(value, (int, float)) else None
+    return None
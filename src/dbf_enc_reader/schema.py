@@ -0,0 +1,78 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from .converters import DataConverter
+
+
+class ColumnSpec(NamedTuple):
+    """A resolved column of an open ADS reader."""
+    name: str
+    ordinal: int
+    type_name: str
+    getter: Callable[[int], Any]
+    converter: Callable[[Any], Any]
+
+
+class TableSchema:
+    """Column layout of an open reader with a typed getter per column.
+    
+    Names, ordinals and .NET field types are resolved once per reader, so
+    reading a row only calls one typed getter and one converter per column.
+    """
+
+    def __init__(self, columns: List[ColumnSpec]):
+        """
+        Initialize the schema from resolved columns.
+        
+        Args:
+            columns: Resolved column specifications
+        """
+        self.columns = columns
+        self.names = [column.name for column in columns]
+        self._plan = [(column.name, column.ordinal, column.getter, column.converter) for column in columns]
+
+    @classmethod
+    def resolve(cls, reader, converter: DataConverter, columns: Optional[Sequence[str]] = None) -> 'TableSchema':
+        """Resolve the schema of an open reader.
+        
+        Args:
+            reader: Open ADS data reader
+            converter: Converter providing the typed accessors
+            columns: Optional projection; only these columns are read, in
+                this order. Names not present in the table are ignored.
+            
+        Returns:
+            TableSchema bound to the reader
+        """
+        names = [reader.GetName(i) for i in range(reader.FieldCount)]
+        if columns is None:
+            ordinals = list(range(len(names)))
+        else:
+            positions = {name.upper(): i for i, name in enumerate(names)}
+            ordinals = [positions[name.upper()] for name in columns if name.upper() in positions]
+        
+        specs = []
+        for i in ordinals:
+            type_name = reader.GetFieldType(i).FullName
+            getter_name, convert = converter.typed_accessor(type_name)
+            specs.append(ColumnSpec(names[i], i, type_name, getattr(reader, getter_name), convert))
+        return cls(specs)
+
+    def read_record(self, reader) -> Dict[str, Any]:
+        """Read the current row of the reader as a dictionary.
+        
+        Args:
+            reader: The reader this schema was resolved from
+            
+        Returns:
+            Record with native Python values, None for NULL fields
+        """
+        record = {}
+        for name, ordinal, getter, convert in self._plan:
+            try:
+                record[name] = convert(getter(ordinal))
+            except Exception:
+                # Typed getters raise on NULL, check only when that happens
+                if not reader.IsDBNull(ordinal):
+                    raise
+                record[name] = None
+        return record
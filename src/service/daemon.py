@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Job = Dict[str, Any]
+JobHandler = Callable[[Job], Dict[str, Any]]
+
+# Seconds between scans of an empty queue
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class JobQueue:
+    """Export jobs stored as JSON files in a queue directory.
+
+    Jobs are submitted to 'incoming/' and claimed by renaming them into
+    'processing/', which is atomic, so several daemons can share a queue
+    without running a job twice. Finished jobs move to 'done/' or
+    'failed/' together with their result. File names start with the
+    submission time, so jobs are claimed oldest first.
+    """
+
+    STATES = ('incoming', 'processing', 'done', 'failed')
+
+    def __init__(self, root: str):
+        """
+        Initialize the queue, creating its directories.
+
+        Args:
+            root: Queue directory
+        """
+        self.root = Path(root)
+        for state in self.STATES:
+            (self.root / state).mkdir(parents=True, exist_ok=True)
+
+    def submit(self, job: Job) -> str:
+        """Add a job to the queue.
+
+        Args:
+            job: JSON serializable job, e.g. {'type': 'cat_prod', 'limit': 0}
+
+        Returns:
+            Job id
+        """
+        job_id = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{uuid.uuid4().hex[:8]}"
+        # Written under a name claim() ignores, then renamed in one step
+        tmp_path = self.root / 'incoming' / f".{job_id}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path('incoming', job_id))
+        return job_id
+
+    def claim(self) -> Optional[Tuple[str, Job]]:
+        """Take the oldest waiting job.
+
+        Returns:
+            (job id, job) or None if the queue is empty
+        """
+        for path in sorted((self.root / 'incoming').glob('*.json')):
+            job_id = path.stem
+            target = self._path('processing', job_id)
+            try:
+                os.rename(path, target)
+            except OSError:
+                continue  # Claimed by another daemon
+            try:
+                with open(target, 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+            except json.JSONDecodeError as e:
+                self.finish(job_id, {'error': f"Invalid job file: {e}"}, failed=True)
+                continue
+            if not isinstance(job, dict):
+                self.finish(job_id, {'error': "A job must be a JSON object"}, failed=True)
+                continue
+            return job_id, job
+        return None
+
+    def finish(self, job_id: str, result: Dict[str, Any], failed: bool = False) -> None:
+        """Move a claimed job to done/ or failed/ with its result.
+
+        Args:
+            job_id: Id returned by claim()
+            result: JSON serializable result, stored next to the job
+            failed: Whether the job failed
+        """
+        state = 'failed' if failed else 'done'
+        result_path = self.root / state / f"{job_id}.result.json"
+        with open(result_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(self._path('processing', job_id), self._path(state, job_id))
+
+    def recover(self) -> int:
+        """Requeue jobs left in processing/ by a daemon that stopped mid-job.
+
+        Only call this when no other daemon is using the queue.
+
+        Returns:
+            Number of requeued jobs
+        """
+        paths = list((self.root / 'processing').glob('*.json'))
+        for path in paths:
+            os.replace(path, self.root / 'incoming' / path.name)
+        return len(paths)
+
+    def pending(self) -> List[str]:
+        """Ids of the jobs waiting in incoming/, oldest first."""
+        return [path.stem for path in sorted((self.root / 'incoming').glob('*.json'))]
+
+    def _path(self, state: str, job_id: str) -> Path:
+        return self.root / state / f"{job_id}.json"
+
+
+class ExportDaemon:
+    """Long-running worker executing jobs from a JobQueue.
+
+    The process stays up between jobs, so the ADS assembly, the parsed
+    mappings and the pooled connections are reused instead of being set up
+    again for every export. Up to concurrency jobs run at once; jobs of the
+    same type run one after another, since they share state files
+    (snapshots, checkpoints).
+    """
+
+    def __init__(self, queue: JobQueue, handler: JobHandler, concurrency: int = 2,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Initialize the daemon.
+
+        Args:
+            queue: Queue to take jobs from
+            handler: Runs one job (with its 'id' added) and returns its JSON
+                serializable result; exceptions mark the job as failed
+            concurrency: Jobs running at the same time
+            poll_interval: Seconds to wait when the queue is empty
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.completed = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._type_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def run(self, max_jobs: Optional[int] = None) -> None:
+        """Process jobs until stop() is called.
+
+        Args:
+            max_jobs: Return after claiming this many jobs (None runs forever)
+        """
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"Requeued {recovered} interrupted jobs")
+
+        claimed = 0
+        running: List[Future] = []
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='export-job') as executor:
+            while not self._stop.is_set() and (max_jobs is None or claimed < max_jobs):
+                running = [future for future in running if not future.done()]
+                if len(running) >= self.concurrency:
+                    self._stop.wait(0.05)
+                    continue
+                job = self.queue.claim()
+                if job is None:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                claimed += 1
+                running.append(executor.submit(self._run_job, *job))
+
+    def stop(self) -> None:
+        """Stop claiming jobs; run() returns once the running jobs finish."""
+        self._stop.set()
+
+    def _run_job(self, job_id: str, job: Job) -> None:
+        job_type = str(job.get('type'))
+        with self._lock:
+            type_lock = self._type_locks.setdefault(job_type, threading.Lock())
+
+        with type_lock:
+            started = time.perf_counter()
+            print(f"[{datetime.now():%H:%M:%S}] Job {job_id} ({job_type}) started")
+            try:
+                result = dict(self.handler(dict(job, id=job_id)) or {})
+            except Exception as e:
+                seconds = time.perf_counter() - started
+                self.queue.finish(job_id, {'error': str(e), 'traceback': traceback.format_exc(),
+                                           'seconds': round(seconds, 3)}, failed=True)
+                with self._lock:
+                    self.failed += 1
+                print(f"[{datetime.now():%H:%M:%S}] Job {job_id} failed after {seconds:.2f}s: {e}")
+                return
+
+            seconds = time.perf_counter() - started
+            result['seconds'] = round(seconds, 3)
+            self.queue.finish(job_id, result)
+            with self._lock:
+                self.completed += 1
+            print(f"[{datetime.now():%H:%M:%S}] Job {job_id} done in {seconds:.2f}s")
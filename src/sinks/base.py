@@ -0,0 +1,223 @@
+import gzip
+import io
+import os
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional
+
+# Compression codecs and the file suffix they add
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# Buffer size of the output streams
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def open_output(path: str, compression: Optional[str] = None, level: Optional[int] = None) -> BinaryIO:
+    """Open a binary output stream, compressed on the fly if requested.
+
+    Args:
+        path: File to write
+        compression: None, 'gzip' or 'zstd'
+        level: Compression level, codec default if None
+
+    Returns:
+        Writable binary stream; closing it finishes the compressed frame
+    """
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression '{compression}', expected one of {list(COMPRESSION_SUFFIXES)}")
+
+    raw = open(path, 'wb', buffering=WRITE_BUFFER_SIZE)
+    if compression == 'gzip':
+        # Level 6 is close to 9 in size and much faster
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6 if level is None else level, mtime=0)
+    if compression == 'zstd':
+        try:
+            # Optional dependency, imported only for .zst output
+            import zstandard
+        except ImportError:
+            raw.close()
+            raise RuntimeError("zstd compression requires the 'zstandard' package (pip install zstandard)")
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        return compressor.stream_writer(raw, closefd=True)
+    return raw
+
+
+class Sink:
+    """Destination for a stream of records.
+
+    A sink is opened, receives records one at a time or in batches, and is
+    closed; used as a context manager it is closed on success and aborted
+    on error. Subclasses implement _open, _write_batch and _close (and
+    optionally _abort), and set bytes_written when the output size is known.
+
+    elapsed is the wall time from open to close; write_ns only counts the
+    time spent inside the sink, so it excludes producing the records.
+    """
+
+    def __init__(self):
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+        self.write_ns = 0
+        self.write_calls = 0
+        self._is_open = False
+
+    def open(self) -> 'Sink':
+        """Prepare the destination; called by __enter__."""
+        if not self._is_open:
+            self.started_at = time.perf_counter()
+            start = time.perf_counter_ns()
+            self._open()
+            self.write_ns += time.perf_counter_ns() - start
+            self._is_open = True
+        return self
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Write one record."""
+        self.write_batch((record,))
+
+    def write_batch(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Write a batch of records."""
+        if not self._is_open:
+            self.open()
+        start = time.perf_counter_ns()
+        self.rows_written += self._write_batch(records)
+        self.write_ns += time.perf_counter_ns() - start
+        self.write_calls += 1
+
+    def write_columns(self, batch) -> None:
+        """Write a ColumnBatch; sinks that need records materialize them."""
+        if not self._is_open:
+            self.open()
+        start = time.perf_counter_ns()
+        self.rows_written += self._write_columns(batch)
+        self.write_ns += time.perf_counter_ns() - start
+        self.write_calls += 1
+
+    def consume(self, records: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """Write a whole record stream, batch_size records at a time.
+
+        Args:
+            records: Records to write, consumed lazily
+            batch_size: Records buffered per write
+
+        Returns:
+            Number of records written by this call
+        """
+        before = self.rows_written
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+        return self.rows_written - before
+
+    def close(self) -> None:
+        """Flush and finish the destination."""
+        if self._is_open:
+            self._is_open = False
+            start = time.perf_counter_ns()
+            self._close()
+            self.write_ns += time.perf_counter_ns() - start
+            self.elapsed = time.perf_counter() - self.started_at
+
+    def abort(self) -> None:
+        """Discard the output after an error."""
+        if self._is_open:
+            self._is_open = False
+            self._abort()
+
+    @property
+    def outputs(self) -> List[str]:
+        """Destinations written by the sink (files, URLs, tables)."""
+        return []
+
+    @property
+    def rows_per_second(self) -> float:
+        """Write throughput of the finished sink."""
+        return self.rows_written / self.elapsed if self.elapsed else 0.0
+
+    def __enter__(self) -> 'Sink':
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _open(self) -> None:
+        pass
+
+    def _write_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        raise NotImplementedError
+
+    def _write_columns(self, batch) -> int:
+        return self._write_batch(batch.to_records())
+
+    def _close(self) -> None:
+        pass
+
+    def _abort(self) -> None:
+        self._close()
+
+
+class FileSink(Sink):
+    """Sink writing text to a (possibly compressed) file.
+
+    Output goes to '<path>.part' and is renamed to path on close, so a
+    failed export never leaves a truncated file under the final name.
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, level: Optional[int] = None):
+        """
+        Initialize the sink.
+
+        Args:
+            path: Output file; the compression suffix is added if missing
+            compression: None, 'gzip' or 'zstd'
+            level: Compression level, codec default if None
+        """
+        super().__init__()
+        suffix = COMPRESSION_SUFFIXES.get(compression, '')
+        self.path = Path(path if not suffix or str(path).endswith(suffix) else f"{path}{suffix}")
+        self.compression = compression
+        self.level = level
+        self._stream: Optional[BinaryIO] = None
+        self._text: Optional[io.TextIOWrapper] = None
+
+    @property
+    def temp_path(self) -> Path:
+        return self.path.with_name(self.path.name + '.part')
+
+    @property
+    def outputs(self) -> List[str]:
+        return [str(self.path)]
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stream = open_output(str(self.temp_path), self.compression, self.level)
+        self._text = io.TextIOWrapper(self._stream, encoding='utf-8', newline='\n', write_through=False)
+        self._write_header()
+
+    def _close(self) -> None:
+        self._write_footer()
+        self._text.close()
+        os.replace(self.temp_path, self.path)
+        self.bytes_written = self.path.stat().st_size
+
+    def _abort(self) -> None:
+        try:
+            self._text.close()
+        finally:
+            self.temp_path.unlink(missing_ok=True)
+
+    def _write_header(self) -> None:
+        pass
+
+    def _write_footer(self) -> None:
+        pass
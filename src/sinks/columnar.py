@@ -0,0 +1,249 @@
+import csv
+import os
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .base import FileSink
+
+if TYPE_CHECKING:
+    import pyarrow
+
+# Output schema as (field, mapping type) pairs, see MappingManager.get_output_schema
+Schema = Sequence[Tuple[str, str]]
+
+# Rows per Parquet row group / Arrow record batch
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+
+def arrow_schema(schema: Schema, integer_fields: Sequence[str] = ()) -> 'pyarrow.Schema':
+    """Build an Arrow schema from mapping types.
+
+    'number' fields become float64, since mapped numbers may be int or
+    float, except those in integer_fields (e.g. the Folio key), which
+    become int64; every other type becomes string.
+
+    Args:
+        schema: (field, mapping type) pairs
+        integer_fields: 'number' fields known to hold whole numbers only
+
+    Returns:
+        pyarrow.Schema with nullable fields in the same order
+    """
+    pa = _pyarrow()
+    integers = set(integer_fields)
+
+    def arrow_type(name: str, field_type: str) -> 'pyarrow.DataType':
+        if field_type != 'number':
+            return pa.string()
+        return pa.int64() if name in integers else pa.float64()
+
+    return pa.schema([(name, arrow_type(name, field_type)) for name, field_type in schema])
+
+
+def _pyarrow():
+    # Optional dependency and slow to import, so loaded on first use
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet/Arrow output requires the 'pyarrow' package (pip install pyarrow)")
+    return pyarrow
+
+
+class _ArrowSink(FileSink):
+    """Shared buffering of records into Arrow row groups."""
+
+    def __init__(self, path: str, schema: Schema, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 integer_fields: Sequence[str] = ()):
+        self._pa = _pyarrow()
+        super().__init__(path)
+        self.schema = arrow_schema(schema, integer_fields)
+        self.row_group_size = row_group_size
+        self._names = self.schema.names
+        self._buffer: List[Dict[str, Any]] = []
+        self._tables: List['pyarrow.Table'] = []
+        self._buffered = 0
+        self._writer = None
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = self._open_writer(str(self.temp_path))
+
+    def _write_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        if self._tables:
+            self._flush_tables(final=True)
+        before = len(self._buffer)
+        self._buffer.extend(records)
+        written = len(self._buffer) - before
+        while len(self._buffer) >= self.row_group_size:
+            self._flush(self._buffer[:self.row_group_size])
+            del self._buffer[:self.row_group_size]
+        return written
+
+    def _write_columns(self, batch) -> int:
+        # Arrays go to Arrow as they are, buffered as tables until a row group is full
+        if self._buffer:
+            self._tables.append(self._records_table(self._buffer))
+            self._buffered += len(self._buffer)
+            self._buffer = []
+        self._tables.append(self._columns_table(batch))
+        self._buffered += len(batch)
+        if self._buffered >= self.row_group_size:
+            self._flush_tables(final=False)
+        return len(batch)
+
+    def _columns_table(self, batch) -> 'pyarrow.Table':
+        pa = self._pa
+        columns = []
+        for name, field in zip(self._names, self.schema):
+            if name not in batch.columns:
+                columns.append(pa.nulls(len(batch), type=field.type))
+                continue
+            values = batch.columns[name]
+            if pa.types.is_floating(field.type) and values.dtype.kind in 'iub':
+                values = values.astype('float64')
+            elif pa.types.is_integer(field.type) and values.dtype.kind != 'i':
+                values = values.astype('int64')
+            columns.append(pa.array(values, type=field.type, mask=batch.nulls.get(name)))
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def _flush_tables(self, final: bool) -> None:
+        """Write the buffered tables in full row groups, the remainder too if final."""
+        table = self._pa.concat_tables(self._tables)
+        full = len(table) if final else len(table) - len(table) % self.row_group_size
+        for start in range(0, full, self.row_group_size):
+            self._writer.write_table(table.slice(start, min(self.row_group_size, full - start)))
+        rest = table.slice(full)
+        self._tables = [rest] if len(rest) else []
+        self._buffered = len(rest)
+
+    def _flush(self, records: List[Dict[str, Any]]) -> None:
+        self._writer.write_table(self._records_table(records))
+
+    def _records_table(self, records: List[Dict[str, Any]]) -> 'pyarrow.Table':
+        pa = self._pa
+        columns = [pa.array([record.get(name) for record in records], type=field.type)
+                   for name, field in zip(self._names, self.schema)]
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def _close(self) -> None:
+        if self._tables:
+            self._flush_tables(final=True)
+        if self._buffer:
+            self._flush(self._buffer)
+            self._buffer = []
+        self._writer.close()
+        os.replace(self.temp_path, self.path)
+        self.bytes_written = self.path.stat().st_size
+
+    def _abort(self) -> None:
+        self._buffer = []
+        self._tables = []
+        try:
+            self._writer.close()
+        finally:
+            self.temp_path.unlink(missing_ok=True)
+
+    def _open_writer(self, path: str):
+        raise NotImplementedError
+
+
+class ParquetSink(_ArrowSink):
+    """Write records to a Parquet file, one row group per row_group_size records."""
+
+    def __init__(self, path: str, schema: Schema, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 codec: Optional[str] = 'snappy', integer_fields: Sequence[str] = ()):
+        """
+        Initialize the sink.
+
+        Args:
+            path: Output file
+            schema: (field, mapping type) pairs of the records
+            row_group_size: Records per row group
+            codec: Parquet compression codec (snappy, zstd, gzip or None)
+            integer_fields: 'number' fields written as int64 instead of float64
+        """
+        super().__init__(path, schema, row_group_size, integer_fields)
+        self.codec = codec
+
+    def _open_writer(self, path: str):
+        return self._pa.parquet.ParquetWriter(path, self.schema, compression=self.codec or 'none')
+
+
+class ArrowIPCSink(_ArrowSink):
+    """Write records to an Arrow IPC (Feather v2) file in record batches."""
+
+    def __init__(self, path: str, schema: Schema, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 codec: Optional[str] = None, integer_fields: Sequence[str] = ()):
+        """
+        Initialize the sink.
+
+        Args:
+            path: Output file
+            schema: (field, mapping type) pairs of the records
+            row_group_size: Records per record batch
+            codec: IPC buffer compression (lz4 or zstd), None for uncompressed
+            integer_fields: 'number' fields written as int64 instead of float64
+        """
+        if codec not in (None, 'lz4', 'zstd'):
+            raise ValueError(f"Arrow IPC supports lz4 or zstd compression, got '{codec}'")
+        super().__init__(path, schema, row_group_size, integer_fields)
+        self.codec = codec
+
+    def _open_writer(self, path: str):
+        ipc = self._pa.ipc
+        return ipc.new_file(path, self.schema, options=ipc.IpcWriteOptions(compression=self.codec))
+
+
+class CSVSink(FileSink):
+    """Write records as CSV rows with a header line.
+
+    Columns come from the schema, or from the keys of the first record.
+    Missing values and NULL are written as empty fields.
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, level: Optional[int] = None,
+                 schema: Optional[Schema] = None, delimiter: str = ','):
+        """
+        Initialize the sink.
+
+        Args:
+            path: Output file
+            compression: None, 'gzip' or 'zstd'
+            level: Compression level, codec default if None
+            schema: Optional (field, mapping type) pairs fixing the columns
+            delimiter: Field separator
+        """
+        super().__init__(path, compression, level)
+        self.fieldnames = [name for name, _ in schema] if schema else None
+        self.delimiter = delimiter
+        self._writer = None
+
+    def _write_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        records = list(records)
+        if not records:
+            return 0
+        if self._writer is None:
+            if self.fieldnames is None:
+                self.fieldnames = list(records[0])
+            self._writer = csv.writer(self._text, delimiter=self.delimiter, lineterminator='\n')
+            self._writer.writerow(self.fieldnames)
+        names = self.fieldnames
+        self._writer.writerows([[record.get(name) for name in names] for record in records])
+        return len(records)
+
+    def _write_columns(self, batch) -> int:
+        if not len(batch):
+            return 0
+        if self._writer is None:
+            if self.fieldnames is None:
+                self.fieldnames = batch.names
+            self._writer = csv.writer(self._text, delimiter=self.delimiter, lineterminator='\n')
+            self._writer.writerow(self.fieldnames)
+        self._writer.writerows(batch.to_tuples(self.fieldnames))
+        return len(batch)
+
+    def _write_footer(self) -> None:
+        # Header only, for an export without rows
+        if self._writer is None and self.fieldnames:
+            csv.writer(self._text, delimiter=self.delimiter, lineterminator='\n').writerow(self.fieldnames)
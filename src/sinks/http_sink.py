@@ -0,0 +1,167 @@
+import gzip
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .base import Sink
+
+# Responses worth retrying: throttling and transient gateway/server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HTTPBatchSink(Sink):
+    """POST records to an HTTP endpoint in large, gzip-compressed batches.
+
+    Each request carries one batch as
+    {"table": ..., "key": [...], "records": [...]}, so the receiver can
+    upsert on the key; that also makes retried batches harmless. Batches
+    are sent by a small thread pool, each thread keeping its own
+    keep-alive session. Failed requests are retried with exponential
+    backoff (honouring Retry-After); a batch that still fails aborts the
+    export with RuntimeError.
+    """
+
+    def __init__(self, url: str, table: str, key: Optional[Sequence[str]] = None, batch_size: int = 5000,
+                 workers: int = 4, compress: bool = True, max_retries: int = 5, backoff: float = 0.5,
+                 timeout: float = 60.0, headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize the sink.
+
+        Args:
+            url: Endpoint receiving the batches; '{table}' is replaced by table
+            table: Target table of the records (mappings.json target_table)
+            key: Fields identifying a record in the target table
+            batch_size: Records per request
+            workers: Requests in flight at the same time
+            compress: Send gzip-compressed bodies
+            max_retries: Retries per batch before giving up
+            backoff: Delay before the first retry in seconds, doubled on each retry
+            timeout: Seconds to wait for each response
+            headers: Extra request headers (e.g. Authorization)
+        """
+        super().__init__()
+        if batch_size < 1 or workers < 1:
+            raise ValueError("batch_size and workers must be at least 1")
+        self.url = url.replace('{table}', table)
+        self.table = table
+        self.key = list(key or [])
+        self.batch_size = batch_size
+        self.workers = workers
+        self.compress = compress
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json; charset=utf-8', **(headers or {})}
+        if compress:
+            self.headers['Content-Encoding'] = 'gzip'
+        self.batches_sent = 0
+        self.retries = 0
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+        self._buffer: List[Dict[str, Any]] = []
+        self._pending: Deque[Future] = deque()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._lock = threading.Lock()
+
+    @property
+    def outputs(self) -> List[str]:
+        return [self.url]
+
+    def _open(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='http-sink')
+
+    def _write_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        before = len(self._buffer)
+        self._buffer.extend(records)
+        written = len(self._buffer) - before
+        while len(self._buffer) >= self.batch_size:
+            self._submit(self._buffer[:self.batch_size])
+            del self._buffer[:self.batch_size]
+        return written
+
+    def _submit(self, records: List[Dict[str, Any]]) -> None:
+        # Bound the batches held in memory; also surfaces failures early
+        while len(self._pending) >= self.workers * 2:
+            self._pending.popleft().result()
+        self._pending.append(self._executor.submit(self._send, records))
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            session.headers.update(self.headers)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _send(self, records: List[Dict[str, Any]]) -> None:
+        body = self._encode({'table': self.table, 'key': self.key, 'records': records}).encode('utf-8')
+        if self.compress:
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+        session = self._session()
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = session.post(self.url, data=body, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    with self._lock:
+                        self.batches_sent += 1
+                        self.bytes_written += len(body)
+                    return
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get('Retry-After')
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            except requests.HTTPError as e:
+                raise RuntimeError(f"Target rejected a batch of {len(records)} records for {self.table}: {e}") from e
+
+            if attempt == self.max_retries:
+                break
+            with self._lock:
+                self.retries += 1
+            time.sleep(self._retry_delay(attempt, retry_after))
+
+        raise RuntimeError(f"Could not send a batch of {len(records)} records to {self.url} "
+                           f"after {self.max_retries + 1} attempts: {error}")
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Jitter keeps concurrent workers from retrying in lockstep
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _close(self) -> None:
+        try:
+            if self._buffer:
+                self._submit(self._buffer)
+                self._buffer = []
+            while self._pending:
+                self._pending.popleft().result()
+        finally:
+            self._shutdown()
+
+    def _abort(self) -> None:
+        self._buffer = []
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._shutdown()
+
+    def _shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+        for session in self._sessions:
+            session.close()
+        self._sessions = []
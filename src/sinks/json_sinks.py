@@ -0,0 +1,62 @@
+import json
+from typing import Any, Dict, Iterable, Optional
+
+from .base import FileSink
+
+
+class JSONArraySink(FileSink):
+    """Write records as one JSON array, element by element.
+
+    The output is a regular JSON document, but it is produced while the
+    records stream in, so memory does not grow with the export size.
+    Values JSON cannot represent (dates, decimals) are written as strings.
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, level: Optional[int] = None,
+                 indent: Optional[int] = None):
+        """
+        Initialize the sink.
+
+        Args:
+            path: Output file
+            compression: None, 'gzip' or 'zstd'
+            level: Compression level, codec default if None
+            indent: Indent records like json.dump(indent=...); compact if None
+        """
+        super().__init__(path, compression, level)
+        self.indent = indent
+        if indent is None:
+            self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+        else:
+            encode = json.JSONEncoder(ensure_ascii=False, indent=indent, default=str).encode
+            pad = '\n' + ' ' * indent
+            # Nest every record one level inside the array
+            self._encode = lambda record: pad + encode(record).replace('\n', pad)
+
+    def _write_header(self) -> None:
+        self._text.write('[')
+
+    def _write_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        encoded = [self._encode(record) for record in records]
+        if not encoded:
+            return 0
+        prefix = ',' if self.rows_written else ''
+        self._text.write(prefix + ','.join(encoded))
+        return len(encoded)
+
+    def _write_footer(self) -> None:
+        self._text.write('\n]' if self.indent is not None and self.rows_written else ']')
+
+
+class NDJSONSink(FileSink):
+    """Write one JSON object per line (newline-delimited JSON)."""
+
+    def __init__(self, path: str, compression: Optional[str] = None, level: Optional[int] = None):
+        super().__init__(path, compression, level)
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+
+    def _write_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        encoded = [self._encode(record) for record in records]
+        if encoded:
+            self._text.write('\n'.join(encoded) + '\n')
+        return len(encoded)
@@ -0,0 +1,109 @@
+from typing import Any, Dict, Optional, Sequence
+
+from .base import COMPRESSION_SUFFIXES, Sink
+from .columnar import ArrowIPCSink, CSVSink, ParquetSink, Schema
+from .json_sinks import JSONArraySink, NDJSONSink
+from .split import SplitSink
+from .sqlite_sink import SQLiteSink
+
+# Sink class and file extension per output format
+SINK_FORMATS: Dict[str, Any] = {
+    'json': (JSONArraySink, '.json'),
+    'ndjson': (NDJSONSink, '.ndjson'),
+    'csv': (CSVSink, '.csv'),
+    'parquet': (ParquetSink, '.parquet'),
+    'arrow': (ArrowIPCSink, '.arrow'),
+}
+
+# Formats that can hold nested records (a sale with its 'detalles' list)
+NESTED_FORMATS = ('json', 'ndjson')
+
+# Formats compressed internally, by the codec option instead of a file suffix
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+# Formats loading into a table of the target system instead of a file
+TARGET_FORMATS = ('http', 'sqlite')
+
+
+def create_sink(base_path: str, output_format: str = 'json', compression: Optional[str] = None,
+                schema: Optional[Schema] = None, **options: Any) -> Sink:
+    """Create a file sink for an output format.
+
+    Args:
+        base_path: Output path without extension
+        output_format: One of SINK_FORMATS
+        compression: None, 'gzip' or 'zstd'; for Parquet/Arrow it selects
+            the internal codec instead
+        schema: (field, mapping type) pairs, required for Parquet/Arrow and
+            used as the CSV columns
+        **options: Extra arguments of the sink class (e.g. indent)
+
+    Returns:
+        Unopened sink writing to base_path + extension (+ compression suffix)
+    """
+    if output_format not in SINK_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {list(SINK_FORMATS)}")
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression '{compression}', expected one of {list(COMPRESSION_SUFFIXES)}")
+    sink_class, extension = SINK_FORMATS[output_format]
+    path = f"{base_path}{extension}"
+
+    if output_format in COLUMNAR_FORMATS:
+        if schema is None:
+            raise ValueError(f"The {output_format} format needs the output schema")
+        if compression is not None:
+            options.setdefault('codec', compression)
+        return sink_class(path, schema, **options)
+    if output_format == 'csv':
+        return sink_class(path, compression=compression, schema=schema, **options)
+    return sink_class(path, compression=compression, **options)
+
+
+def create_split_sink(base_path: str, output_format: str, compression: Optional[str], parent_schema: Schema,
+                      child_schema: Schema, key: str = 'Folio', target: str = 'detalles',
+                      **options: Any) -> SplitSink:
+    """Create flat '<base>_headers' and '<base>_details' sinks for nested records.
+
+    Args:
+        base_path: Output path without extension
+        output_format: One of SINK_FORMATS
+        compression: As for create_sink
+        parent_schema: Schema of the records without their children
+        child_schema: Schema of the children, including key
+        key: Field linking the children to their parent
+        target: Field of the record holding the list of children
+        **options: Extra arguments of the sink classes
+
+    Returns:
+        Unopened SplitSink
+    """
+    parent = create_sink(f"{base_path}_headers", output_format, compression, parent_schema, **options)
+    child = create_sink(f"{base_path}_details", output_format, compression, child_schema, **options)
+    return SplitSink(parent, child, key, target)
+
+
+def create_target_sink(output_format: str, table: str, schema: Optional[Schema] = None,
+                       key: Optional[Sequence[str]] = None, **options: Any) -> Sink:
+    """Create a sink loading records into a table of the target system.
+
+    Args:
+        output_format: One of TARGET_FORMATS
+        table: Target table (mappings.json target_table)
+        schema: (field, mapping type) pairs of the records
+        key: Fields identifying a record in the table
+        **options: 'url' (and HTTPBatchSink options) for http, 'database' for sqlite
+
+    Returns:
+        Unopened HTTPBatchSink or SQLiteSink
+    """
+    if output_format == 'sqlite':
+        if 'database' not in options:
+            raise ValueError("The sqlite format needs a database path")
+        return SQLiteSink(options.pop('database'), table, schema, key, **options)
+    if output_format == 'http':
+        if not options.get('url'):
+            raise ValueError("The http format needs the target URL")
+        # Imported here so file exports do not load requests
+        from .http_sink import HTTPBatchSink
+        return HTTPBatchSink(options.pop('url'), table, key, **options)
+    raise ValueError(f"Unknown target format '{output_format}', expected one of {list(TARGET_FORMATS)}")
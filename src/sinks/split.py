@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterable, List
+
+from .base import Sink
+
+
+class SplitSink(Sink):
+    """Write nested records as flat parent and child outputs.
+
+    Each record's child list (e.g. a sale's 'detalles') goes to the child
+    sink and the rest of the record to the parent sink. Children keep the
+    key they share with the parent (e.g. 'Folio'), so both outputs can be
+    joined again.
+    """
+
+    def __init__(self, parent: Sink, child: Sink, key: str = 'Folio', target: str = 'detalles'):
+        """
+        Initialize the sink.
+
+        Args:
+            parent: Sink receiving the records without their children
+            child: Sink receiving the children
+            key: Field linking the children to their parent
+            target: Field of the record holding the list of children
+        """
+        super().__init__()
+        self.parent = parent
+        self.child = child
+        self.key = key
+        self.target = target
+
+    @property
+    def outputs(self) -> List[str]:
+        return self.parent.outputs + self.child.outputs
+
+    def _open(self) -> None:
+        self.parent.open()
+        self.child.open()
+
+    def _write_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        key, target = self.key, self.target
+        parents = []
+        children = []
+        for record in records:
+            record = dict(record)
+            nested = record.pop(target, None) or ()
+            for child in nested:
+                if key not in child:
+                    child = dict(child, **{key: record.get(key)})
+                children.append(child)
+            parents.append(record)
+        self.parent.write_batch(parents)
+        if children:
+            self.child.write_batch(children)
+        return len(parents)
+
+    def _close(self) -> None:
+        try:
+            self.parent.close()
+        finally:
+            self.child.close()
+        self.bytes_written = self.parent.bytes_written + self.child.bytes_written
+
+    def _abort(self) -> None:
+        try:
+            self.parent.abort()
+        finally:
+            self.child.abort()
@@ -0,0 +1,107 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .base import Sink
+
+# SQLite column type per mapping type
+SQLITE_TYPES = {'number': 'REAL', 'string': 'TEXT'}
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_sqlite(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bytes)):
+        return value
+    if isinstance(value, (list, dict)):
+        # Nested data (e.g. a sale's 'detalles') is stored as JSON text
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+    return str(value)
+
+
+class SQLiteSink(Sink):
+    """Upsert records into a SQLite table with executemany.
+
+    The table is created on first write from the mapping schema, plus a
+    TEXT column for any other field of the first record. With a key, rows
+    are upserted on it, so re-running an export updates instead of
+    duplicating. Each batch is one transaction. Also serves as a local
+    stand-in for the target system when testing.
+    """
+
+    def __init__(self, database: str, table: str, schema: Optional[Sequence[Tuple[str, str]]] = None,
+                 key: Optional[Sequence[str]] = None):
+        """
+        Initialize the sink.
+
+        Args:
+            database: SQLite database file, created if missing
+            table: Table receiving the records (mappings.json target_table)
+            schema: (field, mapping type) pairs of the records
+            key: Fields identifying a record, used as the primary key
+        """
+        super().__init__()
+        self.database = str(database)
+        self.table = table
+        self.schema = list(schema or [])
+        self.key = list(key or [])
+        self.columns: List[str] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        self._sql: Optional[str] = None
+        self._row: Optional[Callable[[Dict[str, Any]], Tuple[Any, ...]]] = None
+
+    @property
+    def outputs(self) -> List[str]:
+        return [f"{self.database} ({self.table})"]
+
+    def _open(self) -> None:
+        Path(self.database).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.database)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+
+    def _prepare(self, first: Dict[str, Any]) -> None:
+        types = dict(self.schema)
+        self.columns = list(types) + [name for name in first if name not in types]
+        missing = [name for name in self.key if name not in self.columns]
+        if missing:
+            raise ValueError(f"Key fields {missing} are not in the records of {self.table}")
+
+        definitions = [f"{_quote(name)} {SQLITE_TYPES.get(types.get(name), 'TEXT')}" for name in self.columns]
+        if self.key:
+            definitions.append(f"PRIMARY KEY ({', '.join(_quote(name) for name in self.key)})")
+        with self._conn:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(self.table)} ({', '.join(definitions)})")
+
+        names = ', '.join(_quote(name) for name in self.columns)
+        placeholders = ', '.join('?' for _ in self.columns)
+        sql = f"INSERT INTO {_quote(self.table)} ({names}) VALUES ({placeholders})"
+        if self.key:
+            updates = [name for name in self.columns if name not in self.key]
+            if sqlite3.sqlite_version_info < (3, 24, 0):
+                sql = sql.replace('INSERT', 'INSERT OR REPLACE', 1)
+            elif updates:
+                assignments = ', '.join(f"{_quote(name)} = excluded.{_quote(name)}" for name in updates)
+                sql += f" ON CONFLICT ({', '.join(_quote(name) for name in self.key)}) DO UPDATE SET {assignments}"
+            else:
+                sql += ' ON CONFLICT DO NOTHING'
+        self._sql = sql
+
+        columns = self.columns
+        self._row = lambda record: tuple(_to_sqlite(record.get(name)) for name in columns)
+
+    def _write_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        records = list(records)
+        if not records:
+            return 0
+        if self._sql is None:
+            self._prepare(records[0])
+        with self._conn:
+            self._conn.executemany(self._sql, map(self._row, records))
+        return len(records)
+
+    def _close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,68 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class CheckpointStore:
+    """Small JSON state file holding one state dictionary per key.
+    
+    Keys are usually a job name plus the source directory, so the same file
+    can track several stores. Writes go to a temporary file that replaces
+    the original, so an interrupted run never leaves a truncated state.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the store.
+        
+        Args:
+            path: Path of the JSON state file; created on first save
+        """
+        self.path = Path(path)
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the stored state for a key.
+        
+        Args:
+            key: State key (e.g. 'ventas:C:\\pos\\data')
+            
+        Returns:
+            State dictionary or None if nothing was stored yet
+        """
+        return self._read().get(key)
+
+    def save(self, key: str, state: Dict[str, Any]) -> None:
+        """Store the state for a key, keeping the other keys.
+        
+        Args:
+            key: State key
+            state: JSON serializable state dictionary
+        """
+        data = self._read()
+        data[key] = dict(state, updated_at=datetime.now().isoformat(timespec='seconds'))
+        self.save_all(data)
+
+    def clear(self, key: str) -> None:
+        """Forget the state for a key so the next run starts from scratch."""
+        data = self._read()
+        if data.pop(key, None) is not None:
+            self.save_all(data)
+
+    def save_all(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the whole state file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            raise ValueError(f"Invalid JSON format in checkpoint file {self.path}")
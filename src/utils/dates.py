@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from typing import Any, Optional
+
+# Stored format of text dates (e.g. a character F_EMISION): month first, as
+# ADS formats DateTime values ('03/20/2025 12:00:00 a. m.') and as the VENTAS
+# filter strings are written. The time part, if any, is ignored.
+DBF_DATE_FORMAT = '%m/%d/%Y'
+
+
+def parse_fecha(value: Any) -> Optional[datetime]:
+    """Parse a mapped date value into a datetime.
+
+    The single parser of text dates: filters, watermarks and aggregates all
+    go through it. Accepts datetime/date objects, ISO strings ('YYYY-MM-DD
+    HH:MM:SS', as produced for string mappings) and DBF_DATE_FORMAT strings
+    such as '03/20/2025 12:00:00 a. m.' (the time part is ignored for the
+    latter).
+
+    Args:
+        value: Value to parse
+
+    Returns:
+        datetime or None if the value is empty or not a date
+    """
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if not isinstance(value, str) or not value.strip():
+        return None
+
+    text = value.strip()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(text[:10], DBF_DATE_FORMAT)
+    except ValueError:
+        return None
@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Stages in pipeline order; reports list them first, other stages after
+STAGES = ('connect', 'replica', 'cache', 'filter_setup', 'read', 'convert', 'transform', 'join', 'aggregate', 'write')
+
+# Prefix of the Prometheus metric names
+METRIC_PREFIX = 'dbf_bridge'
+
+
+@dataclass
+class StageMetrics:
+    """Totals of one pipeline stage."""
+    calls: int = 0
+    rows: int = 0
+    bytes: int = 0
+    duration_ns: int = 0
+
+    @property
+    def seconds(self) -> float:
+        return self.duration_ns / 1e9
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        return self.rows / self.seconds if self.duration_ns and self.rows else None
+
+    @property
+    def bytes_per_second(self) -> Optional[float]:
+        return self.bytes / self.seconds if self.duration_ns and self.bytes else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'seconds': round(self.seconds, 6),
+            'rows_per_second': _round(self.rows_per_second),
+            'bytes_per_second': _round(self.bytes_per_second),
+        }
+
+
+class RunMetrics:
+    """Per-stage durations, rows and bytes of one export run.
+
+    Stages add their time as they go (from any thread); durations come
+    from time.perf_counter_ns, a monotonic high-resolution clock. Stage
+    times are exclusive where the code allows it: 'read' is the time spent
+    advancing the ADS cursor, 'convert' fetching and converting the field
+    values, 'join' the join itself without reading its inputs. The report
+    can be written as JSON or in the Prometheus textfile format.
+    """
+
+    def __init__(self, run: str = 'export', labels: Optional[Dict[str, str]] = None):
+        """
+        Initialize an empty report and start the run clock.
+
+        Args:
+            run: Name of the run (e.g. the job type)
+            labels: Extra labels of the report (e.g. host, source directory)
+        """
+        self.run = run
+        self.labels = dict(labels or {})
+        self.stages: Dict[str, StageMetrics] = {}
+        self.started_at = datetime.now()
+        self.rows: Optional[int] = None
+        self.success: Optional[bool] = None
+        self._start_ns = time.perf_counter_ns()
+        self._end_ns: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, duration_ns: int, rows: int = 0, bytes: int = 0, calls: int = 1) -> None:
+        """Add measured work to a stage."""
+        with self._lock:
+            metrics = self.stages.get(stage)
+            if metrics is None:
+                metrics = self.stages[stage] = StageMetrics()
+            metrics.calls += calls
+            metrics.rows += rows
+            metrics.bytes += bytes
+            metrics.duration_ns += duration_ns
+
+    def stage(self, name: str, rows: int = 0, bytes: int = 0) -> '_StageTimer':
+        """Time a with block as part of a stage.
+
+        The timer's rows and bytes can be updated inside the block.
+        """
+        return _StageTimer(self, name, rows, bytes)
+
+    def add_sink(self, sink) -> None:
+        """Record a closed sink's write time, rows and bytes as the 'write' stage."""
+        self.add('write', sink.write_ns, sink.rows_written, sink.bytes_written, calls=sink.write_calls)
+
+    def finish(self, success: bool = True, rows: Optional[int] = None) -> None:
+        """Stop the run clock.
+
+        Args:
+            success: Whether the run completed
+            rows: Records exported by the run
+        """
+        self._end_ns = time.perf_counter_ns()
+        self.success = success
+        if rows is not None:
+            self.rows = rows
+
+    @property
+    def seconds(self) -> float:
+        """Wall time of the run, up to now if it has not finished."""
+        return ((self._end_ns or time.perf_counter_ns()) - self._start_ns) / 1e9
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Machine-readable run report."""
+        with self._lock:
+            stages = {name: metrics.to_dict() for name, metrics in self._ordered()}
+        return {
+            'run': self.run,
+            'labels': self.labels,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'seconds': round(self.seconds, 6),
+            'success': self.success,
+            'rows': self.rows,
+            'stages': stages,
+        }
+
+    def to_prometheus(self) -> str:
+        """Run report in the Prometheus text exposition format."""
+        base = {'run': self.run, **self.labels}
+        lines = []
+
+        def metric(name: str, help_text: str, kind: str, samples: Iterable) -> None:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{METRIC_PREFIX}_{name}{{{_labels(labels)}}} {_number(value)}")
+
+        with self._lock:
+            stages = [(dict(base, stage=name), metrics) for name, metrics in self._ordered()]
+        metric('run_duration_seconds', 'Wall time of the last run.', 'gauge', [(base, self.seconds)])
+        metric('run_rows', 'Records exported by the last run.', 'gauge', [(base, self.rows or 0)])
+        metric('run_success', 'Whether the last run completed (1) or failed (0).', 'gauge',
+               [(base, 1 if self.success else 0)])
+        metric('run_timestamp_seconds', 'Start of the last run, Unix time.', 'gauge',
+               [(base, self.started_at.timestamp())])
+        metric('stage_duration_seconds', 'Time spent in each stage of the last run.', 'gauge',
+               [(labels, m.seconds) for labels, m in stages])
+        metric('stage_rows', 'Rows processed by each stage of the last run.', 'gauge',
+               [(labels, m.rows) for labels, m in stages])
+        metric('stage_bytes', 'Bytes read or written by each stage of the last run.', 'gauge',
+               [(labels, m.bytes) for labels, m in stages])
+        metric('stage_rows_per_second', 'Throughput of each stage of the last run.', 'gauge',
+               [(labels, m.rows_per_second) for labels, m in stages if m.rows_per_second])
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path: str) -> None:
+        """Write the JSON run report."""
+        _write_atomic(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the report for the node_exporter textfile collector (*.prom)."""
+        _write_atomic(path, self.to_prometheus())
+
+    def _ordered(self) -> List:
+        known = [(name, self.stages[name]) for name in STAGES if name in self.stages]
+        return known + [(name, metrics) for name, metrics in self.stages.items() if name not in STAGES]
+
+
+class TimedIterator:
+    """Iterator wrapper measuring the time spent producing each item."""
+
+    def __init__(self, iterable: Iterable):
+        self._iterator = iter(iterable)
+        self.duration_ns = 0
+        self.count = 0
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self):
+        start = time.perf_counter_ns()
+        try:
+            item = next(self._iterator)
+        finally:
+            self.duration_ns += time.perf_counter_ns() - start
+        self.count += 1
+        return item
+
+    def close(self) -> None:
+        close = getattr(self._iterator, 'close', None)
+        if close is not None:
+            close()
+
+
+class _StageTimer:
+    """Context manager adding the time of a with block to a stage."""
+
+    def __init__(self, metrics: RunMetrics, stage: str, rows: int, bytes: int):
+        self.metrics = metrics
+        self.name = stage
+        self.rows = rows
+        self.bytes = bytes
+        self._start = 0
+
+    def __enter__(self) -> '_StageTimer':
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics.add(self.name, time.perf_counter_ns() - self._start, self.rows, self.bytes)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped))
+
+
+def _write_atomic(path: str, text: str) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+
+def content_hash(record: Any, digest_size: int = 16) -> str:
+    """Stable content hash of a JSON-like record.
+    
+    Args:
+        record: Record to hash (keys are sorted, so field order does not matter)
+        digest_size: Size of the digest in bytes
+        
+    Returns:
+        Hex digest
+    """
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=digest_size).hexdigest()
+
+
+class SnapshotStore:
+    """Per-key content hashes of the previous export of a table.
+    
+    The file holds the source directory it was taken from, so switching
+    sources starts from an empty snapshot instead of reporting every row
+    as changed or deleted.
+    """
+
+    def __init__(self, path: str, source: str):
+        """
+        Initialize the store.
+        
+        Args:
+            path: Path of the JSON snapshot file; created on first save
+            source: Source directory the snapshot belongs to
+        """
+        self.path = Path(path)
+        self.source = source
+
+    def load(self) -> Dict[str, str]:
+        """Get the hashes of the previous snapshot.
+        
+        Returns:
+            Dictionary mapping each key to its content hash, empty if there
+            is no snapshot for this source yet
+        """
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            raise ValueError(f"Invalid JSON format in snapshot file {self.path}")
+        if data.get('source') != self.source:
+            return {}
+        return data.get('hashes', {})
+
+    def save(self, hashes: Dict[str, str]) -> None:
+        """Replace the snapshot with new hashes.
+        
+        Args:
+            hashes: Dictionary mapping each key to its content hash
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'source': self.source, 'hashes': hashes}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,62 @@
+"""Shared fixtures of the pytest suite.
+
+The other test_*.py scripts in this folder are manual checks against a real
+(encrypted) source directory and define no test functions; the pytest cases
+run on synthetic tables from benchmarks/synthetic.py with the native reader,
+so they need neither Windows nor the Advantage DLL.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "benchmarks"))
+
+import synthetic  # noqa: E402
+
+from src.config.dbf_config import DBFConfig  # noqa: E402
+from src.dbf_enc_reader.mapping_manager import MappingManager  # noqa: E402
+
+# Small enough to generate in well under a second
+SALES = 300
+PRODUCTS = 200
+FANOUT = 3
+DAYS = 60
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory) -> Path:
+    """Synthetic CAT_PROD, VENTA and PARTVTA tables; never modify them."""
+    path = tmp_path_factory.mktemp("dbf")
+    synthetic.generate(str(path), sales=SALES, products=PRODUCTS, fanout=FANOUT, days=DAYS)
+    return path
+
+
+@pytest.fixture(scope="session")
+def indexed_dir(tmp_path_factory) -> Path:
+    """The synthetic tables plus VENTA.CDX and PARTVTA.CDX; never modify them."""
+    path = tmp_path_factory.mktemp("dbf_cdx")
+    synthetic.generate(str(path), sales=SALES, products=PRODUCTS, fanout=FANOUT, days=DAYS, indexes=True)
+    return path
+
+
+@pytest.fixture
+def copy_dir(data_dir, tmp_path) -> Path:
+    """Private copy of the synthetic tables, for tests that change them."""
+    import shutil
+    target = tmp_path / "dbf"
+    shutil.copytree(data_dir, target)
+    return target
+
+
+@pytest.fixture(scope="session")
+def mapping_manager() -> MappingManager:
+    return MappingManager(str(project_root / "mappings.json"))
+
+
+def native_config(directory: Path, **options) -> DBFConfig:
+    """DBFConfig reading a directory with the native backend."""
+    return DBFConfig(dll_path="unused", encryption_password="", source_directory=str(directory),
+                     backend="native", **options)
@@ -0,0 +1,66 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from conftest import native_config
+
+from src.controllers.ventas_controller import VentasController
+from src.dbf_enc_reader.aggregate import SalesAggregator, bucket_start, line_amount
+
+
+def test_bucket_start():
+    wednesday = datetime(2025, 3, 12, 18, 30)
+    assert bucket_start(wednesday, 'day') == '2025-03-12'
+    assert bucket_start(wednesday, 'week') == '2025-03-10'
+    assert bucket_start(date(2025, 3, 16), 'week') == '2025-03-10'  # Sunday
+    assert bucket_start(date(2025, 3, 10), 'week') == '2025-03-10'  # Monday
+    assert bucket_start(date(2025, 1, 1), 'week') == '2024-12-30'
+    assert bucket_start(wednesday, 'month') == '2025-03-01'
+    assert bucket_start(wednesday, 'year') == '2025-01-01'
+    assert bucket_start('03/12/2025 12:00:00 a. m.', 'month') == '2025-03-01'
+    assert bucket_start('', 'day') is None
+
+
+def test_unknown_bucket_or_aggregate():
+    with pytest.raises(ValueError):
+        SalesAggregator(bucket='quarter')
+    with pytest.raises(ValueError):
+        SalesAggregator(aggregates=('median',))
+
+
+def test_aggregator_groups_header_and_detail_keys():
+    sales = [
+        {'fecha': datetime(2025, 3, 10), 'empleado': 1, 'detalles': [
+            {'REF': 'A', 'cantidad': 2, 'precio': 10.0, 'descuento': 1.0},
+            {'REF': 'B', 'cantidad': 1, 'precio': 5.0, 'descuento': None},
+        ]},
+        {'fecha': datetime(2025, 3, 16), 'empleado': 2, 'detalles': [
+            {'REF': 'A', 'cantidad': 1, 'precio': 10.0, 'descuento': 0},
+        ]},
+        {'fecha': datetime(2025, 3, 17), 'empleado': 1, 'detalles': []},
+    ]
+    by_week = SalesAggregator(('fecha', 'REF'), 'week').add_all(sales).results()
+    assert by_week == [
+        {'fecha': '2025-03-10', 'REF': 'A', 'count': 2, 'sum': 29.0, 'min': 10.0, 'max': 19.0, 'avg': 14.5},
+        {'fecha': '2025-03-10', 'REF': 'B', 'count': 1, 'sum': 5.0, 'min': 5.0, 'max': 5.0, 'avg': 5.0},
+    ]
+    total = SalesAggregator((), aggregates=('count', 'sum')).add_all(sales)
+    assert total.results() == [{'count': 3, 'sum': 34.0}]
+    assert (total.sales, total.lines) == (3, 3)
+
+
+def test_summary_buckets_add_up_to_the_sales(data_dir, mapping_manager):
+    controller = VentasController(mapping_manager, native_config(data_dir))
+    end = datetime.now()
+    start = end - timedelta(days=90)
+    sales = list(controller.iter_sales(start, end))
+    lines = sum(len(sale['detalles']) for sale in sales)
+    amount = sum(line_amount(detail) for sale in sales for detail in sale['detalles'])
+
+    for bucket, first_day in (('week', lambda day: day.weekday() == 0), ('month', lambda day: day.day == 1),
+                              ('year', lambda day: (day.month, day.day) == (1, 1))):
+        rows = controller.aggregate_sales(start, end, ['fecha'], bucket)
+        days = [datetime.strptime(row['fecha'], '%Y-%m-%d').date() for row in rows]
+        assert days == sorted(days) and all(first_day(day) for day in days), bucket
+        assert sum(row['count'] for row in rows) == lines
+        assert sum(row['sum'] for row in rows) == pytest.approx(amount)
@@ -0,0 +1,75 @@
+import os
+
+from conftest import PRODUCTS
+
+from src.dbf_enc_reader.cache import FILE_SUFFIX, QueryCache
+from src.dbf_enc_reader.native import NativeDBFReader
+
+
+def cached_reader(directory, cache):
+    reader = NativeDBFReader(str(directory))
+    reader.cache = cache
+    return reader
+
+
+def test_unchanged_table_is_served_from_cache(data_dir, tmp_path):
+    cache = QueryCache(str(tmp_path / 'cache'))
+    first = list(cached_reader(data_dir, cache).iter_records('CAT_PROD.DBF'))
+    second = list(cached_reader(data_dir, cache).iter_records('CAT_PROD.DBF'))
+    assert second == first
+    assert (cache.stats.misses, cache.stats.stores, cache.stats.hits) == (1, 1, 1)
+
+    # A new session finds the entry on disk
+    disk = QueryCache(str(tmp_path / 'cache'))
+    assert list(cached_reader(data_dir, disk).iter_records('CAT_PROD.DBF')) == first
+    assert disk.stats.disk_hits == 1
+
+
+def test_changed_table_misses(copy_dir, tmp_path):
+    cache = QueryCache(str(tmp_path / 'cache'))
+    list(cached_reader(copy_dir, cache).iter_records('CAT_PROD.DBF'))
+
+    path = copy_dir / 'CAT_PROD.DBF'
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    list(cached_reader(copy_dir, cache).iter_records('CAT_PROD.DBF'))
+    assert (cache.stats.misses, cache.stats.hits) == (2, 0)
+
+    with open(path, 'ab') as f:
+        f.write(b'\x1a')
+    list(cached_reader(copy_dir, cache).iter_records('CAT_PROD.DBF'))
+    assert (cache.stats.misses, cache.stats.hits) == (3, 0)
+
+
+def test_read_stopped_early_stores_nothing(data_dir, tmp_path):
+    cache = QueryCache(str(tmp_path / 'cache'), max_rows=10)
+    records = cached_reader(data_dir, cache).iter_records('CAT_PROD.DBF')
+    for _ in range(50):
+        next(records)
+    records.close()
+
+    assert cache.stats.stores == 0
+    assert list((tmp_path / 'cache').iterdir()) == []
+
+
+def test_large_read_is_streamed_to_disk(data_dir, tmp_path):
+    cache = QueryCache(str(tmp_path / 'cache'), max_rows=10)
+    first = list(cached_reader(data_dir, cache).iter_records('CAT_PROD.DBF'))
+    assert len(first) == PRODUCTS
+    assert cache.stats.stores == 1
+    assert len(list((tmp_path / 'cache').glob(f'*{FILE_SUFFIX}'))) == 1
+
+    # Too large for memory: every hit is read back from disk
+    assert list(cached_reader(data_dir, cache).iter_records('CAT_PROD.DBF')) == first
+    assert (cache.stats.hits, cache.stats.disk_hits) == (0, 1)
+
+
+def test_read_over_the_limits_is_not_cached(data_dir, tmp_path):
+    memory_only = QueryCache(None, max_rows=10)
+    list(cached_reader(data_dir, memory_only).iter_records('CAT_PROD.DBF'))
+    assert (memory_only.stats.stores, memory_only.stats.uncacheable) == (0, 1)
+
+    small_disk = QueryCache(str(tmp_path / 'cache'), max_rows=10, max_disk_bytes=2048)
+    list(cached_reader(data_dir, small_disk).iter_records('CAT_PROD.DBF'))
+    assert (small_disk.stats.stores, small_disk.stats.uncacheable) == (0, 1)
+    assert list((tmp_path / 'cache').iterdir()) == []
@@ -0,0 +1,48 @@
+import json
+
+from conftest import PRODUCTS, native_config
+
+from src.controllers.cat_prod_controller import OPERATION_FIELD, CatProdController
+from src.sinks.registry import create_sink
+from src.utils.snapshot import SnapshotStore
+
+
+def write_delta(data_dir, mapping_manager, snapshot, path):
+    controller = CatProdController(mapping_manager, native_config(data_dir, batch_size=64))
+    with create_sink(str(path), 'ndjson') as sink:
+        counts = controller.write_delta(snapshot, sink)
+    controller.commit_snapshot()
+    with open(sink.outputs[0], encoding='utf-8') as f:
+        return counts, [json.loads(line) for line in f]
+
+
+def test_delta_streams_changes_with_their_operation(data_dir, mapping_manager, tmp_path):
+    snapshot = SnapshotStore(str(tmp_path / 'snapshot.json'), str(data_dir))
+
+    counts, records = write_delta(data_dir, mapping_manager, snapshot, tmp_path / 'first')
+    assert counts == {'insert': PRODUCTS, 'update': 0, 'delete': 0}
+    assert {record[OPERATION_FIELD] for record in records} == {'insert'}
+
+    counts, records = write_delta(data_dir, mapping_manager, snapshot, tmp_path / 'second')
+    assert counts == {'insert': 0, 'update': 0, 'delete': 0}
+    assert records == []
+
+    hashes = snapshot.load()
+    changed, removed = sorted(hashes)[:2]
+    hashes[changed] = 'stale'
+    del hashes[removed]
+    hashes['GONE'] = 'stale'
+    snapshot.save(hashes)
+
+    counts, records = write_delta(data_dir, mapping_manager, snapshot, tmp_path / 'third')
+    assert counts == {'insert': 1, 'update': 1, 'delete': 1}
+    operations = {record['REF']: record[OPERATION_FIELD] for record in records}
+    assert operations == {changed: 'update', removed: 'insert', 'GONE': 'delete'}
+
+
+def test_get_delta_matches_iter_delta(data_dir, mapping_manager, tmp_path):
+    snapshot = SnapshotStore(str(tmp_path / 'snapshot.json'), str(data_dir))
+    controller = CatProdController(mapping_manager, native_config(data_dir))
+    delta = controller.get_delta(snapshot)
+    assert len(delta['inserted']) == PRODUCTS
+    assert delta['updated'] == delta['deleted'] == []
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from conftest import SALES, native_config
+
+from src.controllers.ventas_controller import VentasController
+from src.dbf_enc_reader.cdx import KEY_DATE, KEY_DTOS, KEY_TEXT
+from src.dbf_enc_reader.filters import Eq, Range
+from src.dbf_enc_reader.native import DBFTable, NativeDBFReader
+from src.dbf_enc_reader.planner import ACCESS_INDEX_RANGE
+
+
+def open_index(directory, table_name):
+    table = DBFTable(str(directory / table_name))
+    return table, table.open_index()
+
+
+def test_tags_are_parsed(indexed_dir):
+    table, index = open_index(indexed_dir, 'VENTA.DBF')
+    with table, index:
+        kinds = {name: (tag.field, tag.kind, tag.seekable) for name, tag in index.tags.items()}
+    assert kinds == {
+        'NO_REFEREN': ('NO_REFEREN', KEY_TEXT, True),
+        'F_EMISION': ('F_EMISION', KEY_DATE, True),
+        'FECHA': ('F_EMISION', KEY_DTOS, True),
+    }
+
+
+def test_full_walk_crosses_every_leaf(indexed_dir):
+    table, index = open_index(indexed_dir, 'PARTVTA.DBF')
+    with table, index:
+        tag = index.tag('no_referen')
+        recnos = list(index.iter_recnos(tag))
+        assert recnos == list(range(1, table.record_count + 1))
+        # Several leaves under an interior root
+        assert table.record_count > 500
+
+
+def test_range_walk_matches_a_scan(indexed_dir):
+    reader = NativeDBFReader(str(indexed_dir))
+    dates = [record['F_EMISION'] for record in reader.iter_records('VENTA.DBF', columns=['F_EMISION'])]
+    low, high = dates[len(dates) // 3], dates[2 * len(dates) // 3]
+    expected = [recno for recno, issued in enumerate(dates, 1) if low <= issued <= high]
+
+    table, index = open_index(indexed_dir, 'VENTA.DBF')
+    with table, index:
+        for name in ('F_EMISION', 'FECHA'):
+            tag = index.tag(name)
+            found = list(index.iter_recnos(tag, index.encode_key(tag, low), index.encode_key(tag, high)))
+            assert found == expected, name
+        tag = index.tag('NO_REFEREN')
+        assert list(index.iter_recnos(tag, index.encode_key(tag, '000150'), index.encode_key(tag, '000150'))) == [150]
+        assert list(index.iter_recnos(tag, index.encode_key(tag, 'ZZZ'))) == []
+
+
+def test_reader_uses_the_index_for_ranges_and_seeks(indexed_dir):
+    indexed = NativeDBFReader(str(indexed_dir))
+    scanned = NativeDBFReader(str(indexed_dir))
+    scanned.use_indexes = False
+    start = datetime.now() - timedelta(days=20)
+    date_range = Range('F_EMISION', start, start + timedelta(days=10))
+
+    records = list(indexed.iter_records('VENTA.DBF', filters=date_range))
+    assert records and records == list(scanned.iter_records('VENTA.DBF', filters=date_range))
+    assert indexed.last_access_path.mode == ACCESS_INDEX_RANGE
+
+    details = list(indexed.iter_records('PARTVTA.DBF', filters=Eq('NO_REFEREN', '000042')))
+    assert details == list(scanned.iter_records('PARTVTA.DBF', filters=Eq('NO_REFEREN', '000042')))
+    ranges = [('000042', '000042'), ('000007', '000009')]
+    assert {record['NO_REFEREN'] for record in indexed.iter_index_ranges('PARTVTA.DBF', 'NO_REFEREN', ranges)} \
+        == {'000042', '000007', '000008', '000009'}
+
+
+def test_merge_and_hash_joins_read_the_same_sales(indexed_dir, mapping_manager):
+    controller = VentasController(mapping_manager, native_config(indexed_dir))
+    start, end = datetime.now() - timedelta(days=90), datetime.now()
+    merged = list(controller.iter_sales(start, end, join='merge'))
+    assert controller.last_join == 'merge'
+    hashed = list(controller.iter_sales(start, end, join='hash'))
+    assert controller.last_join == 'hash'
+    assert len(merged) == SALES
+    key = lambda sale: sale['Folio']
+    assert sorted(merged, key=key) == sorted(hashed, key=key)
@@ -0,0 +1,58 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import native_config
+
+np = pytest.importorskip("numpy")
+
+from src.controllers.cat_prod_controller import CatProdController  # noqa: E402
+from src.controllers.ventas_controller import VentasController  # noqa: E402
+from src.dbf_enc_reader.column_batch import filter_mask, parse_numbers  # noqa: E402
+from src.dbf_enc_reader.filters import (  # noqa: E402
+    Compare, Eq, In, Not, Or, Predicate, Range, compile_predicate, combine
+)
+from src.dbf_enc_reader.native import NativeDBFReader  # noqa: E402
+
+
+def test_catalog_columnar_matches_rows(data_dir, mapping_manager):
+    config = native_config(data_dir, batch_size=64)
+    rows = CatProdController(mapping_manager, config)
+    columns = CatProdController(mapping_manager, replace(config, columnar=True))
+    by_rows = [record for batch in rows.iter_batches() for record in batch]
+    by_columns = [record for batch in columns.iter_batches() for record in batch]
+    assert by_columns == by_rows
+
+
+def test_sale_details_columnar_match_rows(indexed_dir, mapping_manager):
+    config = native_config(indexed_dir, batch_size=100)
+    start, end = datetime.now() - timedelta(days=20), datetime.now()
+    by_rows = list(VentasController(mapping_manager, config).iter_sales(start, end, join='merge'))
+    by_columns = list(VentasController(mapping_manager, replace(config, columnar=True)).iter_sales(
+        start, end, join='merge'))
+    assert by_rows and by_columns == by_rows
+
+
+@pytest.mark.parametrize('node', [
+    Range('CANTIDAD', 3, 8),
+    Compare('PRECIO_UNI', '>', 500.5),
+    In('NO_REFEREN', ['000010', '000011', '000200']),
+    combine([Compare('DESCUENTO', '=', 0), Not(Eq('SUBFAM', 'SUB001'))]),
+    Or(Eq('PARTIDA', 1), Range('NO_REFEREN', '000100', '000120')),
+    Predicate('CANTIDAD', lambda value: value % 2 == 0),
+])
+def test_filter_mask_matches_row_predicate(data_dir, node):
+    reader = NativeDBFReader(str(data_dir))
+    match = compile_predicate(node)
+    for batch in reader.iter_column_batches('PARTVTA.DBF', 256):
+        expected = [match(record) for record in batch.to_records()]
+        assert filter_mask(node, batch).tolist() == expected
+
+
+def test_parse_numbers_matches_float():
+    text = np.array(['  12.50', '-3.25  ', '       ', ' 1e3   ', '   .5  ', '-0.0001'])
+    values, blank, invalid = parse_numbers(text)
+    assert blank.tolist() == [False, False, True, False, False, False]
+    assert invalid.tolist() == [False, False, False, True, False, False]
+    assert values.tolist() == [12.5, -3.25, 0.0, 0.0, 0.5, -0.0001]
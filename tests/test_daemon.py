@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from conftest import PRODUCTS, native_config
+
+from src.controllers.cat_prod_controller import CatProdController
+from src.service.daemon import ExportDaemon, JobQueue
+from src.sinks.registry import create_sink
+
+
+@pytest.fixture
+def export_handler(data_dir, mapping_manager, tmp_path):
+    def handler(job):
+        if job.get('type') != 'cat_prod':
+            raise ValueError(f"Unknown job type {job.get('type')!r}")
+        config = native_config(data_dir, limit_rows=int(job.get('limit', 0)))
+        controller = CatProdController(mapping_manager, config)
+        with create_sink(str(tmp_path / 'output' / job['id']), 'ndjson') as sink:
+            count = controller.write_data(sink)
+        return {'count': count, 'outputs': sink.outputs}
+    return handler
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_daemon_runs_jobs_to_done_or_failed(export_handler, tmp_path):
+    queue = JobQueue(str(tmp_path / 'queue'))
+    first = queue.submit({'type': 'cat_prod', 'limit': 5})
+    second = queue.submit({'type': 'cat_prod', 'limit': 0})
+    unknown = queue.submit({'type': 'nope'})
+    # Written by hand, not through submit(): neither valid JSON nor an object
+    (queue.root / 'incoming' / '00000000000000000000_broken.json').write_text('{"type": ', encoding='utf-8')
+    (queue.root / 'incoming' / '00000000000000000000_list.json').write_text('[]', encoding='utf-8')
+    assert len(queue.pending()) == 5
+
+    daemon = ExportDaemon(queue, export_handler, concurrency=2, poll_interval=0.01)
+    daemon.run(max_jobs=3)
+
+    assert (daemon.completed, daemon.failed) == (2, 1)
+    assert queue.pending() == [] and list((queue.root / 'processing').iterdir()) == []
+    for job_id, count in ((first, 5), (second, PRODUCTS)):
+        assert (queue.root / 'done' / f"{job_id}.json").exists()
+        result = read_json(queue.root / 'done' / f"{job_id}.result.json")
+        assert result['count'] == count and result['seconds'] >= 0
+        with open(result['outputs'][0], encoding='utf-8') as f:
+            assert sum(1 for _ in f) == count
+
+    failed = read_json(queue.root / 'failed' / f"{unknown}.result.json")
+    assert 'Unknown job type' in failed['error'] and 'ValueError' in failed['traceback']
+    assert 'Invalid job file' in read_json(queue.root / 'failed' / '00000000000000000000_broken.result.json')['error']
+    assert 'JSON object' in read_json(queue.root / 'failed' / '00000000000000000000_list.result.json')['error']
+
+
+def test_interrupted_jobs_are_requeued(export_handler, tmp_path):
+    queue = JobQueue(str(tmp_path / 'queue'))
+    job_id = queue.submit({'type': 'cat_prod', 'limit': 1})
+    assert queue.claim() == (job_id, {'type': 'cat_prod', 'limit': 1})
+    assert queue.claim() is None
+
+    # A new daemon picks up what the previous one left in processing/
+    daemon = ExportDaemon(queue, export_handler, poll_interval=0.01)
+    daemon.run(max_jobs=1)
+    assert daemon.completed == 1
+    assert read_json(queue.root / 'done' / f"{job_id}.result.json")['count'] == 1
+
+
+def test_concurrency_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        ExportDaemon(JobQueue(str(tmp_path / 'queue')), lambda job: {}, concurrency=0)
@@ -0,0 +1,61 @@
+from datetime import date, datetime
+
+from src.dbf_enc_reader.filters import (
+    Compare, Eq, In, Not, Predicate, Range, as_filter, compile_filter, compile_predicate,
+)
+
+TYPES = {'NO_REFEREN': 'System.String', 'F_EMISION': 'System.DateTime', 'TOTAL_BRUT': 'System.Decimal',
+         'ACTIVO': 'System.Boolean', 'FECHA_TXT': 'System.String'}
+
+
+def test_literals_follow_the_field_type():
+    assert compile_filter(Eq('NO_REFEREN', '000123'), TYPES).expression == "NO_REFEREN = '000123'"
+    assert compile_filter(Compare('TOTAL_BRUT', '>=', 10.5), TYPES).expression == "TOTAL_BRUT >= 10.5"
+    assert compile_filter(Eq('NO_REFEREN', 123), TYPES).expression == "NO_REFEREN = '123'"
+    assert compile_filter(Eq('ACTIVO', True), TYPES).expression == "ACTIVO = .T."
+    assert compile_filter(Range('F_EMISION', date(2025, 1, 31), date(2025, 2, 1)), TYPES).expression == (
+        "DTOS(F_EMISION) >= '20250131' AND DTOS(F_EMISION) <= '20250201'")
+
+
+def test_string_literals_are_quoted_safely():
+    assert compile_filter(Eq('NO_REFEREN', "O'BRIEN"), TYPES).expression == 'NO_REFEREN = "O\'BRIEN"'
+    assert compile_filter(Eq('NO_REFEREN', 'A"B\'C'), TYPES).expression == (
+        'NO_REFEREN = \'A"B\'+"\'"+\'C\'')
+
+
+def test_or_is_parenthesized_under_and():
+    node = In('NO_REFEREN', ['1', '2']) & Compare('TOTAL_BRUT', '>', 0)
+    assert compile_filter(node, TYPES).expression == "(NO_REFEREN = '1' OR NO_REFEREN = '2') AND TOTAL_BRUT > 0"
+
+
+def test_unpushable_parts_become_the_residual():
+    text_dates = Range('FECHA_TXT', date(2025, 3, 1), date(2025, 3, 31))
+    compiled = compile_filter(Eq('NO_REFEREN', '1') & text_dates, TYPES)
+    assert compiled.expression == "NO_REFEREN = '1'"
+    assert compiled.residual == text_dates
+
+    long_in = In('NO_REFEREN', [str(i) for i in range(10)])
+    compiled = compile_filter(long_in, TYPES, max_in_values=5)
+    assert compiled.expression is None and compiled.residual == long_in
+
+    # An OR with a Python predicate cannot be split: it stays whole in the residual
+    either = Eq('NO_REFEREN', '1') | Predicate('TOTAL_BRUT', lambda value: value > 5)
+    assert compile_filter(either, TYPES).expression is None
+
+
+def test_predicate_matches_the_expression_semantics():
+    match = compile_predicate(Range('F_EMISION', date(2025, 3, 1), date(2025, 3, 31)) & Not(Eq('NO_REFEREN', None)))
+    assert match({'F_EMISION': datetime(2025, 3, 31, 18, 0), 'NO_REFEREN': '1'})
+    assert not match({'F_EMISION': datetime(2025, 4, 1), 'NO_REFEREN': '1'})
+    assert not match({'F_EMISION': datetime(2025, 3, 5), 'NO_REFEREN': ''})
+    assert not match({'F_EMISION': None, 'NO_REFEREN': '1'})
+
+
+def test_legacy_dates_and_text_dates_use_one_format():
+    # Day 3 of April: with day-first parsing on one side the range would miss it
+    node = as_filter([{'field': 'FECHA_TXT', 'operator': 'range', 'is_date': True,
+                       'from_value': '04/01/2025 12:00:00 a. m.', 'to_value': '04/30/2025 11:59:59 p. m.'}])
+    assert node == Range('FECHA_TXT', date(2025, 4, 1), date(2025, 4, 30))
+    match = compile_predicate(node)
+    assert match({'FECHA_TXT': '04/03/2025 12:00:00 a. m.'})
+    assert not match({'FECHA_TXT': '03/04/2025 12:00:00 a. m.'})
@@ -0,0 +1,95 @@
+import csv
+import gzip
+
+import pytest
+
+from src.sinks.registry import create_sink, create_split_sink
+
+HEADER_SCHEMA = [('Folio', 'number'), ('cliente', 'string'), ('total_bruto', 'number')]
+DETAIL_SCHEMA = [('Folio', 'number'), ('REF', 'number'), ('cantidad', 'number')]
+
+SALES = [
+    {'Folio': 1, 'cliente': 'C00001', 'total_bruto': 10.5,
+     'detalles': [{'REF': 7, 'cantidad': 2}, {'REF': 8, 'cantidad': 1.5}]},
+    {'Folio': 2, 'cliente': 'Ñandú, "SA"', 'total_bruto': None, 'detalles': []},
+    {'Folio': 3, 'cliente': '', 'total_bruto': 0, 'detalles': [{'Folio': 3, 'REF': 9, 'cantidad': 4}]},
+]
+
+
+def read_csv(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_csv_split_sink_writes_headers_and_details(tmp_path):
+    with create_split_sink(str(tmp_path / 'ventas'), 'csv', 'gzip', HEADER_SCHEMA, DETAIL_SCHEMA) as sink:
+        sink.write_batch(SALES[:2])
+        sink.write_batch(SALES[2:])
+
+    headers_path, details_path = sink.outputs
+    assert headers_path.endswith('ventas_headers.csv.gz') and details_path.endswith('ventas_details.csv.gz')
+    assert read_csv(headers_path) == [
+        ['Folio', 'cliente', 'total_bruto'],
+        ['1', 'C00001', '10.5'],
+        ['2', 'Ñandú, "SA"', ''],
+        ['3', '', '0'],
+    ]
+    assert read_csv(details_path) == [['Folio', 'REF', 'cantidad'], ['1', '7', '2'], ['1', '8', '1.5'], ['3', '9', '4']]
+    assert sink.rows_written == 3
+    assert not list(tmp_path.glob('*.part'))
+
+
+def test_empty_csv_keeps_its_header(tmp_path):
+    with create_sink(str(tmp_path / 'empty'), 'csv', schema=HEADER_SCHEMA) as sink:
+        pass
+    assert read_csv(sink.outputs[0]) == [['Folio', 'cliente', 'total_bruto']]
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_arrow_split_sink_round_trip(tmp_path, output_format):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    with create_split_sink(str(tmp_path / 'ventas'), output_format, None, HEADER_SCHEMA, DETAIL_SCHEMA,
+                           integer_fields=['Folio'], row_group_size=2) as sink:
+        sink.write_batch(SALES)
+
+    def read(path):
+        if output_format == 'parquet':
+            return pyarrow.parquet.read_table(path)
+        with pa.memory_map(path) as source:
+            return pyarrow.ipc.open_file(source).read_all()
+
+    headers, details = (read(path) for path in sink.outputs)
+    assert headers.schema.field('Folio').type == pa.int64()
+    assert headers.schema.field('total_bruto').type == pa.float64()
+    assert headers.to_pylist() == [
+        {'Folio': 1, 'cliente': 'C00001', 'total_bruto': 10.5},
+        {'Folio': 2, 'cliente': 'Ñandú, "SA"', 'total_bruto': None},
+        {'Folio': 3, 'cliente': '', 'total_bruto': 0.0},
+    ]
+    assert details.to_pylist() == [
+        {'Folio': 1, 'REF': 7.0, 'cantidad': 2.0},
+        {'Folio': 1, 'REF': 8.0, 'cantidad': 1.5},
+        {'Folio': 3, 'REF': 9.0, 'cantidad': 4.0},
+    ]
+
+
+def test_parquet_columns_round_trip(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    np = pytest.importorskip('numpy')
+    import pyarrow.parquet
+    from src.dbf_enc_reader.column_batch import ColumnBatch
+
+    batch = ColumnBatch({'Folio': np.array([1.0, 2.0]), 'cliente': np.array(['A', 'B']),
+                         'total_bruto': np.array([3, 4])})
+    with create_sink(str(tmp_path / 'ventas'), 'parquet', 'zstd', HEADER_SCHEMA, integer_fields=['Folio']) as sink:
+        sink.write_columns(batch)
+        sink.write_batch([{'Folio': 3, 'cliente': 'C', 'total_bruto': 5.25}])
+
+    table = pyarrow.parquet.read_table(sink.outputs[0])
+    assert table.schema.field('Folio').type == pa.int64()
+    assert table.column('Folio').to_pylist() == [1, 2, 3]
+    assert table.column('total_bruto').to_pylist() == [3.0, 4.0, 5.25]
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from conftest import native_config
+
+from src.controllers.ventas_controller import VentasController, _window_start
+from src.utils.checkpoint import CheckpointStore
+from src.utils.dates import parse_fecha
+
+
+def test_parse_fecha_reads_dbf_text_month_first():
+    assert parse_fecha('03/04/2025 12:00:00 a. m.') == datetime(2025, 3, 4)
+    assert parse_fecha('12/31/2024') == datetime(2024, 12, 31)
+    assert parse_fecha('2025-03-04 15:30:00') == datetime(2025, 3, 4, 15, 30)
+    assert parse_fecha('31/12/2024') is None
+    assert parse_fecha('') is None
+
+
+def test_window_start_is_floored_to_midnight():
+    assert _window_start(datetime(2025, 3, 10, 15, 0), timedelta(days=3)) == datetime(2025, 3, 7)
+
+
+def test_watermark_keeps_hashes_of_the_whole_boundary_day(data_dir, mapping_manager):
+    controller = VentasController(mapping_manager, native_config(data_dir))
+    seen = {
+        '000001': (datetime(2025, 3, 7, 9, 0), 'early on the boundary day'),
+        '000002': (datetime(2025, 3, 6, 23, 0), 'before the window'),
+        '000003': (datetime(2025, 3, 10, 15, 0), 'newest'),
+    }
+    state = controller._next_watermark({}, seen, 3, timedelta(days=3))
+    assert set(state['recent']) == {'000001', '000003'}
+
+
+def test_second_incremental_run_emits_nothing(data_dir, mapping_manager, tmp_path):
+    checkpoint = CheckpointStore(str(tmp_path / 'checkpoints.json'))
+    start = datetime.now() - timedelta(days=30)
+
+    first = VentasController(mapping_manager, native_config(data_dir))
+    emitted = list(first.iter_sales_incremental(checkpoint, start))
+    first.commit_checkpoint()
+    assert emitted
+
+    second = VentasController(mapping_manager, native_config(data_dir))
+    assert list(second.iter_sales_incremental(checkpoint, start)) == []
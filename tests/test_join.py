@@ -0,0 +1,50 @@
+import copy
+
+import pytest
+
+from src.dbf_enc_reader.join import hash_join, merge_join
+from src.dbf_enc_reader.native import NativeDBFReader
+
+
+def tables(data_dir):
+    reader = NativeDBFReader(str(data_dir))
+    headers = list(reader.iter_records('VENTA.DBF', columns=['NO_REFEREN', 'TOTAL_BRUT']))
+    details = list(reader.iter_records('PARTVTA.DBF', columns=['NO_REFEREN', 'PARTIDA']))
+    return headers, details
+
+
+def test_merge_and_hash_join_agree(data_dir):
+    headers, details = tables(data_dir)
+    headers.sort(key=lambda record: record['NO_REFEREN'])
+    details.sort(key=lambda record: record['NO_REFEREN'])
+    # Headers without details and orphan details on both ends
+    headers = headers[1:] + [{'NO_REFEREN': '999999', 'TOTAL_BRUT': 0.0}]
+
+    merged = list(merge_join(copy.deepcopy(headers), details, 'NO_REFEREN', 'NO_REFEREN'))
+    hashed = list(hash_join(copy.deepcopy(headers), details, 'NO_REFEREN', 'NO_REFEREN'))
+
+    assert merged == hashed
+    assert merged[-1]['detalles'] == []
+    assert sum(len(sale['detalles']) for sale in merged) == sum(
+        detail['NO_REFEREN'] != details[0]['NO_REFEREN'] for detail in details)
+
+
+def test_merge_join_rejects_unsorted_headers():
+    headers = [{'k': '000002'}, {'k': '000001'}]
+    with pytest.raises(ValueError, match='headers are not sorted'):
+        list(merge_join(headers, [], 'k', 'k'))
+
+
+def test_merge_join_rejects_unsorted_details():
+    headers = [{'k': '000001'}, {'k': '000003'}]
+    details = [{'k': '000001'}, {'k': '000003'}, {'k': '000002'}]
+    with pytest.raises(ValueError, match='details are not sorted'):
+        list(merge_join(headers, details, 'k', 'k'))
+
+
+def test_headers_sharing_a_key_get_the_same_details():
+    details = [{'k': 1, 'n': 1}, {'k': 1, 'n': 2}, {'k': 2, 'n': 3}]
+    merged = list(merge_join([{'k': 1}, {'k': 1}, {'k': 2}], details, 'k', 'k'))
+    hashed = list(hash_join([{'k': 1}, {'k': 1}, {'k': 2}], details, 'k', 'k'))
+    assert merged == hashed
+    assert [len(header['detalles']) for header in merged] == [2, 2, 1]
@@ -0,0 +1,71 @@
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.sinks.registry import create_sink
+
+RECORDS = [
+    {'Folio': 1, 'cliente': 'Ñandú', 'fecha': '2025-03-10 00:00:00', 'detalles': [{'REF': 7, 'cantidad': 2.5}]},
+    {'Folio': 2, 'cliente': 'línea\nnueva "x"', 'fecha': None, 'detalles': []},
+    {'Folio': 3, 'cliente': '', 'fecha': '2025-03-11 00:00:00', 'detalles': [{'REF': 8, 'cantidad': 1}]},
+]
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+def test_json_array_streams_a_loadable_document(tmp_path, indent):
+    with create_sink(str(tmp_path / 'ventas'), 'json', indent=indent) as sink:
+        sink.write_batch(RECORDS[:1])
+        sink.write_batch([])
+        sink.write_batch(RECORDS[1:])
+    with open(sink.outputs[0], encoding='utf-8') as f:
+        assert json.load(f) == RECORDS
+    if indent:
+        with open(sink.outputs[0], encoding='utf-8') as f:
+            assert f.read() == json.dumps(RECORDS, indent=2, ensure_ascii=False)
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+def test_empty_json_array(tmp_path, indent):
+    with create_sink(str(tmp_path / 'empty'), 'json', indent=indent) as sink:
+        pass
+    with open(sink.outputs[0], encoding='utf-8') as f:
+        assert f.read() == '[]'
+
+
+def test_values_json_cannot_hold_are_strings(tmp_path):
+    with create_sink(str(tmp_path / 'typed'), 'json') as sink:
+        sink.write({'fecha': datetime(2025, 3, 10, 8, 30), 'total': Decimal('1.50')})
+    with open(sink.outputs[0], encoding='utf-8') as f:
+        assert json.load(f) == [{'fecha': '2025-03-10 08:30:00', 'total': '1.50'}]
+
+
+def test_ndjson_gzip_round_trip(tmp_path):
+    with create_sink(str(tmp_path / 'ventas'), 'ndjson', 'gzip') as sink:
+        assert sink.consume(iter(RECORDS), batch_size=2) == 3
+    assert sink.outputs[0].endswith('ventas.ndjson.gz')
+    with gzip.open(sink.outputs[0], 'rt', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    assert lines[-1] == ''
+    assert [json.loads(line) for line in lines[:-1]] == RECORDS
+
+
+def test_zstd_round_trip(tmp_path):
+    zstandard = pytest.importorskip('zstandard')
+    with create_sink(str(tmp_path / 'ventas'), 'json', 'zstd') as sink:
+        sink.write_batch(RECORDS)
+    with open(sink.outputs[0], 'rb') as f:
+        data = zstandard.ZstdDecompressor().stream_reader(f).read()
+    assert json.loads(data.decode('utf-8')) == RECORDS
+
+
+@pytest.mark.parametrize('output_format,compression', [('json', None), ('ndjson', 'gzip')])
+def test_abort_leaves_no_file(tmp_path, output_format, compression):
+    with pytest.raises(RuntimeError):
+        with create_sink(str(tmp_path / 'ventas'), output_format, compression) as sink:
+            sink.write_batch(RECORDS)
+            assert (tmp_path / (sink.path.name + '.part')).exists()
+            raise RuntimeError("read failed")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,58 @@
+import pytest
+
+from src.controllers.ventas_controller import _folio_key
+from src.dbf_enc_reader.lookup import STRATEGY_CHUNKED, STRATEGY_RANGE, STRATEGY_SEEK, KeyLookup
+from src.dbf_enc_reader.native import NativeDBFReader
+
+
+class IndexedReader:
+    """Reader stub answering has_index only."""
+
+    def __init__(self, indexed):
+        self.indexed = indexed
+
+    def has_index(self, table_name, index_tag):
+        return self.indexed
+
+
+def lookup(reader, **options):
+    return KeyLookup(reader, 'PARTVTA.DBF', 'NO_REFEREN', index_tag='NO_REFEREN', format_key=_folio_key, **options)
+
+
+def test_dense_numeric_keys_use_a_range_scan():
+    assert lookup(IndexedReader(True)).choose_strategy(list(range(100, 200, 2))) == STRATEGY_RANGE
+    assert lookup(IndexedReader(False)).choose_strategy(['000010', '000011', '000013']) == STRATEGY_RANGE
+
+
+def test_sparse_keys_seek_when_indexed_and_few():
+    sparse = list(range(1, 100_000, 1000))
+    assert lookup(IndexedReader(True)).choose_strategy(sparse) == STRATEGY_SEEK
+    assert lookup(IndexedReader(False)).choose_strategy(sparse) == STRATEGY_CHUNKED
+    assert lookup(IndexedReader(True), seek_max_keys=50).choose_strategy(sparse) == STRATEGY_CHUNKED
+    assert lookup(IndexedReader(True)).choose_strategy(['A1', 'B2']) == STRATEGY_SEEK
+
+
+def test_forced_and_unknown_strategies():
+    assert lookup(IndexedReader(False), strategy=STRATEGY_SEEK).choose_strategy([1, 2, 3]) == STRATEGY_SEEK
+    with pytest.raises(ValueError):
+        lookup(IndexedReader(True), strategy='scan')
+
+
+def test_range_probe_matches_zero_padded_folios(data_dir):
+    reader = NativeDBFReader(str(data_dir))
+    keys = [5, '7', 9, 12]  # Stored as '000005', '000007', ...
+    by_range = lookup(reader, strategy=STRATEGY_RANGE)
+    records = list(by_range.iter_records(keys, columns=['PARTIDA']))
+
+    folios = [record['NO_REFEREN'] for record in reader.iter_records('PARTVTA.DBF', columns=['NO_REFEREN'])]
+
+    assert sorted({record['NO_REFEREN'] for record in records}) == ['000005', '000007', '000009', '000012']
+    assert len(records) == sum(folio in ('000005', '000007', '000009', '000012') for folio in folios)
+    assert by_range.last_stats.passes == 1
+    assert by_range.last_stats.rows_read == sum('000005' <= folio <= '000012' for folio in folios)
+
+    chunked = lookup(reader, strategy=STRATEGY_CHUNKED, chunk_size=3)
+    same = list(chunked.iter_records(keys))
+    assert chunked.last_stats.passes == 2
+    key = lambda record: (record['NO_REFEREN'], record['PARTIDA'])
+    assert sorted(key(record) for record in same) == sorted(key(record) for record in records)
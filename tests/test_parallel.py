@@ -0,0 +1,53 @@
+import threading
+
+from conftest import PRODUCTS
+
+from src.dbf_enc_reader.native import NativeDBFReader
+from src.dbf_enc_reader.parallel import ParallelScan
+
+
+class CountingReader(NativeDBFReader):
+    """Native reader tracking how many partition streams are open at once."""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.lock = threading.Lock()
+        self.open_streams = 0
+        self.max_open_streams = 0
+
+    def iter_batches(self, *args, **kwargs):
+        with self.lock:
+            self.open_streams += 1
+            self.max_open_streams = max(self.max_open_streams, self.open_streams)
+        try:
+            yield from super().iter_batches(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.open_streams -= 1
+
+    def read_table(self, *args, **kwargs):
+        raise AssertionError("partitions must be streamed, not read whole")
+
+
+def test_parallel_scan_matches_sequential_scan(data_dir):
+    reader = CountingReader(str(data_dir))
+    sequential = list(NativeDBFReader(str(data_dir)).iter_records('CAT_PROD.DBF'))
+    scan = ParallelScan(reader, workers=3)
+
+    assert len(scan.partitions('CAT_PROD.DBF')) == 12
+    assert list(scan.iter_records('CAT_PROD.DBF')) == sequential
+    assert len(sequential) == PRODUCTS
+    assert reader.max_open_streams <= 3
+    assert reader.open_streams == 0
+
+
+def test_parallel_scan_limit_and_batches(data_dir):
+    reader = CountingReader(str(data_dir))
+    scan = ParallelScan(reader, workers=2)
+    sequential = list(NativeDBFReader(str(data_dir)).iter_records('CAT_PROD.DBF', columns=['CLAVE']))
+
+    assert list(scan.iter_records('CAT_PROD.DBF', limit=25, columns=['CLAVE'])) == sequential[:25]
+    batches = list(scan.iter_batches('CAT_PROD.DBF', 64, columns=['CLAVE']))
+    assert [len(batch) for batch in batches] == [64, 64, 64, PRODUCTS - 192]
+    assert [record for batch in batches for record in batch] == sequential
+    assert reader.open_streams == 0
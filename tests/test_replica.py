@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import struct
+from datetime import timedelta
+
+import pytest
+import synthetic
+from conftest import PRODUCTS, SALES
+
+from src.dbf_enc_reader.filters import And, Compare, In, Range
+from src.dbf_enc_reader.native import NativeDBFReader
+from src.dbf_enc_reader.replica import (MODE_FULL, MODE_KEYS, MODE_UNCHANGED, MODE_WINDOW, ReplicaReader,
+                                        SQLiteReplica)
+
+
+def refresh(directory, database, mapping_manager, full=False):
+    replica = SQLiteReplica(str(database), mapping_manager)
+    return {result.table: result for result in replica.refresh(NativeDBFReader(str(directory)), full)}
+
+
+def patch_record(path, recno, field=None, text=None):
+    """Overwrite a field of a DBF record in place, or mark the record deleted."""
+    fields = synthetic.read_fields(str(path))
+    with open(path, 'r+b') as f:
+        header_length, record_length = struct.unpack('<HH', f.read(12)[8:])
+        start = header_length + (recno - 1) * record_length
+        if field is None:
+            f.seek(start)
+            f.write(b'*')
+        else:
+            offset = 1
+            for name, _, length, _ in fields:
+                if name == field:
+                    break
+                offset += length
+            f.seek(start + offset)
+            f.write(text.encode('ascii').rjust(length))
+    # Edits within the same clock tick must still change the signature
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def rows(database, sql, *params):
+    with sqlite3.connect(str(database)) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def test_first_refresh_loads_and_unchanged_tables_are_skipped(data_dir, mapping_manager, tmp_path):
+    database = tmp_path / 'replica.sqlite'
+    details = synthetic.record_count(str(data_dir / 'PARTVTA.DBF'))
+
+    first = refresh(data_dir, database, mapping_manager)
+    assert {table: result.mode for table, result in first.items()} == dict.fromkeys(first, MODE_FULL)
+    assert [first[table].inserted for table in ('CAT_PROD.DBF', 'VENTA.DBF', 'PARTVTA.DBF')] == [PRODUCTS, SALES, details]
+
+    second = refresh(data_dir, database, mapping_manager)
+    assert {table: result.mode for table, result in second.items()} == dict.fromkeys(second, MODE_UNCHANGED)
+    assert all(result.rows_read == result.inserted == result.updated == result.deleted == 0
+               for result in second.values())
+    assert rows(database, 'SELECT COUNT(*) FROM PARTVTA') == [(details,)]
+
+
+def test_window_refresh_picks_up_edited_and_deleted_sales(copy_dir, mapping_manager, tmp_path):
+    database = tmp_path / 'replica.sqlite'
+    refresh(copy_dir, database, mapping_manager)
+
+    venta = copy_dir / 'VENTA.DBF'
+    patch_record(venta, SALES, 'TOTAL_BRUT', '12345.67')
+    patch_record(venta, SALES - 1)
+    # Older than the look-back window: only a full refresh sees it
+    patch_record(venta, 1, 'TOTAL_BRUT', '1.00')
+
+    result = refresh(copy_dir, database, mapping_manager)['VENTA.DBF']
+    assert result.mode == MODE_WINDOW and 0 < result.rows_read < SALES
+    assert (result.inserted, result.updated, result.deleted) == (0, 1, 1)
+    assert rows(database, 'SELECT TOTAL_BRUT FROM VENTA WHERE NO_REFEREN = ?', f'{SALES:06d}') == [(12345.67,)]
+    assert rows(database, 'SELECT COUNT(*) FROM VENTA WHERE NO_REFEREN = ?', f'{SALES - 1:06d}') == [(0,)]
+    assert rows(database, "SELECT TOTAL_BRUT FROM VENTA WHERE NO_REFEREN = '000001'") != [(1.0,)]
+
+    result = refresh(copy_dir, database, mapping_manager, full=True)['VENTA.DBF']
+    assert result.mode == MODE_FULL and result.inserted == SALES - 1
+    assert rows(database, "SELECT TOTAL_BRUT FROM VENTA WHERE NO_REFEREN = '000001'") == [(1.0,)]
+
+
+def test_only_changed_folios_get_their_lines_rewritten(copy_dir, mapping_manager, tmp_path):
+    database = tmp_path / 'replica.sqlite'
+    refresh(copy_dir, database, mapping_manager)
+    before = dict(rows(database, 'SELECT rowid, NO_REFEREN FROM PARTVTA'))
+
+    # Change one line of the newest sale
+    partvta = copy_dir / 'PARTVTA.DBF'
+    last = synthetic.record_count(str(partvta))
+    folio = f'{SALES:06d}'
+    lines = sum(1 for value in before.values() if value == folio)
+    patch_record(partvta, last, 'CANTIDAD', '99.000')
+
+    results = refresh(copy_dir, database, mapping_manager)
+    assert results['VENTA.DBF'].mode == MODE_UNCHANGED
+    result = results['PARTVTA.DBF']
+    assert result.mode == MODE_KEYS and 0 < result.rows_read < last
+    assert (result.inserted, result.updated, result.deleted) == (0, lines, 0)
+
+    after = dict(rows(database, 'SELECT rowid, NO_REFEREN FROM PARTVTA'))
+    # The other sales keep their rows (and rowids) untouched
+    kept = {rowid: value for rowid, value in before.items() if value != folio}
+    assert {rowid: value for rowid, value in after.items() if value != folio} == kept
+    assert len(after) == len(before)
+    assert 99.0 in [value for value, in rows(database, 'SELECT CANTIDAD FROM PARTVTA WHERE NO_REFEREN = ?', folio)]
+
+
+@pytest.fixture(scope='module')
+def readers(indexed_dir, mapping_manager, tmp_path_factory):
+    database = tmp_path_factory.mktemp('replica') / 'replica.sqlite'
+    native = NativeDBFReader(str(indexed_dir))
+    SQLiteReplica(str(database), mapping_manager).refresh(native)
+    return native, ReplicaReader(str(database))
+
+
+def sale(native, recno):
+    return list(native.iter_records('VENTA.DBF', filters=Range('RECNO()', recno, recno)))[0]
+
+
+def test_replica_reader_matches_native_reader(readers):
+    native, replica = readers
+    columns = replica.get_table_info('VENTA.DBF')['columns']
+    day = sale(native, SALES // 2)['F_EMISION']
+    filters = [
+        Compare('F_EMISION', '=', day.date()),
+        Compare('F_EMISION', '<', day),
+        Compare('TOTAL_BRUT', '>=', 10000),
+        Range('F_EMISION', day - timedelta(days=5), day),
+        Range('NO_REFEREN', '000050', '000080'),
+        In('NO_REFEREN', ['000007', '000100', '000299', '999999']),
+        In('CLAVE_VEND', [1, 2, 3]),
+        And(Range('F_EMISION', day, None), Compare('CLAVE_VEND', '<=', 30)),
+    ]
+    for node in filters:
+        expected = list(native.iter_records('VENTA.DBF', columns=columns, filters=node))
+        found = list(replica.iter_records('VENTA.DBF', columns=columns, filters=node))
+        assert expected, node
+        key = lambda record: record['NO_REFEREN']  # noqa: E731
+        assert sorted(found, key=key) == sorted(expected, key=key), node
+
+
+def test_replica_reader_follows_order_by(readers):
+    native, replica = readers
+    columns = replica.get_table_info('VENTA.DBF')['columns']
+    day = sale(native, SALES // 2)['F_EMISION']
+    for node, order_by in ((Range('F_EMISION', day - timedelta(days=10), day), 'NO_REFEREN'),
+                           (Compare('TOTAL_BRUT', '<', 5000), 'F_EMISION'),
+                           (None, 'NO_REFEREN')):
+        expected = list(native.iter_records('VENTA.DBF', columns=columns, filters=node, order_by=order_by))
+        found = list(replica.iter_records('VENTA.DBF', columns=columns, filters=node, order_by=order_by))
+        assert expected and found == expected, (node, order_by)
+    assert replica.access_paths['VENTA.DBF'].index is None
+
+    found = list(replica.iter_records('VENTA.DBF', columns=['NO_REFEREN'], filters=Range('NO_REFEREN', '000010', '000020')))
+    assert [record['NO_REFEREN'] for record in found] == [f'{i:06d}' for i in range(10, 21)]
+    assert replica.last_access_path.index == 'NO_REFEREN'
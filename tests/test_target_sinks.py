@@ -0,0 +1,136 @@
+import gzip
+import json
+import sqlite3
+import threading
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from src.sinks import http_sink  # noqa: E402
+from src.sinks.registry import create_target_sink  # noqa: E402
+
+SCHEMA = [('Folio', 'number'), ('cliente', 'string'), ('total_bruto', 'number')]
+
+
+def rows(database, table):
+    with sqlite3.connect(database) as conn:
+        return conn.execute(f'SELECT * FROM "{table}" ORDER BY 1').fetchall()
+
+
+def test_sqlite_upserts_on_the_key(tmp_path):
+    database = str(tmp_path / 'target.sqlite')
+    with create_target_sink('sqlite', 'Ventas', SCHEMA, ['Folio'], database=database) as sink:
+        sink.write_batch([
+            {'Folio': 1, 'cliente': 'A', 'total_bruto': 10.0, 'detalles': [{'REF': 7, 'cantidad': 2}]},
+            {'Folio': 2, 'cliente': 'B', 'total_bruto': 5.5, 'detalles': []},
+        ])
+        sink.write_batch([{'Folio': 1, 'cliente': 'A2', 'total_bruto': 12.0, 'detalles': None}])
+    # A second export of the same rows updates them too
+    with create_target_sink('sqlite', 'Ventas', SCHEMA, ['Folio'], database=database) as sink:
+        sink.write({'Folio': 2, 'cliente': 'Ñ', 'total_bruto': 6.0, 'detalles': [{'REF': 8, 'cantidad': 1.5}]})
+
+    assert rows(database, 'Ventas') == [(1, 'A2', 12.0, None), (2, 'Ñ', 6.0, '[{"REF":8,"cantidad":1.5}]')]
+    assert json.loads(rows(database, 'Ventas')[1][3]) == [{'REF': 8, 'cantidad': 1.5}]
+    assert sink.outputs == [f"{database} (Ventas)"]
+
+
+def test_sqlite_without_key_appends_and_rejects_unknown_keys(tmp_path):
+    database = str(tmp_path / 'target.sqlite')
+    with create_target_sink('sqlite', 'Log', SCHEMA, None, database=database) as sink:
+        sink.write_batch([{'Folio': 1, 'cliente': 'A', 'total_bruto': 1}] * 2)
+    assert len(rows(database, 'Log')) == 2
+
+    with pytest.raises(ValueError):
+        with create_target_sink('sqlite', 'Bad', SCHEMA, ['REF'], database=database) as sink:
+            sink.write({'Folio': 1})
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+
+class FakeSession:
+    """Stand-in for requests.Session replaying scripted responses."""
+    script = []
+    posts = []
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.headers = {}
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, data, timeout):
+        with self.lock:
+            self.posts.append((url, dict(self.headers), data))
+            result = self.script.pop(0) if self.script else FakeResponse(200)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_http(monkeypatch):
+    delays = []
+    FakeSession.script = []
+    FakeSession.posts = []
+    monkeypatch.setattr(http_sink.requests, 'Session', FakeSession)
+    monkeypatch.setattr(http_sink.time, 'sleep', delays.append)
+    return delays
+
+
+def sink(**options):
+    return create_target_sink('http', 'Ventas', SCHEMA, ['Folio'], url='http://target/api/{table}',
+                              headers={'Authorization': 'Bearer t'}, **options)
+
+
+def test_http_sends_gzip_batches(fake_http):
+    records = [{'Folio': i, 'cliente': 'Ñ'} for i in range(5)]
+    with sink(batch_size=2, workers=2) as http:
+        http.write_batch(records)
+
+    assert http.batches_sent == 3 and http.retries == 0
+    sent = []
+    for url, headers, body in FakeSession.posts:
+        assert url == 'http://target/api/Ventas'
+        assert headers['Content-Encoding'] == 'gzip' and headers['Authorization'] == 'Bearer t'
+        payload = json.loads(gzip.decompress(body).decode('utf-8'))
+        assert payload['table'] == 'Ventas' and payload['key'] == ['Folio']
+        sent.extend(payload['records'])
+    assert sorted(sent, key=lambda record: record['Folio']) == records
+
+
+def test_http_retries_with_backoff(fake_http):
+    FakeSession.script = [FakeResponse(503), requests.ConnectionError('reset'),
+                          FakeResponse(429, {'Retry-After': '3'}), FakeResponse(200)]
+    with sink(workers=1, backoff=0.5, compress=False) as http:
+        http.write({'Folio': 1})
+
+    assert http.batches_sent == 1 and http.retries == 3
+    assert 0.25 <= fake_http[0] <= 0.5 and 0.5 <= fake_http[1] <= 1.0 and fake_http[2] == 3.0
+    assert json.loads(FakeSession.posts[-1][2]) == {'table': 'Ventas', 'key': ['Folio'], 'records': [{'Folio': 1}]}
+
+
+def test_http_gives_up(fake_http):
+    FakeSession.script = [FakeResponse(502)] * 3
+    with pytest.raises(RuntimeError, match='after 3 attempts'):
+        with sink(workers=1, max_retries=2) as http:
+            http.write({'Folio': 1})
+    assert len(FakeSession.posts) == 3
+
+    FakeSession.script = [FakeResponse(400)]
+    with pytest.raises(RuntimeError, match='rejected'):
+        with sink(workers=1) as http:
+            http.write({'Folio': 1})
+    assert len(fake_http) == 2